@@ -39,6 +39,41 @@ def create_app(config='development'):
     app.config['SQLALCHEMY_DATABASE_URI'] = f'postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}'
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
+    # Hintergrund-Jobs: Celery nur wenn ein Broker konfiguriert ist, sonst Thread-Pool
+    app.config['CELERY_BROKER_URL'] = os.environ.get('CELERY_BROKER_URL')
+    app.config['CELERY_RESULT_BACKEND'] = os.environ.get('CELERY_RESULT_BACKEND')
+    app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+    app.config['REPORTS_FOLDER'] = os.environ.get(
+        'REPORTS_FOLDER', os.path.join(os.path.dirname(app.root_path), 'reports')
+    )
+
+    # Kennzahlen-Cache: Redis wenn erreichbar, sonst prozessintern. Der prozessinterne
+    # Cache sieht Invalidierungen anderer Worker nicht und bleibt deshalb aus, sobald
+    # mehrere Worker-Prozesse laufen (WEB_CONCURRENCY, setzt gunicorn_config.py)
+    app.config['CACHE_REDIS_URL'] = os.environ.get('CACHE_REDIS_URL') or os.environ.get('REDIS_URL')
+    app.config['WEB_CONCURRENCY'] = int(os.environ.get('WEB_CONCURRENCY', 1))
+    app.config['CACHE_DEFAULT_TIMEOUT'] = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+    app.config['USER_CACHE_TTL'] = int(os.environ.get('USER_CACHE_TTL', 60))
+
+    # SQL-Instrumentierung pro Request (Header + N+1-Warnungen), im Debug-Modus automatisch
+    app.config['SQL_PROFILING'] = os.environ.get('SQL_PROFILING', '1' if app.debug else '0').lower() in ('1', 'true')
+    app.config['SQL_N_PLUS_ONE_THRESHOLD'] = int(os.environ.get('SQL_N_PLUS_ONE_THRESHOLD', 5))
+
+    # Prometheus-Metriken unter /metrics (Endpoints, Last, Pool-Zustand) - von sich aus
+    # nur mit Bearer-Token aktiv; METRICS_ENABLED=1 ohne Token nur hinter einem Proxy,
+    # der /metrics nicht nach außen gibt
+    app.config['METRICS_TOKEN'] = os.environ.get('METRICS_TOKEN')
+    app.config['METRICS_ENABLED'] = os.environ.get(
+        'METRICS_ENABLED', '1' if app.config['METRICS_TOKEN'] else '0'
+    ).lower() in ('1', 'true')
+
+    # Web-Push (VAPID-Schlüssel z.B. mit 'vapid --gen' aus py-vapid erzeugen)
+    app.config['VAPID_PUBLIC_KEY'] = os.environ.get('VAPID_PUBLIC_KEY')
+    app.config['VAPID_PRIVATE_KEY'] = os.environ.get('VAPID_PRIVATE_KEY')
+    app.config['VAPID_CLAIM_SUB'] = os.environ.get('VAPID_CLAIM_SUB', 'mailto:admin@automaten-manager.de')
+    app.config['PUSH_WORKERS'] = int(os.environ.get('PUSH_WORKERS', 8))
+    app.config['PUSH_TIMEOUT'] = int(os.environ.get('PUSH_TIMEOUT', 10))
+
     # Extensions mit App verbinden
     db.init_app(app)
     login_manager.init_app(app)
@@ -46,6 +81,21 @@ def create_app(config='development'):
     login_manager.login_message = 'Bitte melden Sie sich an, um fortzufahren.'
     login_manager.login_message_category = 'info'
 
+    # Job-Backend (Reports etc.)
+    from app.jobs import init_jobs
+    init_jobs(app)
+
+    # Kennzahlen-Cache (und User-Cache für Flask-Login, registriert die Events)
+    from app.utils.cache import init_cache
+    init_cache(app)
+    from app.utils import user_cache
+
+    # SQL-Instrumentierung und Prometheus-Metriken
+    from app.utils.sql_profiler import init_sql_profiler
+    init_sql_profiler(app)
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+
     # Web Blueprints registrieren - AUSSERHALB des app_context!
     from app.web import main_bp, auth_bp
     app.register_blueprint(main_bp)
@@ -178,6 +228,10 @@ def create_app(config='development'):
     # Standard Routes (für Tests)
     register_default_routes(app)
 
+    # CLI-Befehle (flask stock ...)
+    from app.cli import register_cli
+    register_cli(app)
+
     # PWA API Blueprint registrieren
     try:
         from app.api.pwa import pwa_bp
@@ -355,5 +409,5 @@ def register_default_routes(app):
 @login_manager.user_loader
 def load_user(user_id):
     # Import hier um Circular Import zu vermeiden
-    from app.models import User
-    return User.query.get(int(user_id))
\ No newline at end of file
+    from app.utils.user_cache import load_user as load_cached_user
+    return load_cached_user(user_id)
\ No newline at end of file
@@ -12,8 +12,8 @@ import os
 
 pwa_bp = Blueprint('pwa_api', __name__, url_prefix='/api/pwa')
 
-# Push Notification Subscriptions Storage (sollte in DB gespeichert werden)
-push_subscriptions = {}
+# Push-Versand registriert den Hintergrund-Job 'push.deliver'
+from app.utils import push
 
 @pwa_bp.route('/ping', methods=['GET', 'HEAD'])
 def ping():
@@ -39,79 +39,88 @@ def manifest():
     return jsonify(manifest_data)
 
 
+@pwa_bp.route('/push/public-key', methods=['GET'])
+def push_public_key():
+    """VAPID Public Key für pushManager.subscribe()"""
+    key = current_app.config.get('VAPID_PUBLIC_KEY')
+    if not key:
+        return jsonify({'error': 'Push nicht konfiguriert'}), 404
+    return jsonify({'public_key': key})
+
+
 @pwa_bp.route('/push/subscribe', methods=['POST'])
 @login_required
 def subscribe_push():
     """Push Notification Subscription speichern"""
-    subscription = request.json
-    
+    from app import db
+    from app.models import NotificationType
+
+    subscription = request.get_json(silent=True)
     if not subscription:
         return jsonify({'error': 'No subscription data'}), 400
-    
-    # In Production: In Datenbank speichern
-    push_subscriptions[current_user.id] = subscription
-    
-    # Test-Notification senden
-    send_test_notification(current_user.id)
-    
+
+    try:
+        push.save_subscription(current_user.id, subscription, request.headers.get('User-Agent'))
+        db.session.commit()
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Test-Notification im Hintergrund senden
+    push.notify(
+        current_user.id,
+        'Willkommen bei Automaten Manager!',
+        'Push Notifications sind aktiviert',
+        type=NotificationType.SUCCESS
+    )
+
     return jsonify({'success': True, 'message': 'Push notifications enabled'})
 
 
 @pwa_bp.route('/push/unsubscribe', methods=['POST'])
 @login_required
 def unsubscribe_push():
-    """Push Notification Subscription entfernen"""
-    if current_user.id in push_subscriptions:
-        del push_subscriptions[current_user.id]
-    
+    """Push Notification Subscription entfernen (ohne endpoint: alle des Users)"""
+    from app import db
+
+    endpoint = (request.get_json(silent=True) or {}).get('endpoint')
+    push.remove_subscription(current_user.id, endpoint)
+    db.session.commit()
+
     return jsonify({'success': True, 'message': 'Push notifications disabled'})
 
 
 @pwa_bp.route('/sync/entries', methods=['POST'])
 @login_required
 def sync_entries():
-    """Offline erfasste Einträge synchronisieren"""
-    entries = request.json.get('entries', [])
-    synced = []
-    failed = []
-    
-    for entry_data in entries:
-        try:
-            # Eintrag in DB speichern
-            from app.models import Entry, Device
-            
-            device = Device.query.get(entry_data['device_id'])
-            if not device or device.owner_id != current_user.id:
-                failed.append({'id': entry_data.get('temp_id'), 'error': 'Invalid device'})
-                continue
-            
-            entry = Entry(
-                device_id=entry_data['device_id'],
-                amount=entry_data['amount'],
-                date=datetime.fromisoformat(entry_data['date']),
-                description=entry_data.get('description'),
-                user_id=current_user.id
-            )
-            
-            from app import db
-            db.session.add(entry)
-            db.session.commit()
-            
-            synced.append({
-                'temp_id': entry_data.get('temp_id'),
-                'id': entry.id,
-                'synced_at': datetime.now().isoformat()
-            })
-            
-        except Exception as e:
-            failed.append({
-                'id': entry_data.get('temp_id'),
-                'error': str(e)
-            })
-    
+    """Offline erfasste Einträge als Stapel synchronisieren (idempotent)"""
+    from app import db
+    from app.utils.entry_sync import sync_entries as sync_batch, MAX_BATCH, CREATED, DUPLICATE, FAILED
+
+    entries = (request.get_json(silent=True) or {}).get('entries', [])
+    if not isinstance(entries, list):
+        return jsonify({'error': 'entries muss eine Liste sein'}), 400
+    if len(entries) > MAX_BATCH:
+        return jsonify({'error': f'Maximal {MAX_BATCH} Einträge pro Sync'}), 413
+
+    try:
+        results = sync_batch(current_user.id, current_user.id, entries)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.exception("PWA-Sync fehlgeschlagen")
+        return jsonify({'error': str(e)}), 500
+
+    synced_at = datetime.now().isoformat()
     return jsonify({
-        'synced': synced,
-        'failed': failed,
+        'results': results,
+        # Bisheriges Antwortformat für ältere Clients
+        'synced': [{
+            'temp_id': r['idempotency_key'],
+            'id': r['id'],
+            'duplicate': r['status'] == DUPLICATE,
+            'synced_at': synced_at
+        } for r in results if r['status'] in (CREATED, DUPLICATE)],
+        'failed': [{'id': r['idempotency_key'], 'error': r['error']} for r in results if r['status'] == FAILED],
         'total': len(entries)
     })
 
@@ -121,50 +130,26 @@ def sync_entries():
 def cache_dashboard():
     """Dashboard-Daten für Offline-Cache"""
     from app.models import Device, Entry, Expense
-    from sqlalchemy import func
-    
-    # Aktuelle Statistiken
-    today = datetime.now().date()
-    week_start = today - timedelta(days=today.weekday())
-    month_start = today.replace(day=1)
+    from app.utils.period_stats import PeriodStats
+    from app.utils.delta_sync import device_dict, entry_dict
+    from sqlalchemy.orm import joinedload
     
-    # Einnahmen
-    daily_income = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        Entry.date == today
-    ).with_entities(func.sum(Entry.amount)).scalar() or 0
-    
-    weekly_income = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        Entry.date >= week_start
-    ).with_entities(func.sum(Entry.amount)).scalar() or 0
-    
-    monthly_income = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        Entry.date >= month_start
-    ).with_entities(func.sum(Entry.amount)).scalar() or 0
+    # Aktuelle Statistiken (ein Roundtrip für alle Zeiträume)
+    periods = PeriodStats.standard(current_user.id, 'today', 'week', 'month')
+    daily_income = periods['today']['income']
+    weekly_income = periods['week']['income']
+    monthly_income = periods['month']['income']
     
     # Geräte
     devices = Device.query.filter_by(owner_id=current_user.id).all()
-    device_data = [{
-        'id': d.id,
-        'name': d.name,
-        'status': d.status.value if hasattr(d.status, 'value') else str(d.status),
-        'location': d.location
-    } for d in devices]
+    device_data = [device_dict(d) for d in devices]
     
     # Letzte Einträge
-    recent_entries = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id
+    recent_entries = Entry.query.options(joinedload(Entry.device)).filter(
+        Entry.owner_id == current_user.id
     ).order_by(Entry.date.desc()).limit(10).all()
     
-    entries_data = [{
-        'id': e.id,
-        'device_name': e.device.name,
-        'amount': float(e.amount),
-        'date': e.date.isoformat(),
-        'description': e.description
-    } for e in recent_entries]
+    entries_data = [entry_dict(e) for e in recent_entries]
     
     return jsonify({
         'cached_at': datetime.now().isoformat(),
@@ -185,18 +170,12 @@ def cache_dashboard():
 def cache_products():
     """Produkt-Daten für Offline-Cache"""
     from app.models import Product
+    from app.utils.delta_sync import product_dict
     
     products = Product.query.filter_by(user_id=current_user.id).all()
+    stock_levels = Product.get_stock_levels(p.id for p in products)
     
-    product_data = [{
-        'id': p.id,
-        'name': p.name,
-        'category': p.category.value if p.category else None,
-        'unit': p.unit.value if p.unit else None,
-        'current_stock': p.get_current_stock() if hasattr(p, 'get_current_stock') else 0,
-        'reorder_point': p.reorder_point,
-        'default_price': float(p.default_price) if p.default_price else 0
-    } for p in products]
+    product_data = [product_dict(p, stock_levels[p.id]) for p in products]
     
     return jsonify({
         'cached_at': datetime.now().isoformat(),
@@ -205,6 +184,29 @@ def cache_products():
     })
 
 
+@pwa_bp.route('/changes', methods=['GET'])
+@login_required
+def changes():
+    """Delta-Sync: nur Änderungen seit ?since=<cursor> (ohne Cursor: vollständiger Stand)"""
+    from app.utils.period_stats import PeriodStats
+    from app.utils.delta_sync import changes_since
+    from app.utils.pagination import InvalidCursor
+
+    try:
+        result = changes_since(current_user.id, request.args.get('since'))
+    except InvalidCursor:
+        return jsonify({'error': 'Ungültiger Sync-Cursor'}), 400
+
+    # Kennzahlen sind ein Roundtrip und werden immer mitgeschickt
+    periods = PeriodStats.standard(current_user.id, 'today', 'week', 'month')
+    result['statistics'] = {
+        'daily_income': float(periods['today']['income']),
+        'weekly_income': float(periods['week']['income']),
+        'monthly_income': float(periods['month']['income'])
+    }
+    return jsonify(result)
+
+
 @pwa_bp.route('/updates/check', methods=['GET'])
 def check_updates():
     """Prüft ob App-Updates verfügbar sind"""
@@ -217,42 +219,3 @@ def check_updates():
         'update_available': current_version != latest_version,
         'update_url': '/static/sw.js' if current_version != latest_version else None
     })
-
-
-# Helper Functions
-def send_test_notification(user_id):
-    """Test Push Notification senden"""
-    if user_id not in push_subscriptions:
-        return False
-    
-    # In Production: Web Push Library verwenden
-    # from pywebpush import webpush
-    
-    subscription = push_subscriptions[user_id]
-    
-    # webpush(
-    #     subscription_info=subscription,
-    #     data=json.dumps({
-    #         'title': 'Willkommen bei Automaten Manager!',
-    #         'body': 'Push Notifications sind aktiviert',
-    #         'icon': '/static/icons/icon-192x192.png',
-    #         'badge': '/static/icons/badge-72x72.png'
-    #     }),
-    #     vapid_private_key=VAPID_PRIVATE_KEY,
-    #     vapid_claims={
-    #         'sub': 'mailto:admin@automaten-manager.de'
-    #     }
-    # )
-    
-    return True
-
-
-def send_notification(user_id, title, body, data=None):
-    """Push Notification an User senden"""
-    if user_id not in push_subscriptions:
-        return False
-    
-    # Implementation mit pywebpush
-    # ...
-    
-    return True
@@ -4,7 +4,11 @@
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, create_access_token, get_jwt_identity
 from datetime import datetime, timedelta
-from app.models import db, User, Device, Entry, Expense
+from app.models import db, User, Device, Entry, Expense, DailyRevenue
+from app.utils.fleet_summary import FleetSummary
+from app.utils.pagination import paginate_request
+from sqlalchemy.orm import contains_eager
+from app.utils.period_stats import PeriodStats
 from app import limiter
 
 api_v1_bp = Blueprint('api_v1', __name__)
@@ -74,19 +78,26 @@ def get_devices():
     """Alle Geräte abrufen"""
     current_user_id = get_jwt_identity()
 
-    devices = Device.query.filter_by(owner_id=current_user_id).all()
+    page = paginate_request(
+        Device.query.filter_by(owner_id=current_user_id),
+        order_by=[Device.id.asc()],
+        per_page=100
+    )
+    devices = page.items
+    summary = FleetSummary.for_owner(current_user_id, device_ids=[d.id for d in devices])
 
     return jsonify({
+        'pagination': page.to_dict(),
         'devices': [{
             'id': d.id,
             'name': d.name,
             'type': d.type.value,
             'status': d.status.value,
             'location': d.location,
-            'total_revenue': float(d.get_total_revenue()),
-            'total_expenses': float(d.get_total_expenses()),
-            'profit': float(d.get_profit()),
-            'roi': d.get_roi()
+            'total_revenue': float(summary[d.id].revenue),
+            'total_expenses': float(summary[d.id].expenses),
+            'profit': float(summary[d.id].profit),
+            'roi': summary[d.id].roi
         } for d in devices]
     }), 200
 
@@ -102,6 +113,8 @@ def get_device(device_id):
     if not device:
         return jsonify({'error': 'Device not found'}), 404
 
+    summary = device.get_financial_summary()
+
     return jsonify({
         'device': {
             'id': device.id,
@@ -112,11 +125,11 @@ def get_device(device_id):
             'location': device.location,
             'purchase_date': device.purchase_date.isoformat() if device.purchase_date else None,
             'purchase_price': float(device.purchase_price),
-            'total_revenue': float(device.get_total_revenue()),
-            'total_expenses': float(device.get_total_expenses()),
-            'profit': float(device.get_profit()),
-            'roi': device.get_roi(),
-            'daily_average': float(device.get_daily_average()),
+            'total_revenue': float(summary.revenue),
+            'total_expenses': float(summary.expenses),
+            'profit': float(summary.profit),
+            'roi': summary.roi,
+            'daily_average': float(summary.window_average),
             'needs_maintenance': device.needs_maintenance
         }
     }), 200
@@ -224,11 +237,11 @@ def get_entries():
     device_id = request.args.get('device_id', type=int)
     start_date = request.args.get('start_date')
     end_date = request.args.get('end_date')
-    page = request.args.get('page', 1, type=int)
-    per_page = request.args.get('per_page', 20, type=int)
 
     # Query aufbauen
-    query = Entry.query.join(Device).filter(Device.owner_id == current_user_id)
+    query = Entry.query.join(Device).options(contains_eager(Entry.device)).filter(
+        Entry.owner_id == current_user_id
+    )
 
     if device_id:
         query = query.filter(Entry.device_id == device_id)
@@ -239,10 +252,8 @@ def get_entries():
     if end_date:
         query = query.filter(Entry.date <= datetime.fromisoformat(end_date).date())
 
-    # Pagination
-    pagination = query.order_by(Entry.date.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
-    )
+    # Keyset-Pagination: ?after=<next_cursor> / ?before=<prev_cursor>, ?count=exact|estimate
+    page = paginate_request(query, order_by=[Entry.date.desc(), Entry.id.desc()], per_page=20)
 
     return jsonify({
         'entries': [{
@@ -253,13 +264,8 @@ def get_entries():
             'date': e.date.isoformat(),
             'description': e.description,
             'is_validated': e.is_validated
-        } for e in pagination.items],
-        'pagination': {
-            'page': page,
-            'per_page': per_page,
-            'total': pagination.total,
-            'pages': pagination.pages
-        }
+        } for e in page.items],
+        'pagination': page.to_dict()
     }), 200
 
 
@@ -323,18 +329,13 @@ def get_statistics_overview():
     total_devices = Device.query.filter_by(owner_id=current_user_id).count()
     active_devices = Device.query.filter_by(owner_id=current_user_id, status='active').count()
 
-    total_revenue = db.session.query(func.sum(Entry.amount)).join(Device).filter(
-        Device.owner_id == current_user_id
-    ).scalar() or 0
-
-    month_revenue = db.session.query(func.sum(Entry.amount)).join(Device).filter(
-        Device.owner_id == current_user_id,
-        Entry.date >= month_start
-    ).scalar() or 0
-
-    total_expenses = db.session.query(func.sum(Expense.amount)).filter(
-        Expense.user_id == current_user_id
-    ).scalar() or 0
+    periods = PeriodStats.collect(current_user_id, {
+        'total': (None, None),
+        'month': (month_start, None)
+    })
+    total_revenue = periods['total']['income']
+    month_revenue = periods['month']['income']
+    total_expenses = periods['total']['expenses']
 
     return jsonify({
         'devices': {
@@ -368,51 +369,31 @@ def get_chart_data(period):
     if period == 'week':
         # Letzte 7 Tage
         start_date = date.today() - timedelta(days=6)
-
-        data = db.session.query(
-            Entry.date,
-            func.sum(Entry.amount).label('revenue')
-        ).join(Device).filter(
-            Device.owner_id == current_user_id,
-            Entry.date >= start_date
-        ).group_by(Entry.date).order_by(Entry.date).all()
+        data = DailyRevenue.series(current_user_id, start_date, None, period='day')
 
         return jsonify({
-            'labels': [d.date.isoformat() for d in data],
-            'data': [float(d.revenue) for d in data]
+            'labels': [d.period.isoformat() for d in data],
+            'data': [float(d.total) for d in data]
         }), 200
 
     elif period == 'month':
         # Letzte 30 Tage
         start_date = date.today() - timedelta(days=29)
-
-        data = db.session.query(
-            Entry.date,
-            func.sum(Entry.amount).label('revenue')
-        ).join(Device).filter(
-            Device.owner_id == current_user_id,
-            Entry.date >= start_date
-        ).group_by(Entry.date).order_by(Entry.date).all()
+        data = DailyRevenue.series(current_user_id, start_date, None, period='day')
 
         return jsonify({
-            'labels': [d.date.isoformat() for d in data],
-            'data': [float(d.revenue) for d in data]
+            'labels': [d.period.isoformat() for d in data],
+            'data': [float(d.total) for d in data]
         }), 200
 
     elif period == 'year':
         # Letzte 12 Monate
-        data = db.session.query(
-            extract('month', Entry.date).label('month'),
-            extract('year', Entry.date).label('year'),
-            func.sum(Entry.amount).label('revenue')
-        ).join(Device).filter(
-            Device.owner_id == current_user_id,
-            Entry.date >= date.today() - timedelta(days=365)
-        ).group_by('year', 'month').order_by('year', 'month').all()
+        start_date = date.today() - timedelta(days=365)
+        data = DailyRevenue.series(current_user_id, start_date, None, period='month')
 
         return jsonify({
-            'labels': [f"{int(d.month)}/{int(d.year)}" for d in data],
-            'data': [float(d.revenue) for d in data]
+            'labels': [f"{d.period.month}/{d.period.year}" for d in data],
+            'data': [float(d.total) for d in data]
         }), 200
 
     return jsonify({'error': 'Invalid period'}), 400
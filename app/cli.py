@@ -0,0 +1,322 @@
+# app/cli.py
+"""
+CLI-Befehle für Automaten Manager (flask <gruppe> <befehl>)
+"""
+
+import json
+
+import click
+from flask.cli import AppGroup
+
+stock_cli = AppGroup('stock', help='Materialisierten Lagerbestand verwalten')
+revenue_cli = AppGroup('revenue', help='Tagesumsatz-Rollup verwalten')
+entries_cli = AppGroup('entries', help='Einnahmen-Tabelle warten')
+sync_cli = AppGroup('sync', help='Delta-Sync der Offline-Clients verwalten')
+push_cli = AppGroup('push', help='Web-Push-Benachrichtigungen versenden')
+users_cli = AppGroup('users', help='Benutzer-Statistiken warten')
+
+
+@stock_cli.command('rebuild')
+def stock_rebuild():
+    """Bestandstabelle aus allen Lagerbewegungen neu aufbauen"""
+    from app.models import StockBalance
+
+    click.echo("🔄 Baue Bestandstabelle neu auf...")
+    count = StockBalance.rebuild()
+    click.echo(f"✅ {count} Bestandszeilen geschrieben")
+
+
+@stock_cli.command('verify')
+@click.option('--fix', is_flag=True, help='Bei Abweichungen automatisch neu aufbauen')
+def stock_verify(fix):
+    """Bestandstabelle gegen die Lagerbewegungen prüfen"""
+    from app.models import StockBalance
+
+    mismatches = StockBalance.verify()
+    if not mismatches:
+        click.echo("✅ Bestandstabelle ist konsistent")
+        return
+
+    for m in mismatches:
+        click.echo(
+            f"⚠️ Produkt {m['product_id']} / Gerät {m['device_id'] or '-'}: "
+            f"erwartet {m['expected']} ({m['expected_count']} Bewegungen), "
+            f"gespeichert {m['actual']} ({m['actual_count']} Bewegungen)"
+        )
+
+    if fix:
+        count = StockBalance.rebuild()
+        click.echo(f"✅ Neu aufgebaut: {count} Bestandszeilen")
+    else:
+        raise SystemExit(1)
+
+
+@revenue_cli.command('backfill')
+def revenue_backfill():
+    """Tagesumsätze aus allen Einnahmen neu aufbauen"""
+    from app.models import DailyRevenue
+
+    click.echo("🔄 Baue Tagesumsätze neu auf...")
+    count = DailyRevenue.rebuild()
+    click.echo(f"✅ {count} Tageszeilen geschrieben")
+
+
+@revenue_cli.command('reconcile')
+@click.option('--fix', is_flag=True, help='Bei Abweichungen automatisch neu aufbauen')
+def revenue_reconcile(fix):
+    """Tagesumsätze gegen die Einnahmen prüfen"""
+    from app.models import DailyRevenue
+
+    mismatches = DailyRevenue.verify()
+    if not mismatches:
+        click.echo("✅ Tagesumsätze sind konsistent")
+        return
+
+    for m in mismatches:
+        click.echo(
+            f"⚠️ Gerät {m['device_id']} am {m['day']}: "
+            f"erwartet {m['expected']}, gespeichert {m['actual']}"
+        )
+
+    if fix:
+        count = DailyRevenue.rebuild()
+        click.echo(f"✅ Neu aufgebaut: {count} Tageszeilen")
+    else:
+        raise SystemExit(1)
+
+
+@entries_cli.command('backfill-owner')
+@click.option('--batch-size', default=50000, show_default=True, help='Einnahmen-IDs pro UPDATE')
+def entries_backfill_owner(batch_size):
+    """entries.owner_id anlegen, aus devices.owner_id füllen und indizieren"""
+    from sqlalchemy import text
+    from app import db
+
+    engine = db.engine
+    postgres = engine.dialect.name == 'postgresql'
+
+    with engine.begin() as connection:
+        if postgres:
+            connection.execute(text(
+                "ALTER TABLE entries ADD COLUMN IF NOT EXISTS owner_id INTEGER REFERENCES users(id)"
+            ))
+        max_id = connection.execute(text("SELECT COALESCE(MAX(id), 0) FROM entries")).scalar()
+
+    # In ID-Bereichen, damit Sperren und WAL pro Transaktion klein bleiben
+    updated = 0
+    for start in range(0, max_id + 1, batch_size):
+        with engine.begin() as connection:
+            result = connection.execute(text(
+                "UPDATE entries SET owner_id = ("
+                "  SELECT devices.owner_id FROM devices WHERE devices.id = entries.device_id"
+                ") WHERE entries.id >= :start AND entries.id < :end"
+                "  AND entries.owner_id IS DISTINCT FROM ("
+                "  SELECT devices.owner_id FROM devices WHERE devices.id = entries.device_id)"
+            ), {'start': start, 'end': start + batch_size})
+            updated += result.rowcount
+        click.echo(f"   ... bis ID {min(start + batch_size - 1, max_id)}: {updated} aktualisiert")
+
+    # Index ohne Schreibsperre - CONCURRENTLY geht nur außerhalb einer Transaktion
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        concurrently = 'CONCURRENTLY ' if postgres else ''
+        connection.execute(text(
+            f"CREATE INDEX {concurrently}IF NOT EXISTS idx_entry_owner_date ON entries (owner_id, date)"
+        ))
+        if postgres:
+            connection.execute(text("ANALYZE entries"))
+
+    click.echo(f"✅ {updated} Einnahmen mit Besitzer versehen, Index idx_entry_owner_date vorhanden")
+
+
+@entries_cli.command('backfill-source')
+def entries_backfill_source():
+    """entries.source anlegen, alte Wochenerfassungen markieren, Unique-Index anlegen"""
+    from sqlalchemy import text
+    from app import db
+    from app.utils.week_grid import WEEK_DESCRIPTION
+
+    engine = db.engine
+    postgres = engine.dialect.name == 'postgresql'
+
+    with engine.begin() as connection:
+        if postgres:
+            connection.execute(text("ALTER TABLE entries ADD COLUMN IF NOT EXISTS source VARCHAR(20)"))
+        # Je Gerät und Tag nur die neueste Wochenerfassung als Zelle übernehmen
+        result = connection.execute(text(
+            "UPDATE entries SET source = 'week' WHERE id IN ("
+            "  SELECT MAX(id) FROM entries WHERE description = :description"
+            "  GROUP BY device_id, date"
+            ") AND source IS NULL"
+            "  AND NOT EXISTS (SELECT 1 FROM entries w WHERE w.source = 'week'"
+            "  AND w.device_id = entries.device_id AND w.date = entries.date)"
+        ), {'description': WEEK_DESCRIPTION})
+        tagged = result.rowcount
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        concurrently = 'CONCURRENTLY ' if postgres else ''
+        connection.execute(text(
+            f"CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS uq_entry_device_date_source "
+            "ON entries (device_id, date, source)"
+        ))
+
+    click.echo(f"✅ {tagged} Wochenerfassungen markiert, Index uq_entry_device_date_source vorhanden")
+
+
+@entries_cli.command('add-idempotency-key')
+def entries_add_idempotency_key():
+    """entries.idempotency_key (PWA-Sync) und Unique-Index anlegen"""
+    from sqlalchemy import text
+    from app import db
+
+    engine = db.engine
+    postgres = engine.dialect.name == 'postgresql'
+
+    if postgres:
+        with engine.begin() as connection:
+            connection.execute(text("ALTER TABLE entries ADD COLUMN IF NOT EXISTS idempotency_key VARCHAR(64)"))
+
+    with engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        concurrently = 'CONCURRENTLY ' if postgres else ''
+        connection.execute(text(
+            f"CREATE UNIQUE INDEX {concurrently}IF NOT EXISTS uq_entry_user_idempotency_key "
+            "ON entries (user_id, idempotency_key)"
+        ))
+
+    click.echo("✅ Spalte idempotency_key und Index uq_entry_user_idempotency_key vorhanden")
+
+
+@entries_cli.command('explain')
+@click.option('--owner', 'owner_id', type=int, required=True, help='Benutzer-ID')
+@click.option('--days', default=30, show_default=True, help='Zeitraum in Tagen')
+def entries_explain(owner_id, days):
+    """Query-Plan Besitzer-Abfrage: JOIN über devices vs. entries.owner_id"""
+    from datetime import date, timedelta
+    from sqlalchemy import func
+    from app import db
+    from app.models import Device, Entry
+
+    if db.engine.dialect.name != 'postgresql':
+        raise click.ClickException('EXPLAIN ANALYZE benötigt PostgreSQL')
+
+    since = date.today() - timedelta(days=days)
+    queries = {
+        'JOIN devices': db.session.query(func.sum(Entry.amount), func.count(Entry.id)).join(
+            Device, Entry.device_id == Device.id
+        ).filter(Device.owner_id == owner_id, Entry.date >= since),
+        'entries.owner_id': db.session.query(func.sum(Entry.amount), func.count(Entry.id)).filter(
+            Entry.owner_id == owner_id, Entry.date >= since
+        ),
+    }
+
+    connection = db.session.connection()
+    for label, query in queries.items():
+        compiled = query.statement.compile(dialect=connection.dialect, compile_kwargs={'literal_binds': True})
+        plan = connection.exec_driver_sql(
+            'EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) ' + str(compiled)
+        ).scalar()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        root = plan[0]
+        buffers = root['Plan'].get('Shared Hit Blocks', 0) + root['Plan'].get('Shared Read Blocks', 0)
+        click.echo(
+            f"{label:18} {root['Execution Time']:10.2f} ms  "
+            f"(Planung {root['Planning Time']:.2f} ms, {buffers} Blöcke, Wurzel: {root['Plan']['Node Type']})"
+        )
+
+
+@sync_cli.command('purge-tombstones')
+@click.option('--days', type=int, default=None, help='Aufbewahrung in Tagen (Standard: SyncTombstone.RETENTION_DAYS)')
+def sync_purge_tombstones(days):
+    """Alte Lösch-Vermerke entfernen (Clients mit älterem Stand laden komplett neu)"""
+    from app.models import SyncTombstone
+
+    count = SyncTombstone.purge(days)
+    click.echo(f"✅ {count} Tombstones gelöscht")
+
+
+@push_cli.command('send-pending')
+@click.option('--hours', type=int, default=24, help='Nur Benachrichtigungen der letzten N Stunden')
+@click.option('--background', is_flag=True, help='Als Hintergrund-Job einreihen statt direkt senden')
+def push_send_pending(hours, background):
+    """Noch nicht zugestellte Benachrichtigungen per Push versenden"""
+    from app.utils import push
+
+    if background:
+        count = push.queue_pending(hours)
+        click.echo(f"✅ {count} Benachrichtigungen eingereiht")
+        return
+
+    ids = push.pending_ids(hours)
+    if not ids:
+        click.echo("✅ Nichts zu senden")
+        return
+    result = push.deliver(ids)
+    click.echo(
+        f"✅ {result.get('delivered', 0)}/{len(ids)} Benachrichtigungen zugestellt "
+        f"({result.get('sent', 0)} Geräte, {result.get('failed', 0)} Fehler, "
+        f"{result.get('pruned', 0)} Abonnements entfernt)"
+    )
+
+
+@push_cli.command('test')
+@click.option('--user', 'username', required=True, help='Benutzername')
+@click.option('--message', default='Test-Benachrichtigung', help='Nachrichtentext')
+def push_test(username, message):
+    """Test-Benachrichtigung an alle Geräte eines Users senden"""
+    from app import db
+    from app.models import User, Notification, NotificationType
+    from app.utils import push
+
+    user = User.query.filter_by(username=username).first()
+    if not user:
+        click.echo(f"❌ User '{username}' nicht gefunden")
+        return
+
+    notification = Notification(user_id=user.id, type=NotificationType.INFO,
+                                title='Automaten Manager', message=message)
+    db.session.add(notification)
+    db.session.commit()
+
+    result = push.deliver([notification.id])
+    click.echo(f"✅ {result.get('sent', 0)} Geräte erreicht, {result.get('pruned', 0)} Abonnements entfernt")
+
+
+@users_cli.command('rebuild-login-stats')
+def users_rebuild_login_stats():
+    """Login-Tageszähler aus der Login-Historie neu aufbauen"""
+    from app.models import LoginStat
+
+    count = LoginStat.rebuild()
+    click.echo(f"✅ {count} Tage geschrieben")
+
+
+@users_cli.command('cascade-login-logs')
+def users_cascade_login_logs():
+    """Fremdschlüssel login_logs.user_id auf ON DELETE CASCADE umstellen"""
+    from sqlalchemy import text
+    from app import db
+
+    engine = db.engine
+    if engine.dialect.name != 'postgresql':
+        click.echo("⚠️ Nur für PostgreSQL - andere Datenbanken mit db.create_all() neu anlegen")
+        return
+
+    with engine.begin() as connection:
+        connection.execute(text(
+            "ALTER TABLE login_logs "
+            "DROP CONSTRAINT IF EXISTS login_logs_user_id_fkey, "
+            "ADD CONSTRAINT login_logs_user_id_fkey FOREIGN KEY (user_id) "
+            "REFERENCES users(id) ON DELETE CASCADE"
+        ))
+
+    click.echo("✅ login_logs.user_id löscht mit dem Benutzer (ON DELETE CASCADE)")
+
+
+def register_cli(app):
+    """CLI-Gruppen an der App registrieren"""
+    app.cli.add_command(stock_cli)
+    app.cli.add_command(revenue_cli)
+    app.cli.add_command(entries_cli)
+    app.cli.add_command(sync_cli)
+    app.cli.add_command(push_cli)
+    app.cli.add_command(users_cli)
@@ -0,0 +1,144 @@
+# app/jobs.py
+"""
+Hintergrund-Jobs für Automaten Manager
+Celery (Redis-Broker) wenn CELERY_BROKER_URL gesetzt ist,
+sonst ein prozessinterner Thread-Pool für Single-Node-Installationen
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+
+from app.utils import metrics
+
+try:
+    from celery import Celery
+except ImportError:  # Celery optional
+    Celery = None
+
+# Registrierte Jobs: name -> Funktion
+_jobs = {}
+
+_state = {
+    'app': None,
+    'celery': None,
+    'executor': None,
+    'pending': 0,
+}
+_lock = threading.Lock()
+
+
+def job(name):
+    """Funktion als Hintergrund-Job registrieren (@job('reports.generate'))"""
+    def decorator(func):
+        _jobs[name] = func
+        if _state['celery'] is not None:
+            _state['celery'].task(name=name)(func)
+        return func
+    return decorator
+
+
+def init_jobs(app):
+    """Job-Backend anhand der Konfiguration wählen"""
+    _state['app'] = app
+    broker = app.config.get('CELERY_BROKER_URL')
+
+    if Celery is not None and broker:
+        celery = Celery(
+            app.import_name,
+            broker=broker,
+            backend=app.config.get('CELERY_RESULT_BACKEND') or broker
+        )
+
+        class ContextTask(celery.Task):
+            def __call__(self, *args, **kwargs):
+                with app.app_context():
+                    return _timed(self.name, self.run, args, kwargs)
+
+        celery.Task = ContextTask
+        for name, func in _jobs.items():
+            celery.task(name=name)(func)
+
+        _state['celery'] = celery
+        app.logger.info("Job-Backend: Celery (%s)", broker)
+    else:
+        _state['executor'] = ThreadPoolExecutor(
+            max_workers=app.config.get('JOB_WORKERS', 2),
+            thread_name_prefix='job'
+        )
+        app.logger.info("Job-Backend: Thread-Pool")
+
+
+def get_celery():
+    """Celery-Instanz (für den Worker: celery -A celery_worker.celery worker)"""
+    return _state['celery']
+
+
+def backend_name():
+    return 'celery' if _state['celery'] is not None else 'thread'
+
+
+def pending_jobs():
+    """Anzahl noch nicht abgeschlossener Jobs im Thread-Pool"""
+    return _state['pending']
+
+
+def queue_length():
+    """Wartende Aufgaben im Celery-Broker (nur Redis), sonst None"""
+    celery = _state['celery']
+    if celery is None:
+        return None
+    try:
+        with celery.connection_for_read() as connection:
+            client = getattr(connection.default_channel, 'client', None)
+            if client is None:
+                return None
+            return client.llen(celery.conf.task_default_queue)
+    except Exception:
+        return None
+
+
+def _timed(name, func, args, kwargs):
+    """Job ausführen und Laufzeit für /metrics erfassen"""
+    started = time.monotonic()
+    status = 'failed'
+    try:
+        result = func(*args, **kwargs)
+        status = 'done'
+        return result
+    finally:
+        metrics.observe_job(name, status, time.monotonic() - started)
+
+
+def _run_in_context(name, args, kwargs):
+    from app import db
+
+    app = _state['app']
+    try:
+        with app.app_context():
+            try:
+                return _timed(name, _jobs[name], args, kwargs)
+            except Exception:
+                app.logger.exception("Job %s fehlgeschlagen", name)
+                raise
+            finally:
+                db.session.remove()
+    finally:
+        with _lock:
+            _state['pending'] -= 1
+        metrics.job_dequeued()
+
+
+def enqueue(name, *args, **kwargs):
+    """Job einreihen - kehrt sofort zurück"""
+    if name not in _jobs:
+        raise KeyError(f"Unbekannter Job: {name}")
+
+    celery = _state['celery']
+    if celery is not None:
+        return celery.send_task(name, args=args, kwargs=kwargs)
+
+    with _lock:
+        _state['pending'] += 1
+    metrics.job_enqueued()
+    return _state['executor'].submit(_run_in_context, name, args, kwargs)
@@ -14,10 +14,10 @@ from typing import Optional, List, Dict, Any
 from flask import current_app
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
-from sqlalchemy import func, extract, and_, or_, desc, asc, text
+from sqlalchemy import func, extract, and_, or_, desc, asc, text, event, inspect, select
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.hybrid import hybrid_property
-from sqlalchemy.orm import validates
+from sqlalchemy.orm import validates, object_session
 import pyotp
 import qrcode
 from io import BytesIO
@@ -25,6 +25,8 @@ import base64
 
 # Import db from app
 from app import db
+from app.utils import cache as aggregate_cache
+from app.utils.attribute_history import keep_active_history
 
 # Inventur Import
 from .inventory import (
@@ -34,7 +36,8 @@ from .inventory import (
     Supplier,
     Refill,
     RefillItem,
-    InventoryMovement
+    InventoryMovement,
+    StockBalance
 )
 
 
@@ -98,19 +101,78 @@ class LoginLog(db.Model):
     __tablename__ = 'login_logs'
 
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     success = db.Column(db.Boolean, default=True, nullable=False)
     ip_address = db.Column(db.String(45))  # IPv6 ready
     user_agent = db.Column(db.String(200))
     failure_reason = db.Column(db.String(100))  # z.B. "wrong_password", "account_locked"
 
-    # Relationship
-    user = db.relationship('User', backref=db.backref('login_logs', lazy='dynamic'))
+    # Relationship - Login-Historie wird mit dem Benutzer gelöscht (auch beim Bulk-Delete per Query)
+    user = db.relationship('User', backref=db.backref('login_logs', lazy='dynamic',
+                                                      cascade='all, delete-orphan', passive_deletes=True))
 
     def __repr__(self):
         return f'<LoginLog {self.user_id} at {self.timestamp}>'
 
+
+class LoginStat(db.Model):
+    """Login-Zähler je Tag - Zusammenfassung für die Benutzerverwaltung"""
+    __tablename__ = 'login_stats'
+
+    day = db.Column(db.Date, primary_key=True)
+    success_count = db.Column(db.Integer, nullable=False, default=0)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+
+    @classmethod
+    def record(cls, success: bool, day: Optional[date] = None):
+        """Login des Tages per Upsert zählen (in der laufenden Transaktion)"""
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        stmt = pg_insert(cls.__table__).values(
+            day=day or datetime.utcnow().date(),
+            success_count=1 if success else 0,
+            failure_count=0 if success else 1
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.day],
+            set_={
+                'success_count': cls.__table__.c.success_count + stmt.excluded.success_count,
+                'failure_count': cls.__table__.c.failure_count + stmt.excluded.failure_count
+            }
+        )
+        db.session.execute(stmt)
+
+    @classmethod
+    def totals(cls, since: Optional[date] = None) -> Dict[str, int]:
+        """Erfolgreiche/fehlgeschlagene Logins seit einem Tag (inklusive)"""
+        query = db.session.query(
+            func.coalesce(func.sum(cls.success_count), 0),
+            func.coalesce(func.sum(cls.failure_count), 0)
+        )
+        if since:
+            query = query.filter(cls.day >= since)
+        success, failure = query.one()
+        return {'success': int(success), 'failure': int(failure)}
+
+    @classmethod
+    def rebuild(cls):
+        """Tageszähler komplett aus der Login-Historie neu aufbauen"""
+        cls.query.delete(synchronize_session=False)
+        day = func.date(LoginLog.timestamp)
+        db.session.execute(
+            cls.__table__.insert().from_select(
+                ['day', 'success_count', 'failure_count'],
+                select(
+                    day,
+                    func.count(LoginLog.id).filter(LoginLog.success.is_(True)),
+                    func.count(LoginLog.id).filter(LoginLog.success.is_(False))
+                ).group_by(day)
+            )
+        )
+        db.session.commit()
+        return cls.query.count()
+
 # ============================================================================
 # MIXINS
 # ============================================================================
@@ -226,18 +288,25 @@ class User(UserMixin, TimestampMixin, UUIDMixin, db.Model):
         self.failed_login_count = 0
         db.session.commit()
 
-    def record_login(self):
-        """Login aufzeichnen"""
+    def record_login(self, ip_address: Optional[str] = None, user_agent: Optional[str] = None):
+        """Login aufzeichnen (Zähler am User, Historie und Tagesstatistik)"""
         self.last_login = datetime.utcnow()
-        self.login_count += 1
+        self.login_count = (self.login_count or 0) + 1
         self.failed_login_count = 0
+        db.session.add(LoginLog(user_id=self.id, timestamp=self.last_login, success=True,
+                                ip_address=ip_address, user_agent=(user_agent or '')[:200] or None))
+        LoginStat.record(True)
         db.session.commit()
 
-    def record_failed_login(self):
+    def record_failed_login(self, ip_address: Optional[str] = None, user_agent: Optional[str] = None,
+                            reason: str = 'wrong_password'):
         """Fehlgeschlagenen Login aufzeichnen"""
-        self.failed_login_count += 1
+        self.failed_login_count = (self.failed_login_count or 0) + 1
         if self.failed_login_count >= 5:
             self.lock_account()
+        db.session.add(LoginLog(user_id=self.id, success=False, ip_address=ip_address,
+                                user_agent=(user_agent or '')[:200] or None, failure_reason=reason))
+        LoginStat.record(False)
         db.session.commit()
 
     def generate_api_key(self) -> str:
@@ -390,17 +459,18 @@ class Device(TimestampMixin, UUIDMixin, db.Model):
         ).scalar()
         return result or Decimal('0.00')
 
+    def get_financial_summary(self):
+        """Umsatz, Ausgaben, Gewinn und ROI in einem Durchlauf"""
+        from app.utils.fleet_summary import FleetSummary
+        return FleetSummary.for_owner(self.owner_id, device_ids=[self.id])[self.id]
+
     def get_profit(self) -> Decimal:
         """Gewinn berechnen"""
-        return self.get_total_revenue() - self.get_total_expenses()
+        return self.get_financial_summary().profit
 
     def get_roi(self) -> float:
         """Return on Investment berechnen"""
-        expenses = self.get_total_expenses()
-        if expenses == 0:
-            return 0
-        profit = self.get_profit()
-        return float((profit / expenses) * 100)
+        return self.get_financial_summary().roi
 
     def get_daily_average(self, days: int = 30) -> Decimal:
         """Durchschnittliche Tageseinnahmen"""
@@ -429,6 +499,10 @@ class Entry(TimestampMixin, UUIDMixin, db.Model):
     device_id = db.Column(db.Integer, db.ForeignKey('devices.id'), nullable=False, index=True)
     device = db.relationship('Device', back_populates='entries')
 
+    # Besitzer - denormalisiert aus devices.owner_id (wird per Event synchron gehalten),
+    # damit Mandanten-Abfragen ohne JOIN über (owner_id, date) laufen
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+
     # Amount
     amount = db.Column(db.Numeric(10, 2), nullable=False, default=Decimal('0.00'))
 
@@ -445,6 +519,13 @@ class Entry(TimestampMixin, UUIDMixin, db.Model):
     reference = db.Column(db.String(50), unique=True, index=True)
     description = db.Column(db.Text)
 
+    # Herkunft - 'week' für Zellen der Wochenerfassung (eine Zeile je Gerät und Tag),
+    # NULL für frei erfasste Einnahmen
+    source = db.Column(db.String(20))
+
+    # Idempotenz-Schlüssel des Clients (PWA-Offline-Sync) - Wiederholungen sind No-ops
+    idempotency_key = db.Column(db.String(64))
+
     # User Relationships - KORREKT SPEZIFIZIERT
     user_id = db.Column(db.Integer, db.ForeignKey('users.id'))
     creator = db.relationship(
@@ -467,8 +548,13 @@ class Entry(TimestampMixin, UUIDMixin, db.Model):
     __table_args__ = (
         db.Index('idx_entry_date_device', 'date', 'device_id'),
         db.Index('idx_entry_year_month', extract('year', date), extract('month', date)),
+        db.Index('idx_entry_owner_date', 'owner_id', 'date'),
+        db.UniqueConstraint('device_id', 'date', 'source', name='uq_entry_device_date_source'),
+        db.UniqueConstraint('user_id', 'idempotency_key', name='uq_entry_user_idempotency_key'),
     )
 
+    SOURCE_WEEK = 'week'
+
     @validates('amount')
     def validate_amount(self, key, value):
         """Betrag validieren"""
@@ -633,6 +719,28 @@ class Notification(TimestampMixin, db.Model):
     push_sent = db.Column(db.Boolean, default=False)
 
 
+class PushSubscription(db.Model):
+    """Web-Push-Abonnement eines Browsers (mehrere je User möglich)"""
+    __tablename__ = 'push_subscriptions'
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    # Aus PushSubscription.toJSON() des Browsers
+    endpoint = db.Column(db.Text, nullable=False, unique=True)
+    p256dh = db.Column(db.String(200), nullable=False)
+    auth = db.Column(db.String(100), nullable=False)
+    user_agent = db.Column(db.String(255))
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    last_success_at = db.Column(db.DateTime)
+    failure_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def to_webpush(self) -> Dict[str, Any]:
+        """subscription_info für pywebpush"""
+        return {'endpoint': self.endpoint, 'keys': {'p256dh': self.p256dh, 'auth': self.auth}}
+
+
 class Report(TimestampMixin, db.Model):
     """Generierte Reports"""
     __tablename__ = 'reports'
@@ -655,6 +763,399 @@ class Report(TimestampMixin, db.Model):
     generated_at = db.Column(db.DateTime, default=datetime.utcnow)
 
 
+# ============================================================================
+# ROLLUPS (Tagesumsätze)
+# ============================================================================
+
+class DailyRevenue(db.Model):
+    """Tagesumsatz je Besitzer und Gerät - wird bei jeder Einnahme mitgeführt"""
+    __tablename__ = 'daily_revenue'
+
+    id = db.Column(db.Integer, primary_key=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id'))
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id', ondelete='CASCADE'), nullable=False)
+    day = db.Column(db.Date, nullable=False)
+
+    total = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal('0.00'))
+    entry_count = db.Column(db.Integer, nullable=False, default=0)
+    cash_total = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal('0.00'))
+    card_total = db.Column(db.Numeric(12, 2), nullable=False, default=Decimal('0.00'))
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.UniqueConstraint('device_id', 'day', name='uq_daily_revenue_device_day'),
+        db.Index('idx_daily_revenue_owner_day', 'owner_id', 'day'),
+    )
+
+    PERIODS = ('day', 'week', 'month', 'year')
+
+    @classmethod
+    def apply(cls, connection, owner_id, device_id, day, total, cash, card, count=1):
+        """Änderung eines Tagesumsatzes per Upsert buchen"""
+        cls.apply_many(connection, [{
+            'owner_id': owner_id,
+            'device_id': device_id,
+            'day': day,
+            'total': total,
+            'entry_count': count,
+            'cash_total': cash,
+            'card_total': card
+        }])
+
+    @classmethod
+    def apply_many(cls, connection, changes):
+        """
+        Mehrere Änderungen in einem Upsert buchen (für Bulk-Schreibpfade, die
+        an den Mapper-Events vorbeigehen). Änderungen am selben Gerät und Tag
+        werden vorher zusammengefasst.
+        """
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+        merged = {}
+        for change in changes:
+            key = (change['device_id'], change['day'])
+            row = merged.setdefault(key, {
+                'owner_id': change['owner_id'],
+                'device_id': change['device_id'],
+                'day': change['day'],
+                'total': Decimal('0.00'),
+                'entry_count': 0,
+                'cash_total': Decimal('0.00'),
+                'card_total': Decimal('0.00'),
+                'updated_at': datetime.utcnow()
+            })
+            row['owner_id'] = change['owner_id']
+            for column in ('total', 'entry_count', 'cash_total', 'card_total'):
+                row[column] += change.get(column, 0)
+        if not merged:
+            return
+
+        for row in merged.values():
+            aggregate_cache.mark_owner(db.session, row['owner_id'])
+
+        table = cls.__table__
+        stmt = pg_insert(table).values(list(merged.values()))
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.device_id, table.c.day],
+            set_={
+                'owner_id': stmt.excluded.owner_id,
+                'total': table.c.total + stmt.excluded.total,
+                'entry_count': table.c.entry_count + stmt.excluded.entry_count,
+                'cash_total': table.c.cash_total + stmt.excluded.cash_total,
+                'card_total': table.c.card_total + stmt.excluded.card_total,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        connection.execute(stmt)
+
+    @classmethod
+    def _scoped(cls, columns, owner_id, start_date=None, end_date=None, device_id=None):
+        query = db.session.query(*columns).filter(cls.owner_id == owner_id)
+        if start_date:
+            query = query.filter(cls.day >= start_date)
+        if end_date:
+            query = query.filter(cls.day <= end_date)
+        if device_id:
+            query = query.filter(cls.device_id == device_id)
+        return query
+
+    @classmethod
+    def totals(cls, owner_id, start_date=None, end_date=None, device_id=None) -> Dict[str, Any]:
+        """Summen für einen Zeitraum (beide Grenzen inklusive)"""
+        row = cls._scoped([
+            func.coalesce(func.sum(cls.total), 0),
+            func.coalesce(func.sum(cls.entry_count), 0),
+            func.coalesce(func.sum(cls.cash_total), 0),
+            func.coalesce(func.sum(cls.card_total), 0)
+        ], owner_id, start_date, end_date, device_id).one()
+
+        return {
+            'total': Decimal(row[0]),
+            'count': int(row[1]),
+            'cash': Decimal(row[2]),
+            'card': Decimal(row[3])
+        }
+
+    @classmethod
+    def series(cls, owner_id, start_date, end_date, period='day', device_id=None) -> List[Any]:
+        """Umsätze je Tag/Woche/Monat/Jahr als (period, total, count)-Zeilen"""
+        if period not in cls.PERIODS:
+            raise ValueError(f"Unbekannter Zeitraum: {period}")
+
+        bucket = cls.day if period == 'day' else func.date_trunc(period, cls.day).cast(db.Date)
+        bucket = bucket.label('period')
+
+        return cls._scoped([
+            bucket,
+            func.sum(cls.total).label('total'),
+            func.sum(cls.entry_count).label('count')
+        ], owner_id, start_date, end_date, device_id).group_by(bucket).order_by(bucket).all()
+
+    @classmethod
+    def by_device(cls, owner_id, start_date=None, end_date=None, limit=None) -> List[Any]:
+        """Umsätze je Gerät als (device_id, name, total, count), absteigend"""
+        query = cls._scoped([
+            cls.device_id,
+            Device.name,
+            func.sum(cls.total).label('total'),
+            func.sum(cls.entry_count).label('count')
+        ], owner_id, start_date, end_date).join(
+            Device, Device.id == cls.device_id
+        ).group_by(cls.device_id, Device.name).order_by(func.sum(cls.total).desc())
+
+        if limit:
+            query = query.limit(limit)
+        return query.all()
+
+    @classmethod
+    def _aggregate_entries(cls):
+        """Soll-Werte direkt aus der entries-Tabelle"""
+        return db.session.query(
+            Device.owner_id.label('owner_id'),
+            Entry.device_id.label('device_id'),
+            Entry.date.label('day'),
+            func.sum(Entry.amount).label('total'),
+            func.count(Entry.id).label('entry_count'),
+            func.coalesce(func.sum(Entry.cash_amount), 0).label('cash_total'),
+            func.coalesce(func.sum(Entry.card_amount), 0).label('card_total')
+        ).join(Device, Device.id == Entry.device_id).group_by(
+            Device.owner_id, Entry.device_id, Entry.date
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """Rollup komplett aus den Einnahmen neu aufbauen (Backfill)"""
+        cls.query.delete(synchronize_session=False)
+
+        aggregate = cls._aggregate_entries().subquery()
+        db.session.execute(
+            cls.__table__.insert().from_select(
+                ['owner_id', 'device_id', 'day', 'total', 'entry_count', 'cash_total', 'card_total', 'updated_at'],
+                db.session.query(
+                    aggregate.c.owner_id, aggregate.c.device_id, aggregate.c.day,
+                    aggregate.c.total, aggregate.c.entry_count,
+                    aggregate.c.cash_total, aggregate.c.card_total, func.now()
+                )
+            )
+        )
+        db.session.commit()
+        return cls.query.count()
+
+    @classmethod
+    def verify(cls) -> List[Dict[str, Any]]:
+        """Abweichungen zwischen Rollup und Einnahmen finden (Reconcile)"""
+        def key(row):
+            return row.device_id, row.day
+
+        def values(row):
+            return (row.owner_id, Decimal(row.total), int(row.entry_count),
+                    Decimal(row.cash_total), Decimal(row.card_total))
+
+        expected = {key(r): values(r) for r in cls._aggregate_entries()}
+        # Leere Tage bleiben als Nullzeilen stehen - nur Reste mit Betrag zählen
+        actual = {key(r): values(r) for r in cls.query.filter(or_(
+            cls.entry_count != 0, cls.total != 0, cls.cash_total != 0, cls.card_total != 0
+        ))}
+
+        return [
+            {'device_id': k[0], 'day': k[1], 'expected': expected.get(k), 'actual': actual.get(k)}
+            for k in expected.keys() | actual.keys()
+            if expected.get(k) != actual.get(k)
+        ]
+
+    def __repr__(self):
+        return f'<DailyRevenue {self.device_id} {self.day}: {self.total}>'
+
+
+class SyncTombstone(db.Model):
+    """Gelöschte Datensätze für den Delta-Sync der Offline-Clients"""
+    __tablename__ = 'sync_tombstones'
+
+    id = db.Column(db.Integer, primary_key=True)
+    owner_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), nullable=False)
+    entity = db.Column(db.String(30), nullable=False)  # 'devices', 'entries', 'products'
+    entity_id = db.Column(db.Integer, nullable=False)
+    deleted_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('idx_sync_tombstone_owner_deleted', 'owner_id', 'deleted_at'),
+    )
+
+    # Ältere Tombstones werden gelöscht - Clients mit älterem Stand laden neu
+    RETENTION_DAYS = 90
+
+    @classmethod
+    def record(cls, connection, owner_id, entity, entity_ids):
+        """Löschungen auf der aktuellen Verbindung vermerken"""
+        if owner_id is None or not entity_ids:
+            return
+        now = datetime.utcnow()
+        connection.execute(cls.__table__.insert(), [
+            {'owner_id': owner_id, 'entity': entity, 'entity_id': entity_id, 'deleted_at': now}
+            for entity_id in entity_ids
+        ])
+
+    @classmethod
+    def purge(cls, days=None):
+        """Tombstones älter als die Aufbewahrungsfrist löschen"""
+        cutoff = datetime.utcnow() - timedelta(days=days or cls.RETENTION_DAYS)
+        count = cls.query.filter(cls.deleted_at < cutoff).delete(synchronize_session=False)
+        db.session.commit()
+        return count
+
+
+def _entry_rollup_values(entry, **overrides):
+    """(device_id, day, amount, cash, card) eines Entries, optional mit Altwerten"""
+    values = {
+        'device_id': entry.device_id,
+        'date': entry.date,
+        'amount': entry.amount,
+        'cash_amount': entry.cash_amount,
+        'card_amount': entry.card_amount,
+    }
+    values.update(overrides)
+    return (values['device_id'], values['date'], Decimal(values['amount'] or 0),
+            Decimal(values['cash_amount'] or 0), Decimal(values['card_amount'] or 0))
+
+
+def _device_owner(connection, device_id):
+    return connection.execute(
+        select(Device.owner_id).where(Device.id == device_id)
+    ).scalar()
+
+
+# Sonst fehlt dem Rollup nach einem commit der abzuziehende Betrag bzw. der
+# Besitzerwechsel eines Geräts (und dem Delta-Sync der alte Besitzer)
+keep_active_history(Entry.device_id, Entry.owner_id, Entry.date, Entry.amount,
+                    Entry.cash_amount, Entry.card_amount, Device.owner_id)
+
+
+@event.listens_for(Entry, 'before_insert')
+def _entry_set_owner(mapper, connection, target):
+    if target.owner_id is None:
+        target.owner_id = _device_owner(connection, target.device_id)
+
+
+@event.listens_for(Entry, 'before_update')
+def _entry_device_changed(mapper, connection, target):
+    if inspect(target).attrs.device_id.history.deleted:
+        target.owner_id = _device_owner(connection, target.device_id)
+
+
+@event.listens_for(Entry, 'after_insert')
+def _entry_inserted(mapper, connection, target):
+    device_id, day, amount, cash, card = _entry_rollup_values(target)
+    DailyRevenue.apply(connection, target.owner_id, device_id, day, amount, cash, card)
+
+
+@event.listens_for(Entry, 'after_delete')
+def _entry_deleted(mapper, connection, target):
+    device_id, day, amount, cash, card = _entry_rollup_values(target)
+    DailyRevenue.apply(connection, target.owner_id, device_id, day,
+                       -amount, -cash, -card, -1)
+    SyncTombstone.record(connection, target.owner_id, 'entries', [target.id])
+
+
+@event.listens_for(Entry, 'after_update')
+def _entry_updated(mapper, connection, target):
+    state = inspect(target)
+    old = {}
+    for attr in ('device_id', 'date', 'amount', 'cash_amount', 'card_amount'):
+        history = state.attrs[attr].history
+        if history.deleted:
+            old[attr] = history.deleted[0]
+    if not old:
+        return
+
+    owner_history = state.attrs.owner_id.history
+    old_owner = owner_history.deleted[0] if owner_history.deleted else target.owner_id
+
+    device_id, day, amount, cash, card = _entry_rollup_values(target, **old)
+    DailyRevenue.apply(connection, old_owner, device_id, day,
+                       -amount, -cash, -card, -1)
+
+    device_id, day, amount, cash, card = _entry_rollup_values(target)
+    DailyRevenue.apply(connection, target.owner_id, device_id, day, amount, cash, card)
+
+
+@event.listens_for(Device, 'after_update')
+def _device_owner_changed(mapper, connection, target):
+    if inspect(target).attrs.owner_id.history.has_changes():
+        connection.execute(
+            DailyRevenue.__table__.update()
+            .where(DailyRevenue.device_id == target.id)
+            .values(owner_id=target.owner_id)
+        )
+        connection.execute(
+            Entry.__table__.update()
+            .where(Entry.device_id == target.id)
+            .values(owner_id=target.owner_id, updated_at=datetime.utcnow())
+        )
+
+        # Beim alten Besitzer verschwindet das Gerät aus dem Offline-Cache - seine
+        # Einnahmen entfernt der Client mit dem Geräte-Tombstone (sw.js)
+        history = inspect(target).attrs.owner_id.history
+        old_owner = history.deleted[0] if history.deleted else None
+        if old_owner is not None:
+            SyncTombstone.record(connection, old_owner, 'devices', [target.id])
+
+
+@event.listens_for(Device, 'after_delete')
+def _device_deleted(mapper, connection, target):
+    SyncTombstone.record(connection, target.owner_id, 'devices', [target.id])
+
+
+@event.listens_for(Product, 'after_delete')
+def _product_deleted(mapper, connection, target):
+    SyncTombstone.record(connection, target.user_id, 'products', [target.id])
+
+
+# Kennzahlen-Cache: betroffene Besitzer merken, Version steigt nach dem Commit
+
+def _owner_history(target, attr):
+    history = inspect(target).attrs[attr].history
+    return set(history.deleted or ()) | {getattr(target, attr)}
+
+
+@event.listens_for(Entry, 'after_insert')
+@event.listens_for(Entry, 'after_update')
+@event.listens_for(Entry, 'after_delete')
+def _entry_cache_owners(mapper, connection, target):
+    for owner_id in _owner_history(target, 'owner_id'):
+        aggregate_cache.mark_owner(object_session(target), owner_id)
+
+
+@event.listens_for(Expense, 'after_insert')
+@event.listens_for(Expense, 'after_update')
+@event.listens_for(Expense, 'after_delete')
+def _expense_cache_owners(mapper, connection, target):
+    session = object_session(target)
+    aggregate_cache.mark_owner(session, target.user_id)
+    # Geräte-Kennzahlen laufen über den Besitzer des Geräts
+    if target.device_id:
+        aggregate_cache.mark_owner(session, _device_owner(connection, target.device_id))
+
+
+@event.listens_for(Refill, 'after_insert')
+@event.listens_for(Refill, 'after_update')
+@event.listens_for(Refill, 'after_delete')
+@event.listens_for(InventoryMovement, 'after_insert')
+@event.listens_for(InventoryMovement, 'after_update')
+@event.listens_for(InventoryMovement, 'after_delete')
+@event.listens_for(Supplier, 'after_insert')
+@event.listens_for(Supplier, 'after_delete')
+def _user_cache_owner(mapper, connection, target):
+    aggregate_cache.mark_owner(object_session(target), target.user_id)
+
+
+@event.listens_for(Device, 'after_update')
+def _device_cache_owners(mapper, connection, target):
+    if inspect(target).attrs.owner_id.history.has_changes():
+        for owner_id in _owner_history(target, 'owner_id'):
+            aggregate_cache.mark_owner(object_session(target), owner_id)
+
+
 # ============================================================================
 # STATISTICS METHODS
 # ============================================================================
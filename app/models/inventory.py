@@ -7,8 +7,16 @@ from app import db
 from datetime import datetime, date
 from decimal import Decimal
 from enum import Enum
+from sqlalchemy import func, event, case, inspect, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 import uuid
 
+from app.utils.attribute_history import keep_active_history
+
+
+# Bewegungstypen, die den Bestand erhöhen (alle anderen verringern ihn)
+STOCK_INCREASING_TYPES = ('IN', 'ADJUSTMENT')
+
 
 class ProductUnit(Enum):
     """Einheiten für Produkte"""
@@ -80,13 +88,36 @@ class Product(db.Model):
     inventory_movements = db.relationship('InventoryMovement', backref='product', lazy='dynamic')
 
     def get_current_stock(self, device_id=None):
-        """Aktueller Lagerbestand (gesamt oder pro Gerät)"""
-        query = InventoryMovement.query.filter_by(product_id=self.id)
+        """Aktueller Lagerbestand (gesamt oder pro Gerät) aus der Bestandstabelle"""
+        query = db.session.query(
+            func.coalesce(func.sum(StockBalance.quantity), 0)
+        ).filter(StockBalance.product_id == self.id)
+        if device_id:
+            query = query.filter(StockBalance.device_id == device_id)
+
+        return Decimal(query.scalar())
+
+    @classmethod
+    def get_stock_levels(cls, product_ids, device_id=None):
+        """
+        Lagerbestände für viele Produkte mit einer gruppierten Abfrage.
+        Liefert {product_id: Decimal} für alle angefragten IDs (fehlend = 0).
+        """
+        product_ids = list(product_ids)
+        levels = {product_id: Decimal('0') for product_id in product_ids}
+        if not product_ids:
+            return levels
+
+        query = db.session.query(
+            StockBalance.product_id,
+            func.sum(StockBalance.quantity)
+        ).filter(StockBalance.product_id.in_(product_ids))
         if device_id:
-            query = query.filter_by(device_id=device_id)
+            query = query.filter(StockBalance.device_id == device_id)
 
-        movements = query.all()
-        return sum(m.quantity if m.type == 'IN' else -m.quantity for m in movements)
+        for product_id, quantity in query.group_by(StockBalance.product_id):
+            levels[product_id] = Decimal(quantity or 0)
+        return levels
 
     def get_average_price(self):
         """Durchschnittlicher Einkaufspreis"""
@@ -250,5 +281,181 @@ class InventoryMovement(db.Model):
     date = db.Column(db.DateTime, default=datetime.utcnow)
     notes = db.Column(db.Text)
 
+    @staticmethod
+    def signed(movement_type, quantity):
+        """Menge mit Vorzeichen je nach Bewegungstyp"""
+        quantity = Decimal(str(quantity or 0))
+        return quantity if movement_type in STOCK_INCREASING_TYPES else -quantity
+
+    @property
+    def signed_quantity(self):
+        """Bestandswirksame Menge (+ Eingang / - Abgang)"""
+        return self.signed(self.type, self.quantity)
+
+    @classmethod
+    def signed_quantity_expr(cls):
+        """SQL-Ausdruck für die bestandswirksame Menge"""
+        return case(
+            (cls.type.in_(STOCK_INCREASING_TYPES), cls.quantity),
+            else_=-cls.quantity
+        )
+
+    @classmethod
+    def bulk_delete(cls, *criteria):
+        """
+        Lagerbewegungen per Bulk-DELETE löschen und die Bestandstabelle
+        in derselben Transaktion nachziehen (Bulk-Queries lösen keine
+        Mapper-Events aus).
+        """
+        deltas = db.session.query(
+            cls.product_id,
+            cls.device_id,
+            func.sum(cls.signed_quantity_expr()),
+            func.count(cls.id)
+        ).filter(*criteria).group_by(cls.product_id, cls.device_id).all()
+
+        connection = db.session.connection()
+        for product_id, device_id, quantity, count in deltas:
+            StockBalance.apply(connection, product_id, device_id, -quantity, -count)
+
+        return cls.query.filter(*criteria).delete(synchronize_session=False)
+
     def __repr__(self):
-        return f'<Movement {self.type} {self.quantity} of {self.product_id}>'
\ No newline at end of file
+        return f'<Movement {self.type} {self.quantity} of {self.product_id}>'
+
+
+class StockBalance(db.Model):
+    """Materialisierter Lagerbestand je Produkt und Gerät"""
+    __tablename__ = 'stock_balances'
+
+    id = db.Column(db.Integer, primary_key=True)
+
+    # Schlüssel (device_id NULL = Zentrallager)
+    product_id = db.Column(db.Integer, db.ForeignKey('products.id', ondelete='CASCADE'), nullable=False)
+    device_id = db.Column(db.Integer, db.ForeignKey('devices.id', ondelete='CASCADE'))
+
+    # Bestand
+    quantity = db.Column(db.Numeric(12, 3), nullable=False, default=0)
+    movement_count = db.Column(db.Integer, nullable=False, default=0)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('uq_stock_balance_product_device', 'product_id', func.coalesce(device_id, 0), unique=True),
+    )
+
+    @classmethod
+    def apply(cls, connection, product_id, device_id, quantity, count=1):
+        """Bestandsänderung per Upsert auf der aktuellen Verbindung buchen"""
+        stmt = pg_insert(cls.__table__).values(
+            product_id=product_id,
+            device_id=device_id,
+            quantity=quantity,
+            movement_count=count,
+            updated_at=datetime.utcnow()
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[cls.product_id, func.coalesce(cls.device_id, 0)],
+            set_={
+                'quantity': cls.__table__.c.quantity + stmt.excluded.quantity,
+                'movement_count': cls.__table__.c.movement_count + stmt.excluded.movement_count,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        connection.execute(stmt)
+
+    @classmethod
+    def _aggregate_movements(cls):
+        """Soll-Bestände direkt aus den Lagerbewegungen"""
+        return db.session.query(
+            InventoryMovement.product_id,
+            InventoryMovement.device_id,
+            func.sum(InventoryMovement.signed_quantity_expr()).label('quantity'),
+            func.count(InventoryMovement.id).label('movement_count')
+        ).group_by(InventoryMovement.product_id, InventoryMovement.device_id)
+
+    @classmethod
+    def rebuild(cls):
+        """Bestandstabelle komplett aus den Lagerbewegungen neu aufbauen"""
+        cls.query.delete(synchronize_session=False)
+
+        aggregate = cls._aggregate_movements().subquery()
+        db.session.execute(
+            cls.__table__.insert().from_select(
+                ['product_id', 'device_id', 'quantity', 'movement_count', 'updated_at'],
+                select(
+                    aggregate.c.product_id,
+                    aggregate.c.device_id,
+                    aggregate.c.quantity,
+                    aggregate.c.movement_count,
+                    func.now()
+                )
+            )
+        )
+        db.session.commit()
+        return cls.query.count()
+
+    @classmethod
+    def verify(cls):
+        """Abweichungen zwischen Bestandstabelle und Lagerbewegungen finden"""
+        expected = {
+            (row.product_id, row.device_id): (Decimal(row.quantity), row.movement_count)
+            for row in cls._aggregate_movements()
+        }
+        actual = {
+            (row.product_id, row.device_id): (Decimal(row.quantity), row.movement_count)
+            for row in cls.query.all()
+        }
+
+        mismatches = []
+        for key in expected.keys() | actual.keys():
+            want = expected.get(key, (Decimal('0'), 0))
+            have = actual.get(key, (Decimal('0'), 0))
+            if want != have:
+                mismatches.append({
+                    'product_id': key[0],
+                    'device_id': key[1],
+                    'expected': want[0],
+                    'actual': have[0],
+                    'expected_count': want[1],
+                    'actual_count': have[1]
+                })
+        return mismatches
+
+    def __repr__(self):
+        return f'<StockBalance {self.product_id}/{self.device_id}: {self.quantity}>'
+
+
+# ============================================================================
+# EVENTS - Bestandstabelle transaktional mitführen
+# ============================================================================
+
+# Sonst zieht _movement_updated nach einem commit statt der alten die neue Menge ab
+keep_active_history(InventoryMovement.product_id, InventoryMovement.device_id,
+                    InventoryMovement.type, InventoryMovement.quantity)
+
+
+@event.listens_for(InventoryMovement, 'after_insert')
+def _movement_inserted(mapper, connection, target):
+    StockBalance.apply(connection, target.product_id, target.device_id, target.signed_quantity)
+
+
+@event.listens_for(InventoryMovement, 'after_delete')
+def _movement_deleted(mapper, connection, target):
+    StockBalance.apply(connection, target.product_id, target.device_id, -target.signed_quantity, -1)
+
+
+@event.listens_for(InventoryMovement, 'after_update')
+def _movement_updated(mapper, connection, target):
+    state = inspect(target)
+    old = {}
+    for attr in ('product_id', 'device_id', 'type', 'quantity'):
+        history = state.attrs[attr].history
+        old[attr] = history.deleted[0] if history.deleted else getattr(target, attr)
+
+    if all(old[attr] == getattr(target, attr) for attr in old):
+        return
+
+    StockBalance.apply(connection, old['product_id'], old['device_id'],
+                       -InventoryMovement.signed(old['type'], old['quantity']), -1)
+    StockBalance.apply(connection, target.product_id, target.device_id, target.signed_quantity)
@@ -233,13 +233,21 @@ async function subscribeToPush() {
     try {
         const registration = await navigator.serviceWorker.ready;
         
+        // VAPID Public Key vom Server
+        const keyResponse = await fetch('/api/pwa/push/public-key');
+        if (!keyResponse.ok) {
+            console.log('Push not configured on server');
+            return;
+        }
+        const { public_key } = await keyResponse.json();
+        
         const subscription = await registration.pushManager.subscribe({
             userVisibleOnly: true,
-            applicationServerKey: urlBase64ToUint8Array(PUBLIC_VAPID_KEY)
+            applicationServerKey: urlBase64ToUint8Array(public_key)
         });
         
         // Subscription an Server senden
-        await fetch('/api/push/subscribe', {
+        await fetch('/api/pwa/push/subscribe', {
             method: 'POST',
             headers: {
                 'Content-Type': 'application/json'
@@ -408,7 +416,4 @@ const pwaStyles = `
 // Styles injizieren
 document.head.insertAdjacentHTML('beforeend', pwaStyles);
 
-// VAPID Public Key (muss noch generiert werden)
-const PUBLIC_VAPID_KEY = 'YOUR_PUBLIC_VAPID_KEY_HERE';
-
 console.log('PWA Script loaded');
@@ -22,6 +22,9 @@ const dynamicRoutes = [
   '/settings'
 ];
 
+// Höchstens so viele Einträge pro Sync-Request (MAX_BATCH in app/utils/entry_sync.py)
+const SYNC_BATCH_SIZE = 1000;
+
 // Install Event - Cache erstellen
 self.addEventListener('install', event => {
   event.waitUntil(
@@ -119,42 +122,94 @@ self.addEventListener('sync', event => {
 
 async function syncEntries() {
   const db = await openDB();
-  const tx = db.transaction('pendingEntries', 'readonly');
-  const store = tx.objectStore('pendingEntries');
-  const entries = await store.getAll();
-  
+  const entries = await idbRequest(
+    db.transaction('pendingEntries', 'readonly').objectStore('pendingEntries').getAll()
+  );
+  if (entries.length === 0) return;
+
+  // Idempotenz-Schlüssel einmalig vergeben und speichern - ein erneuter
+  // Sync nach Verbindungsabbruch sendet denselben Schlüssel
+  const writeTx = db.transaction('pendingEntries', 'readwrite');
   for (const entry of entries) {
-    try {
-      const response = await fetch('/api/entries', {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
-        body: JSON.stringify(entry)
-      });
-      
-      if (response.ok) {
-        // Eintrag aus IndexedDB löschen
-        const deleteTx = db.transaction('pendingEntries', 'readwrite');
-        await deleteTx.objectStore('pendingEntries').delete(entry.id);
-      }
-    } catch (error) {
-      console.error('Sync failed for entry:', entry, error);
+    if (!entry.idempotency_key) {
+      entry.idempotency_key = self.crypto.randomUUID();
+      writeTx.objectStore('pendingEntries').put(entry);
     }
   }
+  await idbDone(writeTx);
+
+  // Stapelweise senden (Server nimmt höchstens SYNC_BATCH_SIZE Einträge an);
+  // bereits übernommene Stapel bleiben gelöscht, wenn ein späterer scheitert
+  for (let start = 0; start < entries.length; start += SYNC_BATCH_SIZE) {
+    await syncBatch(db, entries.slice(start, start + SYNC_BATCH_SIZE));
+  }
+}
+
+async function syncBatch(db, entries) {
+  const response = await fetch('/api/pwa/sync/entries', {
+    method: 'POST',
+    credentials: 'same-origin',
+    headers: {
+      'Content-Type': 'application/json',
+    },
+    body: JSON.stringify({ entries })
+  });
+  if (!response.ok) {
+    // Background Sync versucht es später erneut
+    throw new Error('Sync fehlgeschlagen: ' + response.status);
+  }
+
+  // Übernommene (auch bereits bekannte) Einträge lokal entfernen
+  const result = await response.json();
+  const done = new Set(
+    result.results.filter(r => r.status !== 'failed').map(r => r.idempotency_key)
+  );
+  const deleteTx = db.transaction('pendingEntries', 'readwrite');
+  for (const entry of entries) {
+    if (done.has(entry.idempotency_key)) {
+      deleteTx.objectStore('pendingEntries').delete(entry.id);
+    }
+  }
+  await idbDone(deleteTx);
+
+  result.results.filter(r => r.status === 'failed').forEach(r => {
+    console.error('Sync abgelehnt:', r.idempotency_key, r.error);
+  });
+}
+
+function idbRequest(request) {
+  return new Promise((resolve, reject) => {
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+}
+
+function idbDone(tx) {
+  return new Promise((resolve, reject) => {
+    tx.oncomplete = () => resolve();
+    tx.onerror = () => reject(tx.error);
+    tx.onabort = () => reject(tx.error);
+  });
 }
 
 // Push Notifications
 self.addEventListener('push', event => {
+  // Server sendet JSON {title, body, icon, badge, data}
+  let payload = {};
+  if (event.data) {
+    try {
+      payload = event.data.json();
+    } catch (e) {
+      payload = { body: event.data.text() };
+    }
+  }
+
   const options = {
-    body: event.data ? event.data.text() : 'Neue Benachrichtigung',
-    icon: '/static/icons/icon-192x192.png',
-    badge: '/static/icons/badge-72x72.png',
+    body: payload.body || 'Neue Benachrichtigung',
+    icon: payload.icon || '/static/icons/icon-192x192.png',
+    badge: payload.badge || '/static/icons/badge-72x72.png',
     vibrate: [100, 50, 100],
-    data: {
-      dateOfArrival: Date.now(),
-      primaryKey: 1
-    },
+    data: Object.assign({ dateOfArrival: Date.now() }, payload.data || {}),
     actions: [
       {
         action: 'explore',
@@ -170,7 +225,7 @@ self.addEventListener('push', event => {
   };
   
   event.waitUntil(
-    self.registration.showNotification('Automaten Manager', options)
+    self.registration.showNotification(payload.title || 'Automaten Manager', options)
   );
 });
 
@@ -218,20 +273,52 @@ self.addEventListener('periodicsync', event => {
 
 async function updateData() {
   try {
-    // Dashboard-Daten aktualisieren
-    const response = await fetch('/api/dashboard/stats');
-    if (response.ok) {
-      const data = await response.json();
-      
-      // In IndexedDB speichern
-      const db = await openDB();
-      const tx = db.transaction('cachedData', 'readwrite');
-      await tx.objectStore('cachedData').put({
-        key: 'dashboard_stats',
-        data: data,
-        timestamp: Date.now()
-      });
+    const db = await openDB();
+    const stored = await idbRequest(
+      db.transaction('cachedData', 'readonly').objectStore('cachedData').get('sync_state')
+    );
+
+    // Nur Änderungen seit dem letzten Stand laden
+    const url = stored ? '/api/pwa/changes?since=' + encodeURIComponent(stored.data.cursor) : '/api/pwa/changes';
+    const response = await fetch(url, { credentials: 'same-origin' });
+    if (!response.ok) return;
+    const changes = await response.json();
+
+    const tx = db.transaction('cachedData', 'readwrite');
+    const store = tx.objectStore('cachedData');
+
+    const removedDevices = new Set(changes.devices.deleted);
+    for (const name of ['devices', 'entries', 'products']) {
+      const current = !changes.reset && stored ? (stored.data[name] || {}) : {};
+      changes[name].upserted.forEach(row => { current[row.id] = row; });
+      changes[name].deleted.forEach(id => { delete current[id]; });
+      changes[name] = current;
     }
+
+    // Einnahmen entfernter Geräte (gelöscht oder an einen anderen Besitzer
+    // übergeben) kommen nicht einzeln als Tombstone
+    Object.values(changes.entries).forEach(row => {
+      if (removedDevices.has(row.device_id) && !changes.devices[row.device_id]) {
+        delete changes.entries[row.id];
+      }
+    });
+
+    store.put({
+      key: 'sync_state',
+      data: {
+        cursor: changes.cursor,
+        devices: changes.devices,
+        entries: changes.entries,
+        products: changes.products
+      },
+      timestamp: Date.now()
+    });
+    store.put({
+      key: 'dashboard_stats',
+      data: changes.statistics,
+      timestamp: Date.now()
+    });
+    await idbDone(tx);
   } catch (error) {
     console.error('Background update failed:', error);
   }
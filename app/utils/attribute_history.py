@@ -0,0 +1,20 @@
+# app/utils/attribute_history.py
+"""
+Altwerte für Model-Events
+Hooks wie after_update lesen den vorherigen Wert aus der Attribut-Historie.
+Ist das Attribut abgelaufen (nach einem commit), wird der alte Wert bei einer
+Zuweisung normalerweise nicht geladen und fehlt dort - active_history lädt
+ihn vor dem Überschreiben nach.
+"""
+
+from sqlalchemy import event
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    return value
+
+
+def keep_active_history(*attributes):
+    """Altwerte der Attribute auch nach commit in der Historie halten"""
+    for attribute in attributes:
+        event.listen(attribute, 'set', _keep_old_value, retval=True, active_history=True)
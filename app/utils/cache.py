@@ -0,0 +1,302 @@
+# app/utils/cache.py
+"""
+Cache für teure Kennzahlen je Besitzer (Dashboard, Berichte, Auslastung, Lieferanten)
+Redis wenn CACHE_REDIS_URL/REDIS_URL erreichbar ist, sonst ein prozessinterner
+Speicher. Schlüssel enthalten eine Versionsnummer je Besitzer - Schreibzugriffe
+auf Einnahmen, Ausgaben, Nachfüllungen und Lagerbewegungen erhöhen sie nach
+dem Commit (siehe Events in app.models), alte Einträge laufen per TTL aus.
+
+Der prozessinterne Speicher taugt nur für einen Worker-Prozess: die Version
+steigt nur im schreibenden Prozess, andere Worker zeigten bis zum Ablauf
+alte Zahlen. Mit mehreren Workern (WEB_CONCURRENCY) ohne Redis bleibt der
+Cache deshalb aus.
+"""
+
+from datetime import date
+import functools
+import hashlib
+import inspect
+import pickle
+import threading
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app.utils import metrics
+
+try:
+    import redis
+except ImportError:  # Redis optional
+    redis = None
+
+# Standard-Lebensdauer gecachter Kennzahlen (Sekunden)
+DEFAULT_TTL = 300
+KEY_PREFIX = 'am:agg:'
+# Versionszähler bleiben beim Leeren erhalten, sonst könnten Schlüssel
+# laufender Berechnungen mit einer alten Version wieder gültig werden
+VERSION_PREFIX = KEY_PREFIX + 'v:'
+
+_state = {
+    'backend': None,
+    'ttl': DEFAULT_TTL,
+    'logger': None,
+    'workers': 1,
+}
+_stats = {'hits': 0, 'misses': 0, 'errors': 0}
+_lock = threading.Lock()
+
+
+class LocalBackend:
+    """Prozessinterner Speicher mit Ablaufzeit (ein Worker-Prozess / Entwicklung)"""
+
+    name = 'local'
+
+    def __init__(self, max_entries: int = 10000):
+        self.max_entries = max_entries
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires is not None and expires < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        with self._lock:
+            if len(self._data) >= self.max_entries:
+                self._evict()
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def incr(self, key) -> int:
+        with self._lock:
+            value = int((self._data.get(key) or (0, None))[0]) + 1
+            self._data[key] = (value, None)
+            return value
+
+    def clear(self) -> int:
+        with self._lock:
+            keys = [key for key in self._data if not key.startswith(VERSION_PREFIX)]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def size(self) -> int:
+        return len(self._data)
+
+    def _evict(self):
+        """Abgelaufene Einträge entfernen, notfalls die ältesten"""
+        now = time.monotonic()
+        for key in [k for k, (_, expires) in self._data.items() if expires is not None and expires < now]:
+            del self._data[key]
+        while len(self._data) >= self.max_entries:
+            del self._data[next(iter(self._data))]
+
+
+class RedisBackend:
+    """Gemeinsamer Cache aller Worker"""
+
+    name = 'redis'
+
+    def __init__(self, client):
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl: Optional[int] = None):
+        self.client.set(key, value, ex=ttl)
+
+    def delete(self, key):
+        self.client.delete(key)
+
+    def incr(self, key) -> int:
+        return self.client.incr(key)
+
+    def clear(self) -> int:
+        count = 0
+        for key in self.client.scan_iter(match=KEY_PREFIX + '*', count=500):
+            if not key.startswith(VERSION_PREFIX.encode()):
+                count += self.client.delete(key)
+        return count
+
+    def size(self) -> int:
+        return sum(1 for _ in self.client.scan_iter(match=KEY_PREFIX + '*', count=500))
+
+
+def init_cache(app):
+    """Backend anhand der Konfiguration wählen"""
+    _state['ttl'] = app.config.get('CACHE_DEFAULT_TIMEOUT', DEFAULT_TTL)
+    _state['logger'] = app.logger
+    url = app.config.get('CACHE_REDIS_URL')
+
+    backend = None
+    if redis is not None and url:
+        try:
+            client = redis.Redis.from_url(url, socket_timeout=1, socket_connect_timeout=1)
+            client.ping()
+            backend = RedisBackend(client)
+        except redis.RedisError as e:
+            app.logger.warning("Cache: Redis nicht erreichbar (%s)", e)
+
+    workers = _state['workers'] = app.config.get('WEB_CONCURRENCY', 1)
+    if backend is None and workers > 1:
+        app.logger.warning("Cache: %d Worker-Prozesse ohne Redis - Kennzahlen-Cache deaktiviert", workers)
+    else:
+        backend = backend or LocalBackend()
+    _state['backend'] = backend
+    app.logger.info("Cache-Backend: %s", backend_name())
+
+
+def backend_name() -> str:
+    backend = _state['backend']
+    return backend.name if backend else 'none'
+
+
+def shared_between_workers() -> bool:
+    """Sehen alle Worker denselben Cache (Redis oder nur ein Worker-Prozess)?"""
+    backend = _state['backend']
+    return isinstance(backend, RedisBackend) or (backend is not None and _state['workers'] == 1)
+
+
+def _count(name):
+    with _lock:
+        _stats[name] += 1
+    metrics.cache_lookup(name)
+
+
+def _call(method, *args, default=None):
+    """Backend-Aufruf - Cache-Fehler dürfen keine Anfrage scheitern lassen"""
+    try:
+        return getattr(_state['backend'], method)(*args)
+    except Exception as e:
+        _count('errors')
+        if _state['logger']:
+            _state['logger'].warning("Cache-Fehler (%s): %s", method, e)
+        return default
+
+
+def _version_key(owner_id) -> str:
+    return f'{VERSION_PREFIX}{owner_id}'
+
+
+def owner_version(owner_id: int) -> int:
+    return int(_call('get', _version_key(owner_id)) or 0)
+
+
+def invalidate_owner(owner_id: int):
+    """Alle gecachten Kennzahlen eines Besitzers verwerfen (Version erhöhen)"""
+    if _state['backend'] is not None and owner_id is not None:
+        _call('incr', _version_key(owner_id))
+
+
+def mark_owner(session, owner_id: Optional[int]):
+    """Besitzer nach dem Commit der Session invalidieren"""
+    if owner_id is not None and session is not None:
+        session.info.setdefault('cache_owners', set()).add(owner_id)
+
+
+def delete_after_commit(session, key: str):
+    """Einzelnen Schlüssel nach dem Commit der Session löschen"""
+    if session is not None:
+        session.info.setdefault('cache_keys', set()).add(key)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    for owner_id in session.info.pop('cache_owners', ()):
+        invalidate_owner(owner_id)
+    for key in session.info.pop('cache_keys', ()):
+        delete_value(key)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_rollback(session, previous_transaction):
+    if not session.in_transaction():
+        session.info.pop('cache_owners', None)
+        session.info.pop('cache_keys', None)
+
+
+def load_value(key: str):
+    """Einzelwert lesen (None bei Fehlschlag oder ohne Backend)"""
+    if _state['backend'] is None:
+        return None
+    data = _call('get', key)
+    return pickle.loads(data) if data is not None else None
+
+
+def store_value(key: str, value, ttl: Optional[int] = None):
+    if _state['backend'] is not None:
+        _call('set', key, pickle.dumps(value), ttl or _state['ttl'])
+
+
+def delete_value(key: str):
+    if _state['backend'] is not None:
+        _call('delete', key)
+
+
+def cached(name: str, ttl: Optional[int] = None):
+    """
+    Ergebnis einer Funktion mit Parameter owner_id cachen. Der Schlüssel
+    enthält Name, Besitzer, dessen Version, das Tagesdatum (relative
+    Zeiträume) und die übrigen Argumente.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _state['backend'] is None:
+                return func(*args, **kwargs)
+
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {k: v for k, v in bound.arguments.items() if k not in ('cls', 'self')}
+            owner_id = arguments.pop('owner_id')
+
+            digest = hashlib.sha1(
+                repr((date.today(), sorted(arguments.items()))).encode()
+            ).hexdigest()[:16]
+            key = f'{KEY_PREFIX}{name}:{owner_id}:{owner_version(owner_id)}:{digest}'
+
+            data = _call('get', key)
+            if data is not None:
+                _count('hits')
+                return pickle.loads(data)
+
+            _count('misses')
+            result = func(*args, **kwargs)
+            _call('set', key, pickle.dumps(result), ttl or _state['ttl'])
+            return result
+
+        wrapper.uncached = func
+        return wrapper
+    return decorator
+
+
+def stats() -> dict:
+    """Treffer/Fehlschläge dieses Prozesses"""
+    with _lock:
+        result = dict(_stats)
+    lookups = result['hits'] + result['misses']
+    result['hit_rate'] = round(result['hits'] / lookups * 100, 1) if lookups else 0.0
+    result['backend'] = backend_name()
+    return result
+
+
+def clear() -> int:
+    """Kompletten Kennzahlen-Cache leeren"""
+    if _state['backend'] is None:
+        return 0
+    return _call('clear', default=0)
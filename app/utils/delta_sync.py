@@ -0,0 +1,123 @@
+# app/utils/delta_sync.py
+"""
+Delta-Sync für Offline-Clients (PWA)
+Statt kompletter Snapshots liefert changes_since nur Zeilen, die seit dem
+Stand des Clients angelegt, geändert (updated_at) oder gelöscht
+(SyncTombstone) wurden. Der Stand ist ein opaker Cursor mit dem
+Server-Zeitstempel der letzten Antwort. Weil updated_at beim Schreiben
+vergeben wird, der Commit aber später sichtbar sein kann, überlappen
+die Fenster um SYNC_OVERLAP - Clients übernehmen Zeilen per ID (upsert).
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import or_, select
+from sqlalchemy.orm import joinedload
+from app import db
+from app.models import Device, Entry, Product, StockBalance, SyncTombstone
+from app.utils.pagination import encode_cursor, decode_cursor, InvalidCursor
+
+# Überlappung der Sync-Fenster (späte Commits, Uhrenabweichung)
+SYNC_OVERLAP = timedelta(seconds=60)
+# Einnahmen im Offline-Cache
+ENTRY_WINDOW_DAYS = 30
+
+
+def device_dict(device):
+    return {
+        'id': device.id,
+        'name': device.name,
+        'status': device.status.value if hasattr(device.status, 'value') else str(device.status),
+        'location': device.location
+    }
+
+
+def entry_dict(entry):
+    return {
+        'id': entry.id,
+        'device_id': entry.device_id,
+        'device_name': entry.device.name,
+        'amount': float(entry.amount),
+        'date': entry.date.isoformat(),
+        'description': entry.description
+    }
+
+
+def product_dict(product, stock):
+    return {
+        'id': product.id,
+        'name': product.name,
+        'category': product.category.value if product.category else None,
+        'unit': product.unit.value if product.unit else None,
+        'current_stock': float(stock),
+        'reorder_point': product.reorder_point,
+        'default_price': float(product.default_price) if product.default_price else 0
+    }
+
+
+def _since(query, column, since):
+    if since is None:
+        return query
+    return query.filter(column >= since - SYNC_OVERLAP)
+
+
+def changes_since(owner_id: int, cursor: Optional[str] = None) -> dict:
+    """
+    Änderungen seit cursor (None = vollständiger Stand). Wirft InvalidCursor.
+    Ist der Cursor älter als die Tombstone-Aufbewahrung, kommt ebenfalls der
+    vollständige Stand mit reset=True.
+    """
+    now = datetime.utcnow()
+    since = None
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != 1 or not isinstance(values[0], datetime):
+            raise InvalidCursor('Ungültiger Sync-Cursor')
+        since = values[0]
+        if since < now - timedelta(days=SyncTombstone.RETENTION_DAYS):
+            since = None
+    reset = since is None
+
+    devices = _since(Device.query.filter(Device.owner_id == owner_id), Device.updated_at, since).all()
+
+    # Einnahmen im Cache-Fenster
+    entries = _since(Entry.query.options(joinedload(Entry.device)).filter(
+        Entry.owner_id == owner_id,
+        Entry.date >= date.today() - timedelta(days=ENTRY_WINDOW_DAYS)
+    ), Entry.updated_at, since).all()
+
+    # Produkte: Stammdaten geändert oder Bestand bewegt
+    product_query = Product.query.filter(Product.user_id == owner_id)
+    if since is not None:
+        product_query = product_query.filter(or_(
+            Product.updated_at >= since - SYNC_OVERLAP,
+            Product.id.in_(select(StockBalance.product_id).where(
+                StockBalance.updated_at >= since - SYNC_OVERLAP
+            ))
+        ))
+    products = product_query.order_by(Product.id).all()
+    stock_levels = Product.get_stock_levels(p.id for p in products)
+
+    # Löschungen
+    deleted = {'devices': [], 'entries': [], 'products': []}
+    if since is not None:
+        tombstones = db.session.execute(
+            select(SyncTombstone.entity, SyncTombstone.entity_id).where(
+                SyncTombstone.owner_id == owner_id,
+                SyncTombstone.deleted_at >= since - SYNC_OVERLAP
+            )
+        )
+        for entity, entity_id in tombstones:
+            deleted.setdefault(entity, []).append(entity_id)
+
+    return {
+        'cursor': encode_cursor([now]),
+        'reset': reset,
+        'server_time': now.isoformat(),
+        'devices': {'upserted': [device_dict(d) for d in devices], 'deleted': deleted['devices']},
+        'entries': {'upserted': [entry_dict(e) for e in entries], 'deleted': deleted['entries']},
+        'products': {
+            'upserted': [product_dict(p, stock_levels[p.id]) for p in products],
+            'deleted': deleted['products']
+        }
+    }
@@ -117,7 +117,7 @@ class EmailService:
         )
     
     @classmethod
-    def send_low_stock_alert(cls, product: Product, user: User):
+    def send_low_stock_alert(cls, product: Product, user: User, current_stock=None):
         """Niedrigbestand-Warnung senden"""
         template = """
         <!DOCTYPE html>
@@ -177,7 +177,8 @@ class EmailService:
         </html>
         """
         
-        current_stock = product.get_current_stock()
+        if current_stock is None:
+            current_stock = product.get_current_stock()
         
         return cls.send_email(
             to=user.email,
@@ -281,10 +282,14 @@ class EmailService:
         
         # Weitere Statistiken
         pending_maintenance = 0  # TODO: Implementieren
-        low_stock_count = Product.query.filter(
+        reorder_products = Product.query.filter(
             Product.user_id == user.id,
-            Product.current_stock <= Product.reorder_point
-        ).count() if hasattr(Product, 'current_stock') else 0
+            Product.reorder_point.isnot(None)
+        ).all()
+        stock_levels = Product.get_stock_levels(p.id for p in reorder_products)
+        low_stock_count = sum(
+            1 for p in reorder_products if stock_levels[p.id] <= p.reorder_point
+        )
         
         return cls.send_email(
             to=user.email,
@@ -385,13 +390,13 @@ class EmailScheduler:
     @staticmethod
     def check_low_stock():
         """Prüft täglich auf niedrige Bestände"""
-        products = Product.query.all()
+        products = Product.query.filter(Product.reorder_point.isnot(None)).all()
+        stock_levels = Product.get_stock_levels(p.id for p in products)
         
         for product in products:
-            if hasattr(product, 'get_current_stock'):
-                current_stock = product.get_current_stock()
-                if product.reorder_point and current_stock <= product.reorder_point:
-                    EmailService.send_low_stock_alert(product, product.user)
+            current_stock = stock_levels[product.id]
+            if current_stock <= product.reorder_point:
+                EmailService.send_low_stock_alert(product, User.query.get(product.user_id), current_stock)
     
     @staticmethod
     def send_daily_summaries():
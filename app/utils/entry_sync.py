@@ -0,0 +1,165 @@
+# app/utils/entry_sync.py
+"""
+Offline-Sync der PWA: ein Stapel Einnahmen in einer Transaktion
+Geräte werden mit einer Abfrage geprüft, gültige Einträge per Bulk-Insert
+mit ON CONFLICT DO NOTHING auf (user_id, idempotency_key) geschrieben -
+ein wiederholter Sync nach Verbindungsabbruch legt nichts doppelt an.
+Der Bulk-Insert geht an den Mapper-Events vorbei, die Tagesumsätze werden
+deshalb direkt gebucht.
+"""
+
+from datetime import datetime
+from decimal import Decimal
+from typing import List
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import db
+from app.models import Device, Entry, DailyRevenue
+
+# Einträge pro Sync-Anfrage
+MAX_BATCH = 1000
+MAX_KEY_LENGTH = 64
+# Numeric(10, 2): höchstens 8 Vorkommastellen
+MAX_AMOUNT = Decimal('99999999.99')
+
+CREATED = 'created'
+DUPLICATE = 'duplicate'
+FAILED = 'failed'
+
+
+def _item_key(item):
+    return (item.get('idempotency_key') or item.get('temp_id')) if isinstance(item, dict) else None
+
+
+def _parse_amount(value):
+    """Betrag -> Decimal mit zwei Stellen (None bleibt None), ValueError bei Fehlern"""
+    if value is None:
+        return None
+    try:
+        amount = Decimal(str(value)).quantize(Decimal('0.01'))
+    except ArithmeticError:
+        raise ValueError('Ungültiger Betrag')
+    if not amount.is_finite():
+        raise ValueError('Ungültiger Betrag')
+    if abs(amount) > MAX_AMOUNT:
+        raise ValueError('Betrag zu groß')
+    return amount
+
+
+def _parse_item(item, owned):
+    """Eintrag aus dem Client prüfen -> Spaltenwerte, ValueError bei Fehlern"""
+    if not isinstance(item, dict):
+        raise ValueError('Eintrag muss ein Objekt sein')
+    key = _item_key(item)
+    if not key:
+        raise ValueError('idempotency_key fehlt')
+    key = str(key)
+    if len(key) > MAX_KEY_LENGTH:
+        raise ValueError('idempotency_key zu lang')
+
+    try:
+        device_id = int(item['device_id'])
+    except (KeyError, TypeError, ValueError):
+        raise ValueError('device_id fehlt oder ist ungültig')
+    if device_id not in owned:
+        raise ValueError('Invalid device')
+
+    amount = _parse_amount(item.get('amount'))
+    cash = _parse_amount(item.get('cash_amount'))
+    card = _parse_amount(item.get('card_amount'))
+    if amount is None:
+        raise ValueError('Betrag fehlt')
+    if amount < 0:
+        raise ValueError('Betrag darf nicht negativ sein')
+
+    try:
+        day = datetime.fromisoformat(str(item['date'])).date()
+    except (KeyError, ValueError, OverflowError):
+        raise ValueError('Ungültiges Datum')
+    description = item.get('description')
+
+    return {
+        'idempotency_key': key,
+        'device_id': device_id,
+        'owner_id': owned[device_id],
+        'amount': amount,
+        'date': day,
+        'cash_amount': cash,
+        'card_amount': card,
+        'description': str(description) if description is not None else None
+    }
+
+
+def sync_entries(owner_id: int, user_id: int, items: List[dict]) -> List[dict]:
+    """
+    Stapel offline erfasster Einnahmen übernehmen. Liefert je Eintrag
+    {'idempotency_key', 'status', 'id'|'error'} in Eingabereihenfolge.
+    Der Aufrufer committet.
+    """
+    # Alle Geräte-IDs mit einer Abfrage prüfen
+    device_ids = set()
+    for item in items:
+        try:
+            device_ids.add(int(item['device_id']))
+        except (KeyError, TypeError, ValueError):
+            pass
+    owned = dict(db.session.execute(
+        select(Device.id, Device.owner_id).where(Device.id.in_(device_ids), Device.owner_id == owner_id)
+    ).all()) if device_ids else {}
+
+    results = []
+    rows = {}
+    for item in items:
+        try:
+            row = _parse_item(item, owned)
+        except ValueError as e:
+            results.append({
+                'idempotency_key': _item_key(item),
+                'status': FAILED,
+                'error': str(e)
+            })
+            continue
+        results.append({'idempotency_key': row['idempotency_key']})
+        # Gleicher Schlüssel zweimal im Stapel: der erste gewinnt
+        rows.setdefault(row['idempotency_key'], row)
+
+    created = {}
+    if rows:
+        now = datetime.utcnow()
+        values = [dict(row, user_id=user_id, created_at=now, updated_at=now) for row in rows.values()]
+        table = Entry.__table__
+        stmt = pg_insert(table).values(values).on_conflict_do_nothing(
+            index_elements=[table.c.user_id, table.c.idempotency_key]
+        ).returning(table.c.id, table.c.idempotency_key)
+        created = {key: entry_id for entry_id, key in db.session.execute(stmt)}
+
+        DailyRevenue.apply_many(db.session.connection(), [{
+            'owner_id': row['owner_id'],
+            'device_id': row['device_id'],
+            'day': row['date'],
+            'total': row['amount'],
+            'entry_count': 1,
+            'cash_total': row['cash_amount'] or 0,
+            'card_total': row['card_amount'] or 0
+        } for key, row in rows.items() if key in created])
+
+    # Bereits bekannte Schlüssel (Wiederholung) -> vorhandene IDs
+    replayed = [key for key in rows if key not in created]
+    existing = dict(db.session.execute(
+        select(Entry.idempotency_key, Entry.id).where(
+            Entry.user_id == user_id, Entry.idempotency_key.in_(replayed)
+        )
+    ).all()) if replayed else {}
+
+    seen = set()
+    for result in results:
+        if result.get('status') == FAILED:
+            continue
+        key = result['idempotency_key']
+        if key in created and key not in seen:
+            result.update(status=CREATED, id=created[key])
+        else:
+            result.update(status=DUPLICATE, id=created.get(key) or existing.get(key))
+        seen.add(key)
+
+    return results
@@ -0,0 +1,112 @@
+# app/utils/fleet_summary.py
+"""
+Finanz-Kennzahlen für alle Geräte eines Besitzers
+Umsatz, Ausgaben, Gewinn, ROI und 30-Tage-Werte in zwei gruppierten Abfragen
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterable, NamedTuple, Optional
+from sqlalchemy import func
+from app import db
+from app.models import Device, Entry, Expense
+from app.utils.cache import cached
+
+ZERO = Decimal('0.00')
+
+
+class DeviceSummary(NamedTuple):
+    """Leichtgewichtige Kennzahlen eines Geräts"""
+    device_id: int
+    revenue: Decimal = ZERO
+    expenses: Decimal = ZERO
+    entry_count: int = 0
+    window_revenue: Decimal = ZERO
+    window_entry_count: int = 0
+    window_average: Decimal = ZERO
+
+    @property
+    def profit(self) -> Decimal:
+        """Gewinn"""
+        return self.revenue - self.expenses
+
+    @property
+    def roi(self) -> float:
+        """Return on Investment in Prozent (wie Device.get_roi)"""
+        if self.expenses == 0:
+            return 0
+        return float((self.profit / self.expenses) * 100)
+
+
+class FleetSummary(dict):
+    """{device_id: DeviceSummary} - fehlende Geräte liefern Null-Werte"""
+
+    def __missing__(self, device_id):
+        return DeviceSummary(device_id)
+
+    @property
+    def total_revenue(self) -> Decimal:
+        return sum((s.revenue for s in self.values()), ZERO)
+
+    @property
+    def total_expenses(self) -> Decimal:
+        return sum((s.expenses for s in self.values()), ZERO)
+
+    @classmethod
+    @cached('fleet_summary')
+    def for_owner(cls, owner_id: int, device_ids: Optional[Iterable[int]] = None,
+                  start_date: Optional[date] = None, end_date: Optional[date] = None,
+                  window_days: int = 30) -> 'FleetSummary':
+        """
+        Kennzahlen aller Geräte eines Besitzers.
+
+        start_date/end_date begrenzen Umsatz und Ausgaben auf einen Zeitraum,
+        window_days bestimmt das Fenster für window_revenue/window_average.
+        """
+        since = date.today() - timedelta(days=window_days)
+        in_window = Entry.date >= since
+
+        entry_query = db.session.query(
+            Entry.device_id,
+            func.coalesce(func.sum(Entry.amount), 0),
+            func.count(Entry.id),
+            func.coalesce(func.sum(Entry.amount).filter(in_window), 0),
+            func.count(Entry.id).filter(in_window),
+            func.coalesce(func.avg(Entry.amount).filter(in_window), 0)
+        ).filter(Entry.owner_id == owner_id)
+
+        expense_query = db.session.query(
+            Expense.device_id,
+            func.coalesce(func.sum(Expense.amount), 0)
+        ).join(Device, Expense.device_id == Device.id).filter(Device.owner_id == owner_id)
+
+        if device_ids is not None:
+            device_ids = list(device_ids)
+            entry_query = entry_query.filter(Entry.device_id.in_(device_ids))
+            expense_query = expense_query.filter(Expense.device_id.in_(device_ids))
+        if start_date:
+            entry_query = entry_query.filter(Entry.date >= start_date)
+            expense_query = expense_query.filter(Expense.date >= start_date)
+        if end_date:
+            entry_query = entry_query.filter(Entry.date <= end_date)
+            expense_query = expense_query.filter(Expense.date <= end_date)
+
+        expenses = dict(expense_query.group_by(Expense.device_id).all())
+
+        summary = cls()
+        for device_id, revenue, count, w_revenue, w_count, w_avg in entry_query.group_by(Entry.device_id):
+            summary[device_id] = DeviceSummary(
+                device_id=device_id,
+                revenue=Decimal(revenue),
+                expenses=Decimal(expenses.pop(device_id, 0)),
+                entry_count=count,
+                window_revenue=Decimal(w_revenue),
+                window_entry_count=w_count,
+                window_average=Decimal(w_avg)
+            )
+
+        # Geräte mit Ausgaben aber ohne Einnahmen
+        for device_id, amount in expenses.items():
+            summary[device_id] = DeviceSummary(device_id, expenses=Decimal(amount))
+
+        return summary
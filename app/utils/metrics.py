@@ -0,0 +1,269 @@
+# app/utils/metrics.py
+"""
+Prometheus-Metriken unter /metrics
+Request-Latenz je Blueprint/Endpoint, laufende Requests, Datenbank-Abfragen
+(Anzahl und Dauer), Connection-Pool, Kennzahlen-Cache, Job-Warteschlange
+und Dauer der Report-Erzeugung.
+
+Aktiv, sobald METRICS_TOKEN gesetzt ist (Prometheus: authorization /
+bearer_token). Ohne Token nur mit METRICS_ENABLED=1 - die Metriken verraten
+Endpoints, Verkehr und Pool-Zustand.
+
+Mehrere Gunicorn-Worker: PROMETHEUS_MULTIPROC_DIR muss vor dem Start gesetzt
+sein (siehe gunicorn_config.py), dann schreibt jeder Worker in dieses
+Verzeichnis und /metrics fasst alle Prozesse zusammen.
+
+Cache-Trefferquote in Prometheus:
+    sum(rate(automaten_cache_lookups_total{result="hit"}[5m]))
+      / sum(rate(automaten_cache_lookups_total{result=~"hit|miss"}[5m]))
+"""
+
+from contextvars import ContextVar
+import os
+import time
+
+from flask import Response, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import Pool
+
+try:
+    from prometheus_client import (
+        CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    )
+    from prometheus_client import multiprocess
+except ImportError:  # prometheus-client optional
+    multiprocess = None
+
+# Sekunden - Seiten mit Berichten und Exporten dürfen länger dauern
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+REPORT_BUCKETS = (0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+CACHE_RESULTS = {'hits': 'hit', 'misses': 'miss', 'errors': 'error'}
+
+_metrics = {}
+_request_queries: ContextVar = ContextVar('metrics_request_queries', default=None)
+
+
+def multiprocess_mode() -> bool:
+    return bool(os.environ.get('PROMETHEUS_MULTIPROC_DIR'))
+
+
+def _create_metrics():
+    """Metriken einmal pro Prozess anlegen (create_app kann mehrfach laufen)"""
+    if _metrics:
+        return
+    _metrics.update(
+        requests=Counter(
+            'automaten_http_requests_total', 'HTTP-Requests',
+            ['blueprint', 'endpoint', 'method', 'status']
+        ),
+        latency=Histogram(
+            'automaten_http_request_duration_seconds', 'Antwortzeit je Endpoint',
+            ['blueprint', 'endpoint', 'method'], buckets=LATENCY_BUCKETS
+        ),
+        in_progress=Gauge(
+            'automaten_http_requests_in_progress', 'Laufende Requests',
+            ['blueprint'], multiprocess_mode='livesum'
+        ),
+        queries=Histogram(
+            'automaten_db_query_duration_seconds', 'Dauer einzelner Datenbank-Abfragen',
+            ['operation'], buckets=QUERY_BUCKETS
+        ),
+        request_queries=Histogram(
+            'automaten_db_queries_per_request', 'Datenbank-Abfragen je Request',
+            ['blueprint', 'endpoint'], buckets=QUERY_COUNT_BUCKETS
+        ),
+        request_db_time=Histogram(
+            'automaten_db_time_per_request_seconds', 'Datenbankzeit je Request',
+            ['blueprint', 'endpoint'], buckets=LATENCY_BUCKETS
+        ),
+        pool_checkouts=Counter('automaten_db_pool_checkouts_total', 'Verbindungen aus dem Pool geholt'),
+        pool_connects=Counter('automaten_db_pool_connections_created_total', 'Neu aufgebaute Datenbank-Verbindungen'),
+        pool_size=Gauge('automaten_db_pool_size', 'Pool-Größe', multiprocess_mode='livesum'),
+        pool_checked_out=Gauge(
+            'automaten_db_pool_checked_out', 'Ausgeliehene Verbindungen', multiprocess_mode='livesum'
+        ),
+        pool_overflow=Gauge(
+            'automaten_db_pool_overflow', 'Verbindungen über pool_size hinaus', multiprocess_mode='livesum'
+        ),
+        cache=Counter('automaten_cache_lookups_total', 'Zugriffe auf den Kennzahlen-Cache', ['result']),
+        jobs_pending=Gauge(
+            'automaten_jobs_pending', 'Eingereihte oder laufende Jobs im Thread-Pool', multiprocess_mode='livesum'
+        ),
+        queue_length=Gauge(
+            'automaten_job_queue_length', 'Wartende Celery-Aufgaben im Broker', multiprocess_mode='mostrecent'
+        ),
+        jobs=Histogram(
+            'automaten_job_duration_seconds', 'Laufzeit von Hintergrund-Jobs',
+            ['job', 'status'], buckets=REPORT_BUCKETS
+        ),
+        reports=Histogram(
+            'automaten_report_generation_seconds', 'Dauer der Report-Erzeugung',
+            ['type', 'status'], buckets=REPORT_BUCKETS
+        ),
+    )
+
+
+# --- Hooks für andere Module (ohne prometheus-client wirkungslos) ---
+
+def cache_lookup(result: str):
+    """Vom Kennzahlen-Cache aufgerufen: hits / misses / errors"""
+    if _metrics:
+        _metrics['cache'].labels(result=CACHE_RESULTS.get(result, result)).inc()
+
+
+def job_enqueued():
+    if _metrics:
+        _metrics['jobs_pending'].inc()
+
+
+def job_dequeued():
+    if _metrics:
+        _metrics['jobs_pending'].dec()
+
+
+def observe_job(name: str, status: str, duration: float):
+    if _metrics:
+        _metrics['jobs'].labels(job=name, status=status).observe(duration)
+
+
+def observe_report(report_type: str, status: str, duration: float):
+    if _metrics:
+        _metrics['reports'].labels(type=report_type, status=status).observe(duration)
+
+
+# --- Datenbank ---
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _metrics:
+        conn.info.setdefault('metrics_query_start', []).append(time.perf_counter())
+
+
+def _observe_query(statement: str, duration: float):
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement and statement.strip() else 'OTHER'
+    if operation not in ('SELECT', 'INSERT', 'UPDATE', 'DELETE', 'WITH'):
+        operation = 'OTHER'
+    _metrics['queries'].labels(operation=operation).observe(duration)
+
+    tally = _request_queries.get()
+    if tally is not None:
+        tally[0] += 1
+        tally[1] += duration
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('metrics_query_start')
+    if not _metrics or not starts:
+        return
+    _observe_query(statement, time.perf_counter() - starts.pop())
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # Fehlgeschlagene Abfragen lösen kein after_cursor_execute aus - Startzeit hier abräumen
+    conn = exception_context.connection
+    starts = conn.info.get('metrics_query_start') if conn is not None else None
+    if not _metrics or not starts:
+        return
+    _observe_query(exception_context.statement, time.perf_counter() - starts.pop())
+
+
+@event.listens_for(Pool, 'checkout')
+def _pool_checkout(dbapi_connection, connection_record, connection_proxy):
+    if _metrics:
+        _metrics['pool_checkouts'].inc()
+
+
+@event.listens_for(Pool, 'connect')
+def _pool_connect(dbapi_connection, connection_record):
+    if _metrics:
+        _metrics['pool_connects'].inc()
+
+
+def _sample_pool():
+    """Pool-Zustand dieses Prozesses (QueuePool; andere Pools haben keine Zähler)"""
+    from app import db
+
+    pool = db.engine.pool
+    if hasattr(pool, 'overflow'):
+        _metrics['pool_size'].set(pool.size())
+        _metrics['pool_checked_out'].set(pool.checkedout())
+        _metrics['pool_overflow'].set(max(pool.overflow(), 0))
+
+
+def _sample_queue():
+    from app import jobs
+
+    length = jobs.queue_length()
+    if length is not None:
+        _metrics['queue_length'].set(length)
+
+
+# --- Requests ---
+
+def _labels():
+    endpoint = request.endpoint or 'unknown'
+    return request.blueprint or 'app', endpoint
+
+
+def init_metrics(app):
+    """Request-Hooks und /metrics registrieren (METRICS_ENABLED, prometheus-client nötig)"""
+    if multiprocess is None or not app.config.get('METRICS_ENABLED'):
+        return
+    _create_metrics()
+    token = app.config.get('METRICS_TOKEN')
+
+    @app.before_request
+    def _start_request_metrics():
+        blueprint, _ = _labels()
+        g.metrics_start = time.perf_counter()
+        g.metrics_blueprint = blueprint
+        _metrics['in_progress'].labels(blueprint=blueprint).inc()
+        _request_queries.set([0, 0.0])
+
+    @app.after_request
+    def _record_request_metrics(response):
+        start = g.get('metrics_start')
+        if start is None or request.endpoint == 'metrics':
+            return response
+
+        blueprint, endpoint = _labels()
+        _metrics['latency'].labels(blueprint, endpoint, request.method).observe(time.perf_counter() - start)
+        _metrics['requests'].labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+
+        tally = _request_queries.get()
+        if tally is not None:
+            _metrics['request_queries'].labels(blueprint, endpoint).observe(tally[0])
+            _metrics['request_db_time'].labels(blueprint, endpoint).observe(tally[1])
+        _sample_pool()
+        return response
+
+    @app.teardown_request
+    def _finish_request_metrics(exc):
+        blueprint = g.pop('metrics_blueprint', None)
+        if blueprint is not None:
+            _metrics['in_progress'].labels(blueprint=blueprint).dec()
+        _request_queries.set(None)
+
+    @app.route('/metrics')
+    def metrics():
+        if token and request.headers.get('Authorization') != f'Bearer {token}':
+            return Response('Forbidden', status=403)
+
+        _sample_pool()
+        _sample_queue()
+
+        if multiprocess_mode():
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+            output = generate_latest(registry)
+        else:
+            output = generate_latest()
+        return Response(output, content_type=CONTENT_TYPE_LATEST)
+
+    app.logger.info("Metriken unter /metrics (%s)", 'multiprocess' if multiprocess_mode() else 'single process')
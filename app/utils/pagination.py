@@ -0,0 +1,295 @@
+# app/utils/pagination.py
+"""
+Keyset-Pagination (Seek-Methode) für Listen-Seiten und API
+Statt OFFSET wird ab dem Sortierschlüssel der letzten bzw. ersten Zeile
+weitergelesen - tiefe Seiten kosten so viel wie Seite 1. Die Cursor stehen
+als ?after=... / ?before=... in der URL, die Gesamtzahl ist optional
+(exakt oder als Schätzung aus dem Query-Plan).
+"""
+
+import base64
+import enum
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence
+
+from flask import abort, request, url_for
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import UnaryExpression
+from app import db
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+COUNT_MODES = ('exact', 'estimate')
+
+
+class InvalidCursor(ValueError):
+    """Cursor ist manipuliert oder passt nicht zur Sortierung"""
+
+
+# ============================================================================
+# CURSOR
+# ============================================================================
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'n': str(value)}
+    if isinstance(value, enum.Enum):
+        # SQLAlchemy-Enums speichern und vergleichen den Namen
+        return value.name
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'n' in value:
+            return Decimal(value['n'])
+        raise InvalidCursor('Unbekannter Cursor-Wert')
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Sortierschlüssel einer Zeile als URL-sicherer Cursor"""
+    raw = json.dumps([_encode_value(v) for v in values], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str) -> List[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list):
+            raise InvalidCursor('Cursor ist keine Liste')
+        return [_decode_value(v) for v in values]
+    except InvalidCursor:
+        raise
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(str(e))
+
+
+# ============================================================================
+# SEITE
+# ============================================================================
+
+class KeysetPage:
+    """Eine Seite Ergebnisse plus Cursor für vor/zurück"""
+
+    def __init__(self, items, per_page, next_cursor=None, prev_cursor=None,
+                 total=None, total_is_estimate=False):
+        self.items = items
+        self.per_page = per_page
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+        self.total = total
+        self.total_is_estimate = total_is_estimate
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+    def _url(self, **cursor):
+        args = request.args.to_dict()
+        args.pop('after', None)
+        args.pop('before', None)
+        args.update(cursor)
+        return url_for(request.endpoint, **(request.view_args or {}), **args)
+
+    @property
+    def next_url(self) -> Optional[str]:
+        return self._url(after=self.next_cursor) if self.has_next else None
+
+    @property
+    def prev_url(self) -> Optional[str]:
+        return self._url(before=self.prev_cursor) if self.has_prev else None
+
+    @property
+    def first_url(self) -> str:
+        return self._url()
+
+    def to_dict(self):
+        """Pagination-Block für JSON-Antworten"""
+        return {
+            'per_page': self.per_page,
+            'next_cursor': self.next_cursor,
+            'prev_cursor': self.prev_cursor,
+            'has_next': self.has_next,
+            'has_prev': self.has_prev,
+            'total': self.total,
+            'total_is_estimate': self.total_is_estimate
+        }
+
+
+# ============================================================================
+# ABFRAGE
+# ============================================================================
+
+def _sort_keys(order_by):
+    """[Entry.date.desc(), Entry.id.desc()] -> [(Spalte, absteigend), ...]"""
+    keys = []
+    for expression in order_by:
+        if isinstance(expression, UnaryExpression) and expression.modifier in (operators.desc_op, operators.asc_op):
+            keys.append((expression.element, expression.modifier is operators.desc_op))
+        else:
+            keys.append((expression, False))
+    return keys
+
+
+def _seek_condition(keys, values, backwards):
+    """Zeilen hinter (bzw. vor) dem Cursor in Sortierreihenfolge"""
+    def after(column, descending, value):
+        return column < value if descending != backwards else column > value
+
+    # Einheitliche Richtung: Zeilenwert-Vergleich, den Postgres per Index auflöst
+    if len({descending for _, descending in keys}) == 1:
+        descending = keys[0][1]
+        return after(tuple_(*[c for c, _ in keys]), descending, tuple_(*values))
+
+    clauses = []
+    for i, (column, descending) in enumerate(keys):
+        equal = [keys[j][0] == values[j] for j in range(i)]
+        clauses.append(and_(*equal, after(column, descending, values[i])))
+    return or_(*clauses)
+
+
+def estimate_count(query) -> int:
+    """Geschätzte Zeilenzahl aus dem Query-Plan (nur PostgreSQL, sonst exakt)"""
+    connection = db.session.connection()
+    if connection.dialect.name != 'postgresql':
+        return query.order_by(None).count()
+
+    compiled = query.order_by(None).statement.compile(
+        dialect=connection.dialect,
+        compile_kwargs={'render_postcompile': True}
+    )
+    plan = connection.exec_driver_sql('EXPLAIN (FORMAT JSON) ' + str(compiled), compiled.params).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def keyset_paginate(query, order_by, per_page=DEFAULT_PER_PAGE, after=None, before=None,
+                    count=None) -> KeysetPage:
+    """
+    Eine Seite einer Abfrage per Seek-Methode.
+
+    order_by muss die Zeilen eindeutig ordnen (zuletzt die ID) und darf keine
+    NULL-Werte enthalten (ggf. func.coalesce verwenden). after/before sind
+    Cursor aus einer vorherigen Seite, count ist None, 'exact' oder 'estimate'.
+    Wirft InvalidCursor bei unbrauchbarem Cursor.
+    """
+    keys = _sort_keys(order_by)
+    columns = len(query.column_descriptions)
+    backwards = bool(before)
+    cursor = before or after
+
+    total = None
+    if count == 'exact':
+        total = query.order_by(None).count()
+    elif count == 'estimate':
+        total = estimate_count(query)
+
+    page_query = query.order_by(None).add_columns(
+        *[column.label(f'_keyset_{i}') for i, (column, _) in enumerate(keys)]
+    )
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(keys):
+            raise InvalidCursor('Cursor passt nicht zur Sortierung')
+        page_query = page_query.filter(_seek_condition(keys, values, backwards))
+
+    ordering = [column.asc() if descending == backwards else column.desc() for column, descending in keys]
+    rows = page_query.order_by(*ordering).limit(per_page + 1).all()
+
+    has_more = len(rows) > per_page
+    rows = rows[:per_page]
+    if backwards:
+        rows.reverse()
+
+    def key_of(row):
+        return list(row[columns:])
+
+    def item_of(row):
+        return row[0] if columns == 1 else tuple(row[:columns])
+
+    has_next = has_more if not backwards else True
+    has_prev = has_more if backwards else bool(cursor)
+
+    return KeysetPage(
+        items=[item_of(row) for row in rows],
+        per_page=per_page,
+        next_cursor=encode_cursor(key_of(rows[-1])) if rows and has_next else None,
+        prev_cursor=encode_cursor(key_of(rows[0])) if rows and has_prev else None,
+        total=total,
+        total_is_estimate=count == 'estimate'
+    )
+
+
+def paginate_request(query, order_by, per_page=DEFAULT_PER_PAGE, count=None) -> KeysetPage:
+    """
+    keyset_paginate mit Parametern aus der URL: after, before, per_page
+    (max. MAX_PER_PAGE) und count=exact|estimate|none überschreibt den Default.
+    """
+    per_page = max(1, min(request.args.get('per_page', per_page, type=int), MAX_PER_PAGE))
+
+    count_arg = request.args.get('count')
+    if count_arg in COUNT_MODES:
+        count = count_arg
+    elif count_arg == 'none':
+        count = None
+
+    try:
+        return keyset_paginate(
+            query, order_by, per_page=per_page,
+            after=request.args.get('after'),
+            before=request.args.get('before'),
+            count=count
+        )
+    except InvalidCursor:
+        abort(400, 'Ungültiger Seiten-Cursor')
+
+
+def pager_html(page: KeysetPage, label: str = 'Einträge') -> str:
+    """Bootstrap-Navigation (Erste/Zurück/Weiter) für die f-String-Seiten"""
+    if not page.has_prev and not page.has_next:
+        if page.total is None:
+            return ''
+        return f'<div class="text-muted small mt-2">{page.total} {label}</div>'
+
+    total = ''
+    if page.total is not None:
+        total = f"{'ca. ' if page.total_is_estimate else ''}{page.total} {label}"
+
+    def link(url, text):
+        state = '' if url else ' disabled'
+        return f'<li class="page-item{state}"><a class="page-link" href="{url or "#"}">{text}</a></li>'
+
+    return f"""
+    <nav class="d-flex justify-content-between align-items-center mt-3">
+        <span class="text-muted small">{total}</span>
+        <ul class="pagination mb-0">
+            {link(page.first_url if page.has_prev else None, '<i class="bi bi-chevron-double-left"></i>')}
+            {link(page.prev_url, '<i class="bi bi-chevron-left"></i> Zurück')}
+            {link(page.next_url, 'Weiter <i class="bi bi-chevron-right"></i>')}
+        </ul>
+    </nav>
+    """
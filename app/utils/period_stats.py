@@ -0,0 +1,118 @@
+# app/utils/period_stats.py
+"""
+Kennzahlen für mehrere Zeiträume in einer Abfrage
+Einnahmen (aus den Tagesumsätzen) und Ausgaben je benanntem Zeitfenster
+per bedingter Aggregation (SUM ... FILTER) mit Bereichs-Prädikaten
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Dict, Optional, Tuple
+from sqlalchemy import func, and_, true, select
+from app import db
+from app.models import DailyRevenue, Expense
+from app.utils.cache import cached
+
+# name -> (start, end), beide inklusive; None = offen
+Windows = Dict[str, Tuple[Optional[date], Optional[date]]]
+
+
+def month_bounds(day: date) -> Tuple[date, date]:
+    """Erster und letzter Tag des Monats"""
+    start = day.replace(day=1)
+    end = (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return start, end
+
+
+def standard_windows(today: Optional[date] = None) -> Windows:
+    """Übliche Dashboard-Zeiträume relativ zu heute"""
+    today = today or date.today()
+    month_start, month_end = month_bounds(today)
+    last_month_start, last_month_end = month_bounds(month_start - timedelta(days=1))
+
+    return {
+        'today': (today, today),
+        'week': (today - timedelta(days=today.weekday()), today + timedelta(days=6 - today.weekday())),
+        'month': (month_start, month_end),
+        'last_month': (last_month_start, last_month_end),
+        'year': (date(today.year, 1, 1), date(today.year, 12, 31)),
+        'total': (None, None),
+    }
+
+
+def _in_range(column, start, end):
+    conditions = []
+    if start:
+        conditions.append(column >= start)
+    if end:
+        conditions.append(column <= end)
+    return and_(*conditions) if conditions else true()
+
+
+def _outer_bounds(windows: Windows):
+    """Gemeinsamer Bereich aller Fenster für das WHERE (None = offen)"""
+    starts = [start for start, _ in windows.values()]
+    ends = [end for _, end in windows.values()]
+    return (None if None in starts else min(starts),
+            None if None in ends else max(ends))
+
+
+class PeriodStats:
+    """Einnahmen/Ausgaben für beliebige benannte Zeitfenster"""
+
+    @staticmethod
+    @cached('period_stats')
+    def collect(owner_id: int, windows: Windows) -> Dict[str, Dict[str, Decimal]]:
+        """
+        Liefert {name: {'income', 'expenses', 'profit', 'count'}} für alle
+        Fenster mit genau einem Datenbank-Roundtrip.
+        """
+        start, end = _outer_bounds(windows)
+
+        income = select(*[
+            label
+            for name, (w_start, w_end) in windows.items()
+            for label in (
+                func.coalesce(func.sum(DailyRevenue.total).filter(
+                    _in_range(DailyRevenue.day, w_start, w_end)), 0).label(f'income_{name}'),
+                func.coalesce(func.sum(DailyRevenue.entry_count).filter(
+                    _in_range(DailyRevenue.day, w_start, w_end)), 0).label(f'count_{name}'),
+            )
+        ]).where(
+            DailyRevenue.owner_id == owner_id,
+            _in_range(DailyRevenue.day, start, end)
+        ).subquery()
+
+        expenses = select(*[
+            func.coalesce(func.sum(Expense.amount).filter(
+                _in_range(Expense.date, w_start, w_end)), 0).label(f'expenses_{name}')
+            for name, (w_start, w_end) in windows.items()
+        ]).where(
+            Expense.user_id == owner_id,
+            _in_range(Expense.date, start, end)
+        ).subquery()
+
+        # Beide Teilabfragen liefern genau eine Zeile
+        row = db.session.execute(
+            select(income, expenses).select_from(income.join(expenses, true()))
+        ).mappings().one()
+
+        result = {}
+        for name in windows:
+            window_income = Decimal(row[f'income_{name}'])
+            window_expenses = Decimal(row[f'expenses_{name}'])
+            result[name] = {
+                'income': window_income,
+                'expenses': window_expenses,
+                'profit': window_income - window_expenses,
+                'count': int(row[f'count_{name}'])
+            }
+        return result
+
+    @classmethod
+    def standard(cls, owner_id: int, *names: str, today: Optional[date] = None) -> Dict[str, Dict[str, Decimal]]:
+        """Kennzahlen für ausgewählte Standard-Zeiträume (siehe standard_windows)"""
+        windows = standard_windows(today)
+        if names:
+            windows = {name: windows[name] for name in names}
+        return cls.collect(owner_id, windows)
@@ -0,0 +1,213 @@
+# app/utils/push.py
+"""
+Web-Push für Automaten Manager
+Abonnements liegen in der Datenbank (push_subscriptions), der Versand läuft
+als Hintergrund-Job: alle Abonnements der betroffenen Benachrichtigungen
+werden parallel über einen begrenzten Thread-Pool angestoßen. Abgelaufene
+Endpunkte (404/410) werden entfernt, erfolgreiche Zustellung setzt
+Notification.push_sent.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import json
+from typing import Iterable, List, Optional
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+try:
+    from pywebpush import webpush, WebPushException
+except ImportError:  # pywebpush optional
+    webpush = None
+    WebPushException = Exception
+
+from app import db
+from app.jobs import job, enqueue
+from app.models import Notification, NotificationType, PushSubscription
+
+# Push-Dienst meldet Endpunkt als nicht mehr gültig
+EXPIRED_STATUS = (404, 410)
+# Abonnements nach so vielen Fehlversuchen in Folge verwerfen
+MAX_FAILURES = 5
+
+ICON = '/static/icons/icon-192x192.png'
+BADGE = '/static/icons/badge-72x72.png'
+
+
+# ============================================================================
+# ABONNEMENTS
+# ============================================================================
+
+def save_subscription(user_id: int, data: dict, user_agent: Optional[str] = None) -> None:
+    """
+    Abonnement aus PushSubscription.toJSON() speichern. Ein Endpunkt gehört
+    immer dem zuletzt angemeldeten User. ValueError bei unvollständigen Daten.
+    """
+    keys = data.get('keys') or {}
+    if not data.get('endpoint') or not keys.get('p256dh') or not keys.get('auth'):
+        raise ValueError('Unvollständiges Push-Abonnement')
+
+    table = PushSubscription.__table__
+    stmt = pg_insert(table).values(
+        user_id=user_id,
+        endpoint=data['endpoint'],
+        p256dh=keys['p256dh'],
+        auth=keys['auth'],
+        user_agent=(user_agent or '')[:255] or None,
+        created_at=datetime.utcnow(),
+        failure_count=0
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.endpoint],
+        set_={
+            'user_id': stmt.excluded.user_id,
+            'p256dh': stmt.excluded.p256dh,
+            'auth': stmt.excluded.auth,
+            'user_agent': stmt.excluded.user_agent,
+            'failure_count': 0
+        }
+    )
+    db.session.execute(stmt)
+
+
+def remove_subscription(user_id: int, endpoint: Optional[str] = None) -> int:
+    """Ein Abonnement (per Endpunkt) oder alle eines Users entfernen"""
+    query = PushSubscription.query.filter_by(user_id=user_id)
+    if endpoint:
+        query = query.filter_by(endpoint=endpoint)
+    return query.delete(synchronize_session=False)
+
+
+# ============================================================================
+# VERSAND
+# ============================================================================
+
+def payload_for(notification: Notification) -> str:
+    """JSON-Nutzlast für den Service Worker"""
+    return json.dumps({
+        'title': notification.title,
+        'body': notification.message,
+        'icon': ICON,
+        'badge': BADGE,
+        'data': dict(notification.data or {}, notification_id=notification.id)
+    })
+
+
+def _send(subscription_info: dict, payload: str, settings: dict):
+    """
+    Eine Nachricht zustellen (läuft im Pool, ohne Datenbankzugriff).
+    Liefert 'ok', 'expired' oder 'failed'.
+    """
+    try:
+        webpush(
+            subscription_info=subscription_info,
+            data=payload,
+            vapid_private_key=settings['private_key'],
+            vapid_claims={'sub': settings['claim']},
+            timeout=settings['timeout'],
+            ttl=settings['ttl']
+        )
+        return 'ok'
+    except WebPushException as e:
+        status = getattr(getattr(e, 'response', None), 'status_code', None)
+        return 'expired' if status in EXPIRED_STATUS else 'failed'
+    except Exception:
+        return 'failed'
+
+
+@job('push.deliver')
+def deliver(notification_ids: List[int]) -> dict:
+    """Benachrichtigungen an alle Abonnements ihrer User senden"""
+    config = current_app.config
+    if webpush is None or not config.get('VAPID_PRIVATE_KEY'):
+        current_app.logger.warning("Web-Push nicht konfiguriert (pywebpush/VAPID_PRIVATE_KEY)")
+        return {'sent': 0}
+
+    notifications = Notification.query.filter(
+        Notification.id.in_(notification_ids),
+        Notification.push_sent.is_(False)
+    ).all()
+    if not notifications:
+        return {'sent': 0}
+
+    subscriptions = {}
+    for sub in PushSubscription.query.filter(
+        PushSubscription.user_id.in_({n.user_id for n in notifications})
+    ):
+        subscriptions.setdefault(sub.user_id, []).append(sub)
+
+    settings = {
+        'private_key': config['VAPID_PRIVATE_KEY'],
+        'claim': config.get('VAPID_CLAIM_SUB') or 'mailto:admin@automaten-manager.de',
+        'timeout': config.get('PUSH_TIMEOUT', 10),
+        'ttl': config.get('PUSH_TTL', 86400)
+    }
+
+    # HTTP-Aufrufe parallel, Datenbank nur hier im Job-Thread
+    with ThreadPoolExecutor(max_workers=config.get('PUSH_WORKERS', 8),
+                            thread_name_prefix='push') as pool:
+        futures = [
+            (notification.id, sub.id, pool.submit(_send, sub.to_webpush(), payload_for(notification), settings))
+            for notification in notifications
+            for sub in subscriptions.get(notification.user_id, [])
+        ]
+        results = [(notification_id, sub_id, future.result()) for notification_id, sub_id, future in futures]
+
+    delivered = {n for n, _, status in results if status == 'ok'}
+    succeeded = {s for _, s, status in results if status == 'ok'}
+    expired = {s for _, s, status in results if status == 'expired'}
+    failed = {s for _, s, status in results if status == 'failed'} - succeeded - expired
+
+    if delivered:
+        Notification.query.filter(Notification.id.in_(delivered)).update(
+            {'push_sent': True}, synchronize_session=False)
+    if succeeded:
+        PushSubscription.query.filter(PushSubscription.id.in_(succeeded)).update(
+            {'last_success_at': datetime.utcnow(), 'failure_count': 0}, synchronize_session=False)
+    if failed:
+        PushSubscription.query.filter(PushSubscription.id.in_(failed)).update(
+            {'failure_count': PushSubscription.failure_count + 1}, synchronize_session=False)
+    pruned = PushSubscription.query.filter(
+        (PushSubscription.id.in_(expired)) | (PushSubscription.failure_count >= MAX_FAILURES)
+    ).delete(synchronize_session=False)
+    db.session.commit()
+
+    return {'sent': len(succeeded), 'delivered': len(delivered), 'failed': len(failed), 'pruned': pruned}
+
+
+def queue_push(notification_ids: Iterable[int]):
+    """Versand der Benachrichtigungen als Hintergrund-Job einreihen"""
+    notification_ids = list(notification_ids)
+    if notification_ids:
+        enqueue('push.deliver', notification_ids)
+
+
+def notify(user_id: int, title: str, message: str,
+           type: NotificationType = NotificationType.INFO, data: Optional[dict] = None) -> Notification:
+    """Benachrichtigung anlegen, committen und per Push versenden (asynchron)"""
+    notification = Notification(user_id=user_id, type=type, title=title, message=message, data=data)
+    db.session.add(notification)
+    db.session.commit()
+    queue_push([notification.id])
+    return notification
+
+
+def pending_ids(max_age_hours: int = 24) -> List[int]:
+    """Noch nicht per Push versendete Benachrichtigungen von Usern mit Abonnement"""
+    since = datetime.utcnow() - timedelta(hours=max_age_hours)
+    return db.session.execute(
+        select(Notification.id).where(
+            Notification.push_sent.is_(False),
+            Notification.created_at >= since,
+            Notification.user_id.in_(select(PushSubscription.user_id))
+        ).order_by(Notification.id)
+    ).scalars().all()
+
+
+def queue_pending(max_age_hours: int = 24) -> int:
+    """Noch nicht per Push versendete Benachrichtigungen erneut einreihen"""
+    ids = pending_ids(max_age_hours)
+    queue_push(ids)
+    return len(ids)
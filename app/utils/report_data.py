@@ -0,0 +1,104 @@
+# app/utils/report_data.py
+"""
+Report-Daten für Jahresbericht und Cashflow
+Monatsreihen (Einnahmen, Ausgaben, Gewinn, kumuliert) mit einer
+date_trunc-Gruppierung je Tabelle und lückenloser Monatsfolge
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional
+from sqlalchemy import func
+from app import db
+from app.models import DailyRevenue, Expense
+
+ZERO = Decimal('0.00')
+
+
+def month_start(day: date) -> date:
+    """Erster Tag des Monats"""
+    return day.replace(day=1)
+
+
+def add_months(day: date, months: int) -> date:
+    """Monatsanfang um n Monate verschoben (ohne 30-Tage-Näherung)"""
+    index = day.year * 12 + (day.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def iter_months(start_date: date, end_date: date):
+    """Alle Monatsanfänge von start_date bis end_date (inklusive)"""
+    current = month_start(start_date)
+    last = month_start(end_date)
+    while current <= last:
+        yield current
+        current = add_months(current, 1)
+
+
+class ReportData:
+    """Aggregierte Daten für die Berichts-Renderer (PDF, Excel, HTML)"""
+
+    @staticmethod
+    def monthly_income(owner_id: int, start_date: date, end_date: date) -> Dict[date, Decimal]:
+        """Einnahmen je Monatsanfang (aus den Tagesumsätzen)"""
+        return {
+            row.period: Decimal(row.total)
+            for row in DailyRevenue.series(owner_id, start_date, end_date, period='month')
+        }
+
+    @staticmethod
+    def monthly_expenses(owner_id: int, start_date: date, end_date: date) -> Dict[date, Decimal]:
+        """Ausgaben je Monatsanfang"""
+        bucket = func.date_trunc('month', Expense.date).cast(db.Date).label('period')
+        rows = db.session.query(
+            bucket,
+            func.sum(Expense.amount).label('total')
+        ).filter(
+            Expense.user_id == owner_id,
+            Expense.date >= start_date,
+            Expense.date <= end_date
+        ).group_by(bucket).all()
+        return {row.period: Decimal(row.total) for row in rows}
+
+    @classmethod
+    def monthly_series(cls, owner_id: int, start_date: date, end_date: date,
+                       label_format: str = '%b %Y',
+                       opening_balance: Optional[Decimal] = None) -> List[Dict[str, Any]]:
+        """
+        Lückenlose Monatsreihe für einen Zeitraum, zwei Abfragen insgesamt.
+        Jede Zeile: period, month (Label), income, expenses, profit, cumulative.
+        """
+        income = cls.monthly_income(owner_id, start_date, end_date)
+        expenses = cls.monthly_expenses(owner_id, start_date, end_date)
+
+        series = []
+        cumulative = opening_balance or ZERO
+        for period in iter_months(start_date, end_date):
+            month_income = income.get(period, ZERO)
+            month_expenses = expenses.get(period, ZERO)
+            profit = month_income - month_expenses
+            cumulative += profit
+
+            series.append({
+                'period': period,
+                'month': period.strftime(label_format),
+                'income': month_income,
+                'expenses': month_expenses,
+                'profit': profit,
+                'cumulative': cumulative
+            })
+        return series
+
+    @classmethod
+    def year_series(cls, owner_id: int, year: int) -> List[Dict[str, Any]]:
+        """Zwölf Monate eines Jahres (Label = Monatsname)"""
+        return cls.monthly_series(owner_id, date(year, 1, 1), date(year, 12, 31), label_format='%B')
+
+    @classmethod
+    def trailing_months(cls, owner_id: int, months: int = 12,
+                        today: Optional[date] = None) -> List[Dict[str, Any]]:
+        """Die letzten n Monate inklusive des laufenden Monats"""
+        today = today or date.today()
+        start = add_months(month_start(today), -(months - 1))
+        end = add_months(month_start(today), 1) - timedelta(days=1)
+        return cls.monthly_series(owner_id, start, end)
@@ -0,0 +1,192 @@
+# app/utils/sql_profiler.py
+"""
+SQL-Instrumentierung pro Request
+Zählt über die Cursor-Events von SQLAlchemy alle Abfragen einer Anfrage,
+misst die Datenbankzeit und gruppiert die Statements nach Fingerprint
+(Parameter und IN-Listen normalisiert). Derselbe Fingerprint viele Male
+in einer Anfrage deutet auf ein N+1-Muster hin (Lazy-Load in einer Schleife).
+
+Aktiv mit SQL_PROFILING=1 (im Debug-Modus automatisch): Ergebnisse als
+Response-Header (X-DB-Query-Count, X-DB-Time-Ms, X-DB-N-Plus-One,
+Server-Timing) und im Debug-Modus im Log.
+
+Für Tests:
+    with query_budget(5):
+        client.get('/suppliers/')
+    assert_query_budget(client, '/api/pwa/changes', 8)
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+import re
+import time
+from typing import Dict, List, Optional, Tuple
+
+from flask import request, g
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Ab so vielen gleichen Statements pro Anfrage gilt ein Muster als N+1
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+_current: ContextVar[Optional['QueryStats']] = ContextVar('sql_query_stats', default=None)
+
+_PARAMS = re.compile(r"%\(\w+\)s|\?|:\w+|\$\d+")
+_IN_LIST = re.compile(r"\bIN\s*\((?:\s*(?:__\[POSTCOMPILE_\w+\]|\?|'[^']*'|-?\d+(?:\.\d+)?)\s*,?)+\)", re.IGNORECASE)
+_NUMBERS = re.compile(r"\b\d+\b")
+_STRINGS = re.compile(r"'(?:[^']|'')*'")
+_SPACES = re.compile(r"\s+")
+
+
+def fingerprint(statement: str) -> str:
+    """Statement ohne konkrete Werte - gleiche Abfragen mit anderen Parametern fallen zusammen"""
+    text = _STRINGS.sub('?', statement)
+    text = _PARAMS.sub('?', text)
+    text = _NUMBERS.sub('?', text)
+    text = _IN_LIST.sub('IN (...)', text)
+    return _SPACES.sub(' ', text).strip()
+
+
+class QueryStats:
+    """
+    Abfragen eines Requests (oder eines query_budget-Blocks). Ein äußerer
+    Sammler (parent) zählt mit - so misst query_budget() um einen
+    Test-Client-Aufruf auch bei aktivem Request-Profiling alle Abfragen.
+    """
+
+    def __init__(self, threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD, parent: Optional['QueryStats'] = None):
+        self.threshold = threshold
+        self.parent = parent
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Dict[str, List[float]] = {}
+
+    def record(self, statement: str, duration: float):
+        self.count += 1
+        self.duration += duration
+        self.statements.setdefault(fingerprint(statement), []).append(duration)
+        if self.parent is not None:
+            self.parent.record(statement, duration)
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration * 1000
+
+    def repeated(self, minimum: int = 2) -> List[Tuple[str, int, float]]:
+        """(Fingerprint, Anzahl, Gesamtzeit ms) - häufigste zuerst"""
+        return sorted(
+            ((sql, len(times), sum(times) * 1000) for sql, times in self.statements.items() if len(times) >= minimum),
+            key=lambda item: item[1],
+            reverse=True
+        )
+
+    def n_plus_one(self) -> List[Tuple[str, int, float]]:
+        """Verdächtige Muster: ein SELECT-Fingerprint mindestens threshold-mal"""
+        return [item for item in self.repeated(self.threshold) if item[0].upper().startswith('SELECT')]
+
+    def summary(self) -> str:
+        return f"{self.count} Abfragen, {self.duration_ms:.1f} ms DB"
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current.get()
+    starts = conn.info.get('query_start')
+    if stats is not None and starts:
+        stats.record(statement, time.perf_counter() - starts.pop())
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # after_cursor_execute kommt bei Fehlern nicht - Startzeit trotzdem abräumen,
+    # sonst gehören spätere Dauern (conn.info überlebt den Pool-Checkout) zur falschen Abfrage
+    conn = exception_context.connection
+    starts = conn.info.get('query_start') if conn is not None else None
+    if not starts:
+        return
+    duration = time.perf_counter() - starts.pop()
+    stats = _current.get()
+    if stats is not None and exception_context.statement:
+        stats.record(exception_context.statement, duration)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+@contextmanager
+def collect_queries(threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD):
+    """Abfragen innerhalb des Blocks sammeln"""
+    stats = QueryStats(threshold, parent=_current.get())
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries: int, allow_n_plus_one: bool = False,
+                 threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD):
+    """AssertionError, wenn der Block mehr Abfragen braucht oder ein N+1-Muster zeigt"""
+    with collect_queries(threshold) as stats:
+        yield stats
+
+    problems = []
+    if stats.count > max_queries:
+        problems.append(f"{stats.count} Abfragen statt höchstens {max_queries}")
+    if not allow_n_plus_one:
+        problems.extend(f"N+1: {count}x {sql[:200]}" for sql, count, _ in stats.n_plus_one())
+    if problems:
+        raise AssertionError('Query-Budget überschritten:\n' + '\n'.join(problems))
+
+
+def assert_query_budget(client, url: str, max_queries: int, method: str = 'GET',
+                        allow_n_plus_one: bool = False, **kwargs):
+    """Endpoint über den Test-Client aufrufen und dessen Abfragen prüfen -> Response"""
+    with query_budget(max_queries, allow_n_plus_one=allow_n_plus_one):
+        response = client.open(url, method=method, **kwargs)
+    return response
+
+
+def init_sql_profiler(app):
+    """Request-Hooks registrieren (nur wenn SQL_PROFILING aktiv ist)"""
+    if not app.config.get('SQL_PROFILING'):
+        return
+    threshold = app.config.get('SQL_N_PLUS_ONE_THRESHOLD', DEFAULT_N_PLUS_ONE_THRESHOLD)
+
+    @app.before_request
+    def _start_sql_profiling():
+        g.sql_stats = QueryStats(threshold, parent=_current.get())
+        _current.set(g.sql_stats)
+
+    @app.after_request
+    def _report_sql_profiling(response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+
+        suspects = stats.n_plus_one()
+        response.headers['X-DB-Query-Count'] = str(stats.count)
+        response.headers['X-DB-Time-Ms'] = f"{stats.duration_ms:.1f}"
+        response.headers['X-DB-N-Plus-One'] = str(len(suspects))
+        response.headers.add('Server-Timing', f'db;desc="{stats.count} queries";dur={stats.duration_ms:.1f}')
+
+        if app.debug:
+            app.logger.debug("SQL %s %s: %s", request.method, request.path, stats.summary())
+            for sql, count, duration in suspects:
+                app.logger.warning("Mögliches N+1 in %s %s: %dx (%.1f ms) %s",
+                                   request.method, request.path, count, duration, sql[:300])
+        return response
+
+    @app.teardown_request
+    def _stop_sql_profiling(exc):
+        # Auch nach Fehlern, sonst sammelt der Worker-Thread weiter
+        stats = g.pop('sql_stats', None)
+        _current.set(stats.parent if stats is not None else None)
@@ -0,0 +1,317 @@
+# app/utils/streaming_export.py
+"""
+Streaming-Export für große Datenmengen
+Zeilen werden per serverseitigem Cursor (yield_per) blockweise gelesen und
+direkt als CSV gesendet bzw. in eine xlsxwriter-Mappe im constant_memory-Modus
+geschrieben - der Speicherbedarf hängt nicht von der Zeilenzahl ab.
+Der Komplett-Export packt alle Tabellen eines Besitzers als NDJSON/CSV in
+ein Zip, das ebenfalls während des Schreibens gesendet wird.
+"""
+
+import csv
+import enum
+import io
+import json
+import os
+import tempfile
+import uuid
+import zipfile
+from datetime import date, datetime, time
+from decimal import Decimal
+from typing import Callable, Iterable, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import select
+from app import db
+from app.models import (Device, Entry, Expense, MaintenanceLog, MaintenanceRecord,
+                        Product, Supplier, Refill, RefillItem, InventoryMovement)
+
+# Zeilen pro Datenbank-Fetch
+CHUNK_SIZE = 1000
+# CSV-Puffer wird ab dieser Größe gesendet
+FLUSH_BYTES = 64 * 1024
+# Excel-Limit pro Tabellenblatt (inkl. Kopfzeile)
+XLSX_MAX_ROWS = 1048576
+
+CSV_MIMETYPE = 'text/csv'
+XLSX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class Dataset(NamedTuple):
+    """Exportierbare Tabelle eines Besitzers"""
+    title: str
+    headers: Sequence[str]
+    query: Callable  # (owner_id, start_date, end_date) -> Select
+
+
+def _in_period(stmt, column, start_date, end_date):
+    if start_date:
+        stmt = stmt.where(column >= start_date)
+    if end_date:
+        stmt = stmt.where(column <= end_date)
+    return stmt
+
+
+def _entries_query(owner_id, start_date=None, end_date=None):
+    stmt = select(
+        Entry.date, Entry.time, Device.name, Entry.amount, Entry.cash_amount,
+        Entry.card_amount, Entry.product_count, Entry.reference, Entry.description
+    ).join(Device, Entry.device_id == Device.id).where(Entry.owner_id == owner_id)
+    return _in_period(stmt, Entry.date, start_date, end_date).order_by(Entry.date, Entry.id)
+
+
+def _expenses_query(owner_id, start_date=None, end_date=None):
+    stmt = select(
+        Expense.date, Expense.category, Device.name, Expense.amount,
+        Expense.description, Expense.supplier, Expense.invoice_number
+    ).outerjoin(Device, Expense.device_id == Device.id).where(Expense.user_id == owner_id)
+    return _in_period(stmt, Expense.date, start_date, end_date).order_by(Expense.date, Expense.id)
+
+
+DATASETS = {
+    'entries': Dataset(
+        'Einnahmen',
+        ['Datum', 'Uhrzeit', 'Gerät', 'Betrag', 'Bar', 'Karte', 'Produkte', 'Referenz', 'Beschreibung'],
+        _entries_query
+    ),
+    'expenses': Dataset(
+        'Ausgaben',
+        ['Datum', 'Kategorie', 'Gerät', 'Betrag', 'Beschreibung', 'Lieferant', 'Rechnungsnr.'],
+        _expenses_query
+    ),
+}
+
+
+def iter_rows(stmt, chunk_size: int = CHUNK_SIZE) -> Iterator[tuple]:
+    """Zeilen einer Abfrage über einen serverseitigen Cursor, chunk_size pro Fetch"""
+    result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+    for partition in result.partitions():
+        yield from partition
+
+
+def text_value(value):
+    """Zellwert für CSV/JSON (ISO-Datum/-Uhrzeit, Dezimalpunkt, Enum-Wert, UUID als Text)"""
+    if value is None:
+        return ''
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, (date, datetime, time)):
+        return value.isoformat()
+    if isinstance(value, (Decimal, uuid.UUID)):
+        return str(value)
+    return value
+
+
+def _xlsx_value(value):
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, Decimal):
+        return float(value)
+    return value
+
+
+def csv_stream(headers: Sequence[str], rows: Iterable[tuple], bom: bool = True) -> Iterator[bytes]:
+    """CSV blockweise erzeugen (UTF-8 mit BOM für Excel)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if bom:
+        buffer.write('\ufeff')
+    writer.writerow(headers)
+
+    for row in rows:
+        writer.writerow([text_value(v) for v in row])
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def write_xlsx(path: str, sheets: Iterable[Tuple[str, Sequence[str], Iterable[tuple]]]) -> None:
+    """
+    Tabellenblätter im constant_memory-Modus schreiben: xlsxwriter hält nur
+    die aktuelle Zeile im Speicher. Mehr als XLSX_MAX_ROWS Zeilen werden auf
+    Folgeblätter verteilt.
+    """
+    import xlsxwriter
+
+    workbook = xlsxwriter.Workbook(path, {
+        'constant_memory': True,
+        'default_date_format': 'dd.mm.yyyy',
+        'tmpdir': tempfile.gettempdir()
+    })
+    header_format = workbook.add_format({'bold': True, 'bg_color': '#667eea', 'font_color': 'white'})
+
+    for title, headers, rows in sheets:
+        part = 1
+        worksheet = workbook.add_worksheet(title[:31])
+        worksheet.write_row(0, 0, headers, header_format)
+        row_index = 1
+
+        for row in rows:
+            if row_index >= XLSX_MAX_ROWS:
+                part += 1
+                worksheet = workbook.add_worksheet(f'{title[:26]} ({part})')
+                worksheet.write_row(0, 0, headers, header_format)
+                row_index = 1
+            worksheet.write_row(row_index, 0, [_xlsx_value(v) for v in row])
+            row_index += 1
+
+    workbook.close()
+
+
+def xlsx_stream(sheets: Iterable[Tuple[str, Sequence[str], Iterable[tuple]]],
+                chunk_size: int = FLUSH_BYTES) -> Iterator[bytes]:
+    """
+    xlsx in eine temporäre Datei schreiben und blockweise ausliefern.
+    Das Zip-Format der Mappe wird erst beim Schließen fertig - die Datei
+    liegt deshalb auf der Platte, nie komplett im Speicher.
+    """
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        write_xlsx(path, sheets)
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    finally:
+        os.remove(path)
+
+
+def export_stream(name: str, owner_id: int, fmt: str = 'csv',
+                  start_date: Optional[date] = None,
+                  end_date: Optional[date] = None) -> Tuple[Iterator[bytes], str, str]:
+    """
+    Export eines Datasets als (Byte-Generator, Mimetype, Dateiendung).
+    KeyError bei unbekanntem Dataset.
+    """
+    dataset = DATASETS[name]
+    rows = iter_rows(dataset.query(owner_id, start_date, end_date))
+
+    if fmt == 'xlsx':
+        return xlsx_stream([(dataset.title, dataset.headers, rows)]), XLSX_MIMETYPE, 'xlsx'
+    return csv_stream(dataset.headers, rows), CSV_MIMETYPE, 'csv'
+
+
+# ============================================================================
+# KOMPLETT-EXPORT (Zip mit allen Tabellen eines Besitzers)
+# ============================================================================
+
+ZIP_MIMETYPE = 'application/zip'
+
+
+def _owned_devices(owner_id):
+    return select(Device.id).where(Device.owner_id == owner_id)
+
+
+# Dateiname -> (Model, Besitz-Bedingung); Reihenfolge = Reihenfolge im Zip
+OWNER_TABLES = {
+    'devices': (Device, lambda owner_id: Device.owner_id == owner_id),
+    'entries': (Entry, lambda owner_id: Entry.owner_id == owner_id),
+    'expenses': (Expense, lambda owner_id: Expense.user_id == owner_id),
+    'products': (Product, lambda owner_id: Product.user_id == owner_id),
+    'suppliers': (Supplier, lambda owner_id: Supplier.user_id == owner_id),
+    'refills': (Refill, lambda owner_id: Refill.user_id == owner_id),
+    'refill_items': (RefillItem, lambda owner_id: RefillItem.refill_id.in_(
+        select(Refill.id).where(Refill.user_id == owner_id))),
+    'inventory_movements': (InventoryMovement, lambda owner_id: InventoryMovement.user_id == owner_id),
+    'maintenance_logs': (MaintenanceLog, lambda owner_id: MaintenanceLog.device_id.in_(_owned_devices(owner_id))),
+    'maintenance_records': (MaintenanceRecord, lambda owner_id: MaintenanceRecord.device_id.in_(
+        _owned_devices(owner_id))),
+}
+
+
+def _json_value(value):
+    return None if value is None else text_value(value)
+
+
+def ndjson_stream(columns: Sequence[str], rows: Iterable[tuple]) -> Iterator[bytes]:
+    """Eine JSON-Zeile pro Datensatz, blockweise"""
+    buffer = io.StringIO()
+    for row in rows:
+        buffer.write(json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False))
+        buffer.write('\n')
+        if buffer.tell() >= FLUSH_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+class _ZipSink(io.RawIOBase):
+    """Nicht-suchbares Ziel für zipfile - geschriebene Bytes werden abgeholt statt gepuffert"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def zip_stream(members: Iterable[Tuple[str, Iterable[bytes]]]) -> Iterator[bytes]:
+    """
+    Zip während des Schreibens ausliefern. zipfile nutzt für nicht-suchbare
+    Ziele Data-Deskriptoren, Größen und CRC stehen hinter den Daten.
+    """
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, chunks in members:
+            with archive.open(name, 'w', force_zip64=True) as member:
+                for chunk in chunks:
+                    member.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            yield sink.drain()
+    yield sink.drain()
+
+
+def full_export_stream(owner_id: int, fmt: str = 'ndjson') -> Iterator[bytes]:
+    """
+    Alle Tabellen eines Besitzers als Zip (eine Datei pro Tabelle plus
+    manifest.json mit Zeilenzahlen am Ende).
+    """
+    extension = 'csv' if fmt == 'csv' else 'ndjson'
+    counts = {}
+
+    def counted(name, rows):
+        counts[name] = 0
+        for row in rows:
+            counts[name] += 1
+            yield row
+
+    def members():
+        for name, (model, owned) in OWNER_TABLES.items():
+            table = model.__table__
+            columns = [column.name for column in table.columns]
+            stmt = select(table).where(owned(owner_id)).order_by(table.c.id)
+            rows = counted(name, iter_rows(stmt))
+
+            if extension == 'csv':
+                yield f'{name}.csv', csv_stream(columns, rows)
+            else:
+                yield f'{name}.ndjson', ndjson_stream(columns, rows)
+
+        manifest = {
+            'owner_id': owner_id,
+            'created_at': datetime.now().isoformat(),
+            'format': extension,
+            'tables': counts
+        }
+        yield 'manifest.json', [json.dumps(manifest, indent=2).encode('utf-8')]
+
+    return zip_stream(members())
@@ -0,0 +1,151 @@
+# app/utils/supplier_stats.py
+"""
+Lieferanten-Kennzahlen für alle Lieferanten eines Besitzers
+Bestellanzahl, Einkaufssumme und letzte Bestellung in einer gruppierten
+Abfrage, Top-Produkte je Lieferant in einer zweiten (Fensterfunktion
+row_number() pro Lieferant statt einer Abfrage je Lieferant).
+"""
+
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import func, select
+from app import db
+from app.models import Supplier, Refill, RefillItem, Product
+from app.utils.cache import cached
+
+ZERO = Decimal('0.00')
+TOP_PRODUCTS = 3
+
+
+class TopProduct(NamedTuple):
+    """Meistgekauftes Produkt eines Lieferanten"""
+    product_id: int
+    name: str
+    total_quantity: Decimal
+    total_spent: Decimal
+
+
+class SupplierStats(NamedTuple):
+    """Kennzahlen eines Lieferanten"""
+    supplier_id: int
+    total_orders: int = 0
+    total_amount: Decimal = ZERO
+    last_order: Optional[date] = None
+    top_products: Tuple[TopProduct, ...] = ()
+
+    @property
+    def average_order(self) -> Decimal:
+        return self.total_amount / self.total_orders if self.total_orders else ZERO
+
+
+class SupplierSummary(dict):
+    """{supplier_id: SupplierStats} - Lieferanten ohne Bestellungen liefern Null-Werte"""
+
+    def __missing__(self, supplier_id):
+        return SupplierStats(supplier_id)
+
+
+@cached('supplier_stats')
+def supplier_stats(owner_id: int, supplier_ids: Optional[Iterable[int]] = None,
+                   top_n: int = TOP_PRODUCTS) -> SupplierSummary:
+    """Kennzahlen aller (oder ausgewählter) Lieferanten eines Besitzers"""
+    order_query = db.session.query(
+        Refill.supplier_id,
+        func.count(Refill.id),
+        func.coalesce(func.sum(Refill.total_amount), 0),
+        func.max(Refill.date)
+    ).filter(
+        Refill.user_id == owner_id,
+        Refill.supplier_id.isnot(None)
+    )
+    if supplier_ids is not None:
+        supplier_ids = list(supplier_ids)
+        if not supplier_ids:
+            return SupplierSummary()
+        order_query = order_query.filter(Refill.supplier_id.in_(supplier_ids))
+
+    top = _top_products(owner_id, supplier_ids, top_n) if top_n else {}
+
+    summary = SupplierSummary()
+    for supplier_id, orders, amount, last_order in order_query.group_by(Refill.supplier_id):
+        summary[supplier_id] = SupplierStats(
+            supplier_id=supplier_id,
+            total_orders=orders,
+            total_amount=Decimal(amount),
+            last_order=last_order,
+            top_products=tuple(top.get(supplier_id, ()))
+        )
+    return summary
+
+
+def _top_products(owner_id: int, supplier_ids: Optional[List[int]], top_n: int):
+    """{supplier_id: [TopProduct, ...]} nach Einkaufssumme, je Lieferant die ersten top_n"""
+    spent = func.sum(RefillItem.total_price)
+    ranked = select(
+        Refill.supplier_id,
+        RefillItem.product_id,
+        func.sum(RefillItem.quantity).label('total_quantity'),
+        spent.label('total_spent'),
+        func.row_number().over(
+            partition_by=Refill.supplier_id,
+            order_by=(spent.desc(), RefillItem.product_id)
+        ).label('rank')
+    ).join(
+        Refill, RefillItem.refill_id == Refill.id
+    ).where(
+        Refill.user_id == owner_id,
+        Refill.supplier_id.isnot(None)
+    ).group_by(Refill.supplier_id, RefillItem.product_id)
+    if supplier_ids is not None:
+        ranked = ranked.where(Refill.supplier_id.in_(supplier_ids))
+    ranked = ranked.subquery()
+
+    rows = db.session.execute(
+        select(
+            ranked.c.supplier_id, ranked.c.product_id, Product.name,
+            ranked.c.total_quantity, ranked.c.total_spent
+        ).join(
+            Product, Product.id == ranked.c.product_id
+        ).where(
+            ranked.c.rank <= top_n
+        ).order_by(ranked.c.supplier_id, ranked.c.rank)
+    )
+
+    top = {}
+    for supplier_id, product_id, name, quantity, total in rows:
+        top.setdefault(supplier_id, []).append(
+            TopProduct(product_id, name, Decimal(quantity or 0), Decimal(total or 0))
+        )
+    return top
+
+
+@cached('supplier_overview')
+def supplier_overview(owner_id: int) -> Tuple[int, int, Decimal]:
+    """(Anzahl Lieferanten, Bestellungen, Bestellsumme) über alle Lieferanten"""
+    supplier_count = select(func.count(Supplier.id)).where(
+        Supplier.user_id == owner_id
+    ).scalar_subquery()
+
+    count, orders, amount = db.session.query(
+        supplier_count,
+        func.count(Refill.id),
+        func.coalesce(func.sum(Refill.total_amount), 0)
+    ).select_from(Refill).filter(
+        Refill.user_id == owner_id,
+        Refill.supplier_id.isnot(None)
+    ).one()
+    return count, orders, Decimal(amount)
+
+
+def order_history(owner_id: int, supplier_id: int):
+    """Bestellungen eines Lieferanten mit Positionsanzahl: [(Refill, anzahl), ...]"""
+    return db.session.query(
+        Refill,
+        func.count(RefillItem.id)
+    ).outerjoin(
+        RefillItem, RefillItem.refill_id == Refill.id
+    ).filter(
+        Refill.supplier_id == supplier_id,
+        Refill.user_id == owner_id
+    ).group_by(Refill.id).order_by(Refill.date.desc(), Refill.id.desc()).all()
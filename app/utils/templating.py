@@ -0,0 +1,58 @@
+# app/utils/templating.py
+"""
+Kompilierte Template-Strings einmal pro Prozess
+render_template_string kompiliert die Quelle bei jedem Aufruf neu (Lexer,
+Parser, Codegenerierung). Die großen Layout-Strings der Blueprints ändern
+sich nie - sie werden hier je App einmal kompiliert und wiederverwendet.
+Seiteninhalte kommen als Kontext-Variablen ({{ content|safe }}) hinein und
+werden nicht kompiliert.
+"""
+
+from collections import OrderedDict
+import threading
+
+from flask import current_app, before_render_template, template_rendered
+
+# Obergrenze, falls doch einmal dynamische Quellen hier landen
+MAX_TEMPLATES = 128
+
+_lock = threading.Lock()
+
+
+def _cache(app):
+    return app.extensions.setdefault('template_cache', OrderedDict())
+
+
+def get_template(source: str):
+    """Kompiliertes Jinja-Template für eine Quelle (begrenzter Cache je App)"""
+    app = current_app._get_current_object()
+    cache = _cache(app)
+
+    template = cache.get(source)
+    if template is not None:
+        return template
+
+    template = app.jinja_env.from_string(source)
+    with _lock:
+        cache[source] = template
+        if len(cache) > MAX_TEMPLATES:
+            cache.popitem(last=False)
+    return template
+
+
+def render_cached_template(source: str, **context) -> str:
+    """Wie render_template_string, aber ohne Neukompilierung bekannter Quellen"""
+    app = current_app._get_current_object()
+    template = get_template(source)
+
+    app.update_template_context(context)
+    before_render_template.send(app, _async_wrapper=app.ensure_sync, template=template, context=context)
+    rendered = template.render(context)
+    template_rendered.send(app, _async_wrapper=app.ensure_sync, template=template, context=context)
+    return rendered
+
+
+def clear_template_cache():
+    """Cache leeren (z.B. nach Template-Änderungen im Debug-Modus)"""
+    with _lock:
+        _cache(current_app._get_current_object()).clear()
@@ -0,0 +1,78 @@
+# app/utils/user_cache.py
+"""
+Zwischengespeicherter User für Flask-Login
+Statt bei jeder authentifizierten Anfrage den User zu laden, werden seine
+Spaltenwerte (ohne Passwort-Hash, 2FA-Geheimnis und API-Key) kurz im
+Cache gehalten und per merge(load=False) ohne Datenbankzugriff an die
+Session gehängt. Änderungen am User löschen den Eintrag nach dem Commit;
+Bulk-Updates rufen invalidate() selbst auf.
+
+Das Löschen muss alle Worker erreichen, sonst bliebe ein gesperrter oder
+deaktivierter User (bzw. nach einem Passwortwechsel) auf den anderen
+Workern angemeldet. Ohne gemeinsamen Cache (Redis oder nur ein
+Worker-Prozess) wird der User deshalb immer aus der Datenbank geladen.
+"""
+
+from typing import Iterable, Optional
+
+from flask import current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import make_transient_to_detached, object_session
+
+from app import db
+from app.models import User
+from app.utils import cache
+
+# Standard-Lebensdauer (Sekunden) - Obergrenze, falls ein Löschen fehlschlägt
+# (z.B. Redis kurz nicht erreichbar)
+DEFAULT_TTL = 60
+KEY_PREFIX = 'am:user:'
+
+# Geheimnisse bleiben in der Datenbank und werden bei Bedarf nachgeladen
+SECRET_FIELDS = ('password_hash', 'two_factor_secret', 'backup_codes', 'api_key')
+
+
+def _key(user_id) -> str:
+    return f'{KEY_PREFIX}{user_id}'
+
+
+def _snapshot(user: User) -> dict:
+    return {
+        attr.key: getattr(user, attr.key)
+        for attr in inspect(User).column_attrs
+        if attr.key not in SECRET_FIELDS
+    }
+
+
+def load_user(user_id) -> Optional[User]:
+    """User für current_user - aus dem Cache oder der Datenbank"""
+    user_id = int(user_id)
+    shared = cache.shared_between_workers()
+    data = cache.load_value(_key(user_id)) if shared else None
+
+    if data is None:
+        user = db.session.get(User, user_id)
+        if user is not None and shared:
+            cache.store_value(_key(user_id), _snapshot(user),
+                              current_app.config.get('USER_CACHE_TTL', DEFAULT_TTL))
+    else:
+        # Wie frisch geladen: ohne Änderungshistorie, fehlende Felder abgelaufen
+        user = User(**data)
+        make_transient_to_detached(user)
+        user = db.session.merge(user, load=False)
+
+    if user is None or not user.is_active:
+        return None
+    return user
+
+
+def invalidate(user_ids: Iterable[int]):
+    """Cache-Einträge sofort löschen (nach Bulk-Updates, die keine Events auslösen)"""
+    for user_id in user_ids:
+        cache.delete_value(_key(user_id))
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _user_changed(mapper, connection, target):
+    cache.delete_after_commit(object_session(target), _key(target.id))
@@ -0,0 +1,251 @@
+# app/utils/week_grid.py
+"""
+Wochenerfassung: eine Einnahme je Gerät und Tag (source='week')
+Gespeichert wird nur die Differenz zum Ist-Stand - geänderte und neue Zellen
+per Bulk-Upsert auf (device_id, date, source), geleerte Zellen per Bulk-Delete.
+Weil beides an den Mapper-Events vorbeigeht, bucht save_week die
+Tagesumsätze und Tombstones selbst.
+Für große Flotten wird das Raster nach Standort gruppiert: Gruppensummen
+kommen per bedingter Aggregation aus SQL, die Gerätezeilen einer Gruppe
+seitenweise (Keyset) über JSON.
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal, InvalidOperation
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from sqlalchemy import select, delete, func, and_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from app import db
+from app.models import Device, DeviceStatus, Entry, DailyRevenue, SyncTombstone
+from app.utils.pagination import keyset_paginate, KeysetPage
+
+WEEK_DESCRIPTION = 'Wochenerfassung'
+NO_LOCATION = 'Kein Standort'
+# Gerätezeilen pro nachgeladenem Block
+GROUP_PAGE_SIZE = 50
+
+# {device_id: {date: Decimal}}
+Cells = Dict[int, Dict[date, Decimal]]
+
+
+class WeekGroup(NamedTuple):
+    """Standort-Gruppe des Wochenrasters mit Summen aus SQL"""
+    key: str
+    devices: int
+    total: Decimal
+    days: Tuple[Decimal, ...]
+
+    @property
+    def label(self) -> str:
+        return self.key or NO_LOCATION
+
+    def to_dict(self):
+        return {
+            'key': self.key,
+            'label': self.label,
+            'devices': self.devices,
+            'total': float(self.total),
+            'days': [float(d) for d in self.days]
+        }
+
+
+class SaveResult(NamedTuple):
+    """Ergebnis einer Wochenspeicherung"""
+    upserted: int
+    deleted: int
+    unchanged: int
+    skipped_devices: int
+
+
+def week_cells(owner_id: int, week_start: date, for_update: bool = False) -> Dict[tuple, tuple]:
+    """{(device_id, date): (entry_id, amount)} der Wochenzellen eines Besitzers"""
+    stmt = select(Entry.id, Entry.device_id, Entry.date, Entry.amount).where(
+        Entry.owner_id == owner_id,
+        Entry.source == Entry.SOURCE_WEEK,
+        Entry.date >= week_start,
+        Entry.date <= week_start + timedelta(days=6)
+    )
+    if for_update:
+        stmt = stmt.with_for_update()
+    return {(row.device_id, row.date): (row.id, row.amount) for row in db.session.execute(stmt)}
+
+
+def _location():
+    return func.coalesce(Device.location, '')
+
+
+def _week_cell_join(week_start: date):
+    return and_(
+        Entry.device_id == Device.id,
+        Entry.source == Entry.SOURCE_WEEK,
+        Entry.date >= week_start,
+        Entry.date <= week_start + timedelta(days=6)
+    )
+
+
+def _active_devices(owner_id: int):
+    return db.session.query(Device.id).filter(
+        Device.owner_id == owner_id,
+        Device.status == DeviceStatus.ACTIVE
+    )
+
+
+def location_groups(owner_id: int, week_start: date) -> List[WeekGroup]:
+    """Aktive Geräte je Standort mit Wochen- und Tagessummen (eine Abfrage)"""
+    days = [week_start + timedelta(days=i) for i in range(7)]
+    location = _location()
+
+    rows = _active_devices(owner_id).with_entities(
+        location.label('location'),
+        func.count(func.distinct(Device.id)),
+        func.coalesce(func.sum(Entry.amount), 0),
+        *[func.coalesce(func.sum(Entry.amount).filter(Entry.date == day), 0) for day in days]
+    ).outerjoin(Entry, _week_cell_join(week_start)).group_by(location).order_by(location).all()
+
+    return [
+        WeekGroup(key, devices, Decimal(total), tuple(Decimal(d) for d in day_totals))
+        for key, devices, total, *day_totals in rows
+    ]
+
+
+def best_device(owner_id: int, week_start: date) -> Optional[Tuple[str, Decimal]]:
+    """(Name, Summe) des umsatzstärksten Geräts der Woche"""
+    return _active_devices(owner_id).with_entities(
+        Device.name, func.sum(Entry.amount).label('total')
+    ).join(Entry, _week_cell_join(week_start)).group_by(
+        Device.id, Device.name
+    ).order_by(func.sum(Entry.amount).desc()).first()
+
+
+def group_rows(owner_id: int, week_start: date, location: str, after: Optional[str] = None,
+               per_page: int = GROUP_PAGE_SIZE) -> Tuple[KeysetPage, Dict[tuple, Decimal]]:
+    """
+    Eine Seite Gerätezeilen eines Standorts plus deren Zellen
+    ({(device_id, date): betrag}). Wirft InvalidCursor bei kaputtem Cursor.
+    """
+    query = Device.query.filter(
+        Device.owner_id == owner_id,
+        Device.status == DeviceStatus.ACTIVE,
+        _location() == location
+    )
+    page = keyset_paginate(query, [Device.name.asc(), Device.id.asc()], per_page=per_page, after=after)
+
+    cells = {}
+    if page.items:
+        stmt = select(Entry.device_id, Entry.date, Entry.amount).where(
+            Entry.device_id.in_([device.id for device in page.items]),
+            Entry.source == Entry.SOURCE_WEEK,
+            Entry.date >= week_start,
+            Entry.date <= week_start + timedelta(days=6)
+        )
+        cells = {(row.device_id, row.date): row.amount for row in db.session.execute(stmt)}
+    return page, cells
+
+
+def parse_cells(data: dict, week_start: date) -> Cells:
+    """
+    JSON {device_id: {'YYYY-MM-DD': betrag}} in Zellen umwandeln.
+    Tage außerhalb der Woche werden ignoriert, leere Werte zählen als 0.
+    ValueError bei ungültigen Beträgen oder Daten.
+    """
+    week_end = week_start + timedelta(days=6)
+    cells = {}
+    for device_id, days in data.items():
+        row = cells.setdefault(int(device_id), {})
+        for day_str, amount in days.items():
+            day = datetime.strptime(day_str, '%Y-%m-%d').date()
+            if not week_start <= day <= week_end:
+                continue
+            try:
+                value = Decimal(str(amount)) if amount not in (None, '') else Decimal('0')
+            except InvalidOperation:
+                raise ValueError(f"Ungültiger Betrag: {amount}")
+            if value < 0:
+                raise ValueError("Betrag darf nicht negativ sein")
+            row[day] = value.quantize(Decimal('0.01'))
+    return cells
+
+
+def save_week(owner_id: int, user_id: int, week_start: date, cells: Cells) -> SaveResult:
+    """
+    Übermittelte Zellen gegen den Ist-Stand abgleichen und nur die
+    Unterschiede schreiben. Nicht übermittelte Zellen bleiben unverändert.
+    Der Aufrufer committet.
+    """
+    # Besitz aller Geräte mit einer Abfrage prüfen
+    owned = set(db.session.execute(
+        select(Device.id).where(Device.id.in_(list(cells)), Device.owner_id == owner_id)
+    ).scalars()) if cells else set()
+
+    # Parallele Speicherungen derselben Woche serialisieren: FOR UPDATE sperrt nur
+    # vorhandene Zeilen - zwei erste Speicherungen einer leeren Zelle würden sonst
+    # beide "neu" sehen und den Tagesumsatz doppelt buchen. Die Sperre endet mit
+    # der Transaktion.
+    db.session.execute(select(func.pg_advisory_xact_lock(owner_id, week_start.toordinal())))
+    current = week_cells(owner_id, week_start, for_update=True)
+
+    upserts, deletes, revenue = [], [], []
+    unchanged = 0
+    now = datetime.utcnow()
+
+    for device_id, days in cells.items():
+        if device_id not in owned:
+            continue
+        for day, amount in days.items():
+            entry_id, old_amount = current.get((device_id, day), (None, None))
+
+            if amount > 0:
+                if old_amount == amount:
+                    unchanged += 1
+                    continue
+                upserts.append({
+                    'device_id': device_id,
+                    'owner_id': owner_id,
+                    'date': day,
+                    'source': Entry.SOURCE_WEEK,
+                    'amount': amount,
+                    'user_id': user_id,
+                    'description': WEEK_DESCRIPTION,
+                    'updated_at': now
+                })
+                revenue.append({
+                    'owner_id': owner_id, 'device_id': device_id, 'day': day,
+                    'total': amount - (old_amount or 0),
+                    'entry_count': 0 if entry_id else 1
+                })
+            elif entry_id:
+                deletes.append(entry_id)
+                revenue.append({
+                    'owner_id': owner_id, 'device_id': device_id, 'day': day,
+                    'total': -old_amount, 'entry_count': -1
+                })
+            else:
+                unchanged += 1
+
+    connection = db.session.connection()
+
+    if upserts:
+        table = Entry.__table__
+        stmt = pg_insert(table).values(upserts)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.device_id, table.c.date, table.c.source],
+            set_={
+                'amount': stmt.excluded.amount,
+                'user_id': stmt.excluded.user_id,
+                'updated_at': stmt.excluded.updated_at
+            }
+        )
+        connection.execute(stmt)
+
+    if deletes:
+        connection.execute(delete(Entry.__table__).where(Entry.__table__.c.id.in_(deletes)))
+        SyncTombstone.record(connection, owner_id, 'entries', deletes)
+
+    DailyRevenue.apply_many(connection, revenue)
+
+    return SaveResult(
+        upserted=len(upserts),
+        deleted=len(deletes),
+        unchanged=unchanged,
+        skipped_devices=len(set(cells) - owned)
+    )
@@ -10,6 +10,7 @@ from decimal import Decimal
 from app import db
 from app.models import User, Device, Entry, Expense, DeviceType, DeviceStatus, ExpenseCategory
 from app.web.navigation import render_with_base_new as render_with_base
+from app.utils.templating import render_cached_template
 
 # Blueprint erstellen
 main_bp = Blueprint('main', __name__)
@@ -40,7 +41,7 @@ def login():
                 if user.two_factor_enabled:
                     if not totp_code:
                         # Zeige 2FA Eingabefeld
-                        return render_template_string(get_2fa_template(), 
+                        return render_cached_template(get_2fa_template(), 
                                                username=username, 
                                                password=password,
                                                title='2FA Verifizierung')
@@ -48,23 +49,23 @@ def login():
                     # Verifiziere 2FA Code
                     if not user.verify_2fa_token(totp_code):
                         flash('Ungültiger 2FA Code!', 'danger')
-                        return render_template_string(get_2fa_template(), 
+                        return render_cached_template(get_2fa_template(), 
                                                      username=username, 
                                                      password=password,
                                                      title='2FA Verifizierung')
                 
                 # Login erfolgreich
                 login_user(user, remember=True)
-                user.record_login()
+                user.record_login(request.remote_addr, request.headers.get('User-Agent'))
                 next_page = request.args.get('next')
                 return redirect(next_page or url_for('dashboard_modern.dashboard'))
         else:
             flash('Ungültige Anmeldedaten!', 'danger')
             if user:
-                user.record_failed_login()
+                user.record_failed_login(request.remote_addr, request.headers.get('User-Agent'))
 
     # Standard Login Template
-    return render_template_string(get_login_template(), title='Login - Automaten Manager')
+    return render_cached_template(get_login_template(), title='Login - Automaten Manager')
 
 
 def get_login_template():
@@ -1,6 +1,10 @@
 from flask import Blueprint, render_template_string, jsonify, request, redirect, url_for
 from flask_login import login_required, current_user
-from app.models import Device, Entry, Expense, Refill, RefillItem, Product, DeviceStatus
+from app import db
+from app.models import Device, Entry, Expense, Refill, RefillItem, Product, DeviceStatus, StockBalance
+from app.utils.period_stats import PeriodStats
+from app.utils.templating import render_cached_template
+from app.utils.pagination import paginate_request, pager_html
 from sqlalchemy import func, extract, and_
 from datetime import datetime, timedelta, date
 from decimal import Decimal
@@ -98,12 +102,9 @@ def get_navigation_config(active_module='dashboard', active_submodule=None):
     
     return configs.get(active_module, configs['dashboard'])
 
-def render_modern_template(content, title="Dashboard", active_module='dashboard', active_submodule=None, breadcrumb=None):
-    """Render template with modern design and contextual navigation"""
-    
-    navigation = get_navigation_config(active_module, active_submodule)
-    
-    template = '''
+# Layout wird einmal pro Prozess kompiliert (app.utils.templating),
+# Seiteninhalt/CSS/Scripts kommen als Variablen hinein
+MODERN_LAYOUT = '''
 <!DOCTYPE html>
 <html lang="de">
 <head>
@@ -527,6 +528,7 @@ def render_modern_template(content, title="Dashboard", active_module='dashboard'
             }
         }
     </style>
+    {{ extra_css|safe }}
 </head>
 <body>
     <!-- Sidebar with Dynamic Navigation -->
@@ -575,15 +577,25 @@ def render_modern_template(content, title="Dashboard", active_module='dashboard'
     </div>
 
     <script src="https://cdn.jsdelivr.net/npm/bootstrap@5.1.3/dist/js/bootstrap.bundle.min.js"></script>
+    {{ extra_scripts|safe }}
 </body>
 </html>
-    '''
+'''
+
+
+def render_modern_template(content, title="Dashboard", active_module='dashboard', active_submodule=None,
+                           breadcrumb=None, extra_css='', extra_scripts=''):
+    """Render template with modern design and contextual navigation"""
+    
+    navigation = get_navigation_config(active_module, active_submodule)
     
-    return render_template_string(template, 
-                                  content=content, 
-                                  title=title, 
+    return render_cached_template(MODERN_LAYOUT,
+                                  content=content,
+                                  title=title,
                                   navigation=navigation,
                                   breadcrumb=breadcrumb,
+                                  extra_css=extra_css,
+                                  extra_scripts=extra_scripts,
                                   url_for=url_for)
 
 @dashboard_modern_bp.route('/dashboard')
@@ -592,34 +604,20 @@ def dashboard():
     """Main Dashboard View"""
     
     # Get statistics
-    current_year = datetime.now().year
-    current_month = datetime.now().month
+    periods = PeriodStats.standard(current_user.id, 'month', 'year')
     
     # Year statistics
-    year_income = Entry.query.filter(
-        extract('year', Entry.date) == current_year
-    ).with_entities(func.sum(Entry.amount)).scalar() or 0
-    
-    year_expenses = Expense.query.filter(
-        extract('year', Expense.date) == current_year
-    ).with_entities(func.sum(Expense.amount)).scalar() or 0
-    
-    year_profit = year_income - year_expenses
+    year_income = periods['year']['income']
+    year_expenses = periods['year']['expenses']
+    year_profit = periods['year']['profit']
     
     # Active devices
     active_devices = Device.query.filter_by(status=DeviceStatus.ACTIVE).count()
     total_devices = Device.query.count()
     
     # Month statistics for module cards
-    month_income = Entry.query.filter(
-        extract('year', Entry.date) == current_year,
-        extract('month', Entry.date) == current_month
-    ).with_entities(func.sum(Entry.amount)).scalar() or 0
-    
-    month_expenses = Expense.query.filter(
-        extract('year', Expense.date) == current_year,
-        extract('month', Expense.date) == current_month
-    ).with_entities(func.sum(Expense.amount)).scalar() or 0
+    month_income = periods['month']['income']
+    month_expenses = periods['month']['expenses']
     
     # Product count
     product_count = Product.query.count()
@@ -707,10 +705,19 @@ def dashboard():
 def devices():
     """Devices Overview"""
     
-    devices = Device.query.all()
-    active_count = sum(1 for d in devices if d.status == DeviceStatus.ACTIVE)
-    maintenance_count = sum(1 for d in devices if d.status == DeviceStatus.MAINTENANCE)
-    inactive_count = sum(1 for d in devices if d.status == DeviceStatus.INACTIVE)
+    page = paginate_request(
+        Device.query.filter_by(owner_id=current_user.id),
+        order_by=[Device.name.asc(), Device.id.asc()]
+    )
+    devices = page.items
+    
+    # Status-Zähler über alle Geräte des Benutzers
+    status_counts = dict(db.session.query(
+        Device.status, func.count(Device.id)
+    ).filter(Device.owner_id == current_user.id).group_by(Device.status).all())
+    active_count = status_counts.get(DeviceStatus.ACTIVE, 0)
+    maintenance_count = status_counts.get(DeviceStatus.MAINTENANCE, 0)
+    inactive_count = status_counts.get(DeviceStatus.INACTIVE, 0)
     
     breadcrumb = [
         {'text': 'Dashboard', 'url': url_for('dashboard_modern.dashboard')},
@@ -789,6 +796,7 @@ def devices():
         </tbody>
     </table>
     '''
+    content += pager_html(page, 'Geräte')
     
     return render_modern_template(content, title="Geräte", active_module='devices', breadcrumb=breadcrumb)
 
@@ -797,15 +805,21 @@ def devices():
 def inventory():
     """Inventory Overview"""
     
-    products = Product.query.all()
+    # Produkte unter Mindestbestand direkt in SQL filtern (Bestand aus stock_balances)
+    stock = db.session.query(
+        StockBalance.product_id,
+        func.sum(StockBalance.quantity).label('quantity')
+    ).group_by(StockBalance.product_id).subquery()
+    current = func.coalesce(stock.c.quantity, 0)
     
-    # Count low stock - using safe attribute access
-    low_stock = 0
-    for p in products:
-        current = getattr(p, 'current_stock', None) or getattr(p, 'quantity', 0)
-        minimum = getattr(p, 'min_stock', None) or getattr(p, 'minimum_stock', 0)
-        if current <= minimum:
-            low_stock += 1
+    low_stock_query = db.session.query(Product, current.label('current_stock')).outerjoin(
+        stock, stock.c.product_id == Product.id
+    ).filter(
+        Product.user_id == current_user.id,
+        current <= func.coalesce(Product.min_stock, 0)
+    )
+    page = paginate_request(low_stock_query, order_by=[Product.name.asc(), Product.id.asc()], count='exact')
+    low_stock = page.total
     
     breadcrumb = [
         {'text': 'Dashboard', 'url': url_for('dashboard_modern.dashboard')},
@@ -861,30 +875,28 @@ def inventory():
         <tbody>
     '''
     
-    for product in products:
-        # Safe attribute access with fallbacks
-        current_stock = getattr(product, 'current_stock', None) or getattr(product, 'quantity', 0)
-        min_stock = getattr(product, 'min_stock', None) or getattr(product, 'minimum_stock', 0)
-        unit = getattr(product, 'unit', 'Stück')
+    for product, current_stock in page.items:
+        min_stock = product.min_stock or 0
+        unit = product.unit.value if product.unit else 'Stück'
         
-        if current_stock <= min_stock:
-            status = 'danger' if current_stock == 0 else 'warning'
-            content += f'''
-                <tr>
-                    <td>{product.name}</td>
-                    <td>{current_stock} {unit}</td>
-                    <td>{min_stock} {unit}</td>
-                    <td><span class="badge bg-{status}">{'Leer' if current_stock == 0 else 'Niedrig'}</span></td>
-                    <td>
-                        <button class="btn btn-sm btn-outline-primary" onclick="alert('Nachbestellen - In Entwicklung'); return false;">Nachbestellen</button>
-                    </td>
-                </tr>
-            '''
+        status = 'danger' if current_stock <= 0 else 'warning'
+        content += f'''
+            <tr>
+                <td>{product.name}</td>
+                <td>{current_stock} {unit}</td>
+                <td>{min_stock} {unit}</td>
+                <td><span class="badge bg-{status}">{'Leer' if current_stock <= 0 else 'Niedrig'}</span></td>
+                <td>
+                    <button class="btn btn-sm btn-outline-primary" onclick="alert('Nachbestellen - In Entwicklung'); return false;">Nachbestellen</button>
+                </td>
+            </tr>
+        '''
     
     content += '''
         </tbody>
     </table>
     '''
+    content += pager_html(page, 'Produkte')
     
     return render_modern_template(content, title="Warenwirtschaft", active_module='inventory', breadcrumb=breadcrumb)
 
@@ -10,6 +10,7 @@ from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app import db
 from app.models import User, Device, Entry, DeviceStatus
+from app.utils.fleet_summary import FleetSummary
 from sqlalchemy import func
 import json
 import qrcode
@@ -496,6 +497,7 @@ def locations():
     """Standortverwaltung"""
     
     devices = Device.query.filter_by(owner_id=current_user.id).all()
+    summary = FleetSummary.for_owner(current_user.id, window_days=30)
     
     # Standorte gruppieren
     locations = {}
@@ -520,14 +522,8 @@ def locations():
     """
     
     for location, location_devices in locations.items():
-        total_income = 0
-        for device in location_devices:
-            # Einnahmen der letzten 30 Tage
-            income = Entry.query.filter(
-                Entry.device_id == device.id,
-                Entry.date >= date.today() - timedelta(days=30)
-            ).with_entities(func.sum(Entry.amount)).scalar() or 0
-            total_income += float(income) if income else 0  # Konvertiere zu float
+        # Einnahmen der letzten 30 Tage
+        total_income = sum(float(summary[device.id].window_revenue) for device in location_devices)
         
         active_count = sum(1 for d in location_devices if d.status == DeviceStatus.ACTIVE)
         
@@ -675,18 +671,17 @@ def utilization():
     
     devices = Device.query.filter_by(owner_id=current_user.id).all()
     
+    # Daten der letzten 30 Tage für alle Geräte
+    summary = FleetSummary.for_owner(current_user.id, window_days=30)
+    
     # Auslastungsdaten berechnen
     utilization_data = []
     for device in devices:
-        # Daten der letzten 30 Tage
-        entries_30d = Entry.query.filter(
-            Entry.device_id == device.id,
-            Entry.date >= date.today() - timedelta(days=30)
-        ).all()
+        stats = summary[device.id]
         
         # Tägliche Durchschnitte
-        daily_avg = len(entries_30d) / 30 if entries_30d else 0
-        total_revenue = float(sum(e.amount for e in entries_30d))  # Konvertiere zu float
+        daily_avg = stats.window_entry_count / 30
+        total_revenue = float(stats.window_revenue)  # Konvertiere zu float
         daily_revenue = total_revenue / 30
         
         # Auslastung schätzen (basierend auf Einträgen pro Tag)
@@ -698,7 +693,7 @@ def utilization():
             'daily_revenue': daily_revenue,
             'total_revenue': total_revenue,
             'utilization': utilization_percent,
-            'entries_count': len(entries_30d)
+            'entries_count': stats.window_entry_count
         })
     
     # Nach Auslastung sortieren
@@ -9,6 +9,9 @@ from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app import db
 from app.models import Device, DeviceType, DeviceStatus, Product, Entry, Expense
+from app.utils.fleet_summary import FleetSummary
+from app.utils.pagination import paginate_request, pager_html
+from sqlalchemy import func
 import json
 import secrets
 import string
@@ -71,18 +74,28 @@ def generate_device_name(device_type, location=None):
 @login_required
 def index():
     """Geräte-Übersicht mit erweiterten Features"""
-    devices = Device.query.filter_by(owner_id=current_user.id).all()
+    page = paginate_request(
+        Device.query.filter_by(owner_id=current_user.id),
+        order_by=[Device.name.asc(), Device.id.asc()],
+        per_page=24
+    )
+    devices = page.items
+
+    # Kennzahlen über alle Geräte, nicht nur die aktuelle Seite
+    totals = db.session.query(
+        func.count(Device.id),
+        func.count(Device.id).filter(Device.status == DeviceStatus.ACTIVE),
+        func.count(Device.id).filter(Device.connection_type == 'online')
+    ).filter(Device.owner_id == current_user.id).one()
+
+    # Umsätze (gesamt und letzte 30 Tage) für alle Geräte auf einmal
+    summary = FleetSummary.for_owner(current_user.id, window_days=30)
 
     # Statistiken für jedes Gerät berechnen
     device_stats = {}
     for device in devices:
         # Einnahmen letzte 30 Tage
-        month_ago = date.today() - timedelta(days=30)
-        entries = Entry.query.filter(
-            Entry.device_id == device.id,
-            Entry.date >= month_ago
-        ).all()
-        month_revenue = sum(e.amount for e in entries)
+        month_revenue = summary[device.id].window_revenue
 
         # Inventar-Status
         inventory_data = {}
@@ -104,7 +117,7 @@ def index():
             'month_revenue': month_revenue,
             'inventory': inventory_data,
             'change_money': change_money,
-            'total_revenue': device.get_total_revenue() if hasattr(device, 'get_total_revenue') else 0
+            'total_revenue': summary[device.id].revenue
         }
 
         # JavaScript für erweiterte Funktionen
@@ -448,7 +461,7 @@ def index():
         <div class="col-md-3">
             <div class="card">
                 <div class="card-body text-center">
-                    <h4>{len(devices)}</h4>
+                    <h4>{totals[0]}</h4>
                     <small class="text-muted">Geräte gesamt</small>
                 </div>
             </div>
@@ -456,7 +469,7 @@ def index():
         <div class="col-md-3">
             <div class="card">
                 <div class="card-body text-center">
-                    <h4>{len([d for d in devices if d.status == DeviceStatus.ACTIVE])}</h4>
+                    <h4>{totals[1]}</h4>
                     <small class="text-muted">Aktiv</small>
                 </div>
             </div>
@@ -464,7 +477,7 @@ def index():
         <div class="col-md-3">
             <div class="card">
                 <div class="card-body text-center">
-                    <h4>{sum(device_stats[d.id]['month_revenue'] for d in devices):.2f} €</h4>
+                    <h4>{sum(s.window_revenue for s in summary.values()):.2f} €</h4>
                     <small class="text-muted">Einnahmen (30 Tage)</small>
                 </div>
             </div>
@@ -472,7 +485,7 @@ def index():
         <div class="col-md-3">
             <div class="card">
                 <div class="card-body text-center">
-                    <h4>{len([d for d in devices if hasattr(d, 'connection_type') and d.connection_type == 'online'])}</h4>
+                    <h4>{totals[2]}</h4>
                     <small class="text-muted">Online</small>
                 </div>
             </div>
@@ -579,9 +592,12 @@ def index():
         </div>
         """
 
-    content += """
+    content += f"""
     </div>
+    {pager_html(page, 'Geräte')}
+    """
 
+    content += """
     <!-- Device Modal (Hinzufügen/Bearbeiten) -->
     <div class="modal fade" id="deviceModal" tabindex="-1">
         <div class="modal-dialog modal-lg">
@@ -4,12 +4,16 @@ Erweiterte Einnahmen-Erfassung mit Wochenansicht
 Mit zentraler Navigation
 """
 
-from flask import Blueprint, render_template_string, redirect, url_for, flash, request, jsonify
+from flask import Blueprint, render_template_string, redirect, url_for, flash, request, jsonify, abort
+from markupsafe import escape
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app import db
 from app.models import Device, Entry, DeviceStatus
+from app.utils.pagination import InvalidCursor, MAX_PER_PAGE
+from app.utils.week_grid import (week_cells, parse_cells, save_week as save_week_cells,
+                                 location_groups, best_device, group_rows, GROUP_PAGE_SIZE)
 import json
 
 # Import erfolgt in den Funktionen, um zirkuläre Imports zu vermeiden
@@ -25,33 +29,39 @@ def get_week_dates(week_offset=0):
     return week_start, week_end
 
 
+def _week_start_arg():
+    """week_start=YYYY-MM-DD aus der URL (Montag der Woche), sonst 400"""
+    try:
+        day = datetime.strptime(request.args.get('week_start', ''), '%Y-%m-%d').date()
+    except ValueError:
+        abort(400, 'week_start fehlt oder ist ungültig')
+    return day - timedelta(days=day.weekday())
+
+
+def _week_summary(owner_id, week_start):
+    """Standort-Gruppen und Kennzahlen der Woche (Summen aus SQL)"""
+    groups = location_groups(owner_id, week_start)
+    total = sum((g.total for g in groups), Decimal('0'))
+    best = best_device(owner_id, week_start)
+    return {
+        'groups': [g.to_dict() for g in groups],
+        'total': float(total),
+        'daily_avg': float(total / 7),
+        'devices': sum(g.devices for g in groups),
+        'days': [float(sum((g.days[i] for g in groups), Decimal('0'))) for i in range(7)],
+        'best_device': best.name if best else None
+    }
+
+
 @entries_bp.route('/')
 @login_required
 def index():
-    """Wochenansicht der Einnahmen"""
+    """Wochenansicht der Einnahmen - Standort-Gruppen, Zeilen werden nachgeladen"""
     # Aktuelle Woche
     week_offset = int(request.args.get('week', 0))
     week_start, week_end = get_week_dates(week_offset)
 
-    # Geräte des Users
-    devices = Device.query.filter_by(
-        owner_id=current_user.id,
-        status=DeviceStatus.ACTIVE
-    ).order_by(Device.name).all()
-
-    # Einnahmen der Woche laden
-    entries = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        Entry.date >= week_start,
-        Entry.date <= week_end
-    ).all()
-
-    # Einnahmen in Dictionary organisieren {device_id: {date: amount}}
-    entries_dict = {}
-    for entry in entries:
-        if entry.device_id not in entries_dict:
-            entries_dict[entry.device_id] = {}
-        entries_dict[entry.device_id][entry.date.isoformat()] = float(entry.amount)
+    summary = _week_summary(current_user.id, week_start)
 
     # Wochentage generieren
     weekdays = []
@@ -70,8 +80,7 @@ def index():
         /* Wochenansicht Styles */
         .week-view-table {
             background: white;
-            border-radius: 15px;
-            overflow: hidden;
+            margin-bottom: 0;
         }
         .week-view-table th {
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
@@ -102,6 +111,9 @@ def index():
             border-color: #4caf50;
             font-weight: 600;
         }
+        .revenue-input.is-dirty {
+            border-color: #ffc107;
+        }
         .day-header {
             font-size: 0.875rem;
             color: #6c757d;
@@ -115,7 +127,14 @@ def index():
         .device-row:hover {
             background-color: #f8f9fa;
         }
-        .total-row {
+        .group-header {
+            cursor: pointer;
+            background: #f8f9fa;
+        }
+        .group-header:hover {
+            background: #eef1ff;
+        }
+        .group-total-row {
             background: linear-gradient(90deg, #f8f9fa, #e9ecef);
             font-weight: bold;
         }
@@ -137,8 +156,6 @@ def index():
             margin-right: 5px;
         }
         .status-active { background-color: #28a745; }
-        .status-maintenance { background-color: #ffc107; }
-        .status-inactive { background-color: #6c757d; }
 
         /* Animation */
         @keyframes pulse {
@@ -160,200 +177,292 @@ def index():
     </style>
     """
 
-    # JavaScript für Interaktivität
+    day_classes = ['today-column' if d['is_today'] else 'weekend-column' if d['is_weekend'] else ''
+                   for d in weekdays]
+    config = {
+        'weekStart': week_start.isoformat(),
+        'days': [d['date'].isoformat() for d in weekdays],
+        'dayClasses': day_classes,
+        'urls': {
+            'groups': url_for('entries.week_groups', week_start=week_start.isoformat()),
+            'rows': url_for('entries.week_rows', week_start=week_start.isoformat()),
+            'save': url_for('entries.save_week'),
+            'copy': url_for('entries.copy_last_week', week_offset=week_offset)
+        }
+    }
+
+    # JavaScript: Gruppen auf-/zuklappen, Zeilen nachladen, je Gruppe speichern
     extra_scripts = f"""
     <script>
-    // Einnahmen-Daten
-    let entriesData = {json.dumps(entries_dict)};
-    let hasChanges = false;
-    let deviceNames = {{}};
-
-    // Gerätenamen speichern
-    {' '.join([f"deviceNames[{device.id}] = '{device.name}';" for device in devices])}
-
-    // Input Change Handler
-    function updateEntry(deviceId, date, input) {{
+    const WEEK = {json.dumps(config)};
+    </script>
+    """ + """
+    <script>
+    const groupState = {};   // key -> {loaded, cursor, dirty: {deviceId: {date: value}}}
+    let copied = {};          // deviceId -> {dayOffset: amount} für noch nicht geladene Zeilen
+
+    function euro(value) {
+        return (value || 0).toFixed(2) + ' €';
+    }
+
+    function escapeHtml(text) {
+        const div = document.createElement('div');
+        div.textContent = text;
+        return div.innerHTML;
+    }
+
+    function state(key) {
+        if (!groupState[key]) groupState[key] = {loaded: false, cursor: null, dirty: {}};
+        return groupState[key];
+    }
+
+    function groupBody(key) {
+        return document.querySelector(`tbody[data-group="${CSS.escape(key)}"]`);
+    }
+
+    function hasChanges() {
+        return Object.values(groupState).some(s => Object.keys(s.dirty).length > 0)
+            || Object.keys(copied).length > 0;
+    }
+
+    function refreshSaveButtons() {
+        const any = hasChanges();
+        const button = document.getElementById('saveButton');
+        button.disabled = !any;
+        button.classList.toggle('btn-save', any);
+        document.querySelectorAll('[data-save-group]').forEach(btn => {
+            btn.classList.toggle('d-none', Object.keys(state(btn.dataset.saveGroup).dirty).length === 0);
+        });
+    }
+
+    function rowHtml(key, row) {
+        let cells = '';
+        WEEK.days.forEach((day, i) => {
+            const value = row.cells[i];
+            cells += `
+                <td class="${WEEK.dayClasses[i]}">
+                    <input type="number" step="0.01" placeholder="0.00"
+                           class="form-control revenue-input ${value ? 'has-value' : ''}"
+                           data-device-id="${row.id}" data-day="${i}"
+                           value="${value === null ? '' : value}">
+                </td>`;
+        });
+        return `
+            <tr class="device-row" data-device-row="${row.id}">
+                <td>
+                    <span class="device-status status-active"></span>
+                    <strong>${escapeHtml(row.name)}</strong>
+                </td>
+                ${cells}
+                <td class="text-end"><strong class="device-total">${euro(row.total)}</strong></td>
+            </tr>`;
+    }
+
+    async function loadRows(key) {
+        const s = state(key);
+        const body = groupBody(key);
+        const more = body.querySelector('.load-more-row');
+        if (more) more.remove();
+
+        let url = WEEK.urls.rows + '&location=' + encodeURIComponent(key);
+        if (s.cursor) url += '&after=' + encodeURIComponent(s.cursor);
+
+        const response = await fetch(url);
+        const data = await response.json();
+        body.insertAdjacentHTML('beforeend', data.rows.map(row => rowHtml(key, row)).join(''));
+
+        // Kopierte Werte der Vorwoche auf neu geladene Zeilen anwenden
+        data.rows.forEach(row => {
+            if (copied[row.id]) {
+                applyCopy(row.id, copied[row.id]);
+                delete copied[row.id];
+            }
+        });
+
+        s.loaded = true;
+        s.cursor = data.next_cursor;
+        if (s.cursor) {
+            body.insertAdjacentHTML('beforeend', `
+                <tr class="load-more-row"><td colspan="9" class="text-center">
+                    <button class="btn btn-sm btn-outline-primary" type="button"
+                            onclick="loadRows(this.closest('tbody').dataset.group)">
+                        Weitere Geräte laden
+                    </button>
+                </td></tr>`);
+        }
+        refreshSaveButtons();
+    }
+
+    function toggleGroup(key) {
+        const body = groupBody(key);
+        const hidden = body.classList.toggle('d-none');
+        if (!hidden && !state(key).loaded) loadRows(key);
+    }
+
+    function updateCell(input) {
+        const key = input.closest('tbody').dataset.group;
+        const deviceId = input.dataset.deviceId;
+        const day = WEEK.days[parseInt(input.dataset.day)];
         const value = parseFloat(input.value) || 0;
 
-        // Update data
-        if (!entriesData[deviceId]) entriesData[deviceId] = {{}};
-        entriesData[deviceId][date] = value;
-
-        // Visual feedback
-        if (value > 0) {{
-            input.classList.add('has-value');
-        }} else {{
-            input.classList.remove('has-value');
-        }}
-
-        // Update totals
-        updateTotals();
-        hasChanges = true;
-
-        // Enable save button
-        document.getElementById('saveButton').disabled = false;
-        document.getElementById('saveButton').classList.add('btn-save');
-    }}
-
-    // Berechne Summen
-    function updateTotals() {{
-        // Tages-Summen
-        {' '.join([f'''
-        let day{i}Total = 0;
-        document.querySelectorAll('.day-{i}').forEach(input => {{
-            day{i}Total += parseFloat(input.value) || 0;
-        }});
-        document.getElementById('day-{i}-total').textContent = day{i}Total.toFixed(2) + ' €';
-        ''' for i in range(7)])}
-
-        // Geräte-Summen und bestes Gerät ermitteln
-        let bestDevice = '';
-        let bestAmount = 0;
-
-        document.querySelectorAll('[data-device-id]').forEach(row => {{
-            const deviceId = row.dataset.deviceId;
-            let deviceTotal = 0;
-            row.querySelectorAll('input').forEach(input => {{
-                deviceTotal += parseFloat(input.value) || 0;
-            }});
-            document.getElementById('device-' + deviceId + '-total').textContent = deviceTotal.toFixed(2) + ' €';
-
-            // Bestes Gerät ermitteln
-            if (deviceTotal > bestAmount) {{
-                bestAmount = deviceTotal;
-                bestDevice = deviceNames[deviceId] || 'Gerät ' + deviceId;
-            }}
-        }});
-
-        // Gesamt-Summe
-        let grandTotal = 0;
-        document.querySelectorAll('.revenue-input').forEach(input => {{
-            grandTotal += parseFloat(input.value) || 0;
-        }});
-        document.getElementById('grand-total').textContent = grandTotal.toFixed(2) + ' €';
-        document.getElementById('grand-total-2').textContent = grandTotal.toFixed(2) + ' €';
-
-        // Durchschnitt berechnen
-        let dailyAvg = grandTotal / 7;
-        document.getElementById('daily-avg').textContent = dailyAvg.toFixed(2) + ' €';
-
-        // Bestes Gerät anzeigen
-        document.getElementById('best-device').textContent = bestDevice || '-';
-    }}
-
-    // Enter-Taste Navigation
-    document.addEventListener('keydown', function(e) {{
-        if (e.key === 'Enter' && e.target.classList.contains('revenue-input')) {{
-            e.preventDefault();
-            const inputs = Array.from(document.querySelectorAll('.revenue-input'));
-            const currentIndex = inputs.indexOf(e.target);
-            if (currentIndex < inputs.length - 1) {{
-                inputs[currentIndex + 1].focus();
-                inputs[currentIndex + 1].select();
-            }}
-        }}
-    }});
-
-    // Speichern
-    async function saveEntries() {{
-        document.getElementById('saveButton').disabled = true;
-        document.getElementById('saveButton').innerHTML = '<span class="spinner-border spinner-border-sm"></span> Speichert...';
-
-        try {{
-            const response = await fetch('/entries/save-week', {{
-                method: 'POST',
-                headers: {{'Content-Type': 'application/json'}},
-                body: JSON.stringify({{
-                    week_start: '{week_start.isoformat()}',
-                    entries: entriesData
-                }})
-            }});
-
-            const result = await response.json();
-            if (result.success) {{
-                // Success message
-                showAlert('success', 'Einnahmen wurden gespeichert!');
-                hasChanges = false;
-                document.getElementById('saveButton').classList.remove('btn-save');
-                document.getElementById('saveButton').innerHTML = '<i class="bi bi-check-circle"></i> Gespeichert';
-
-                // Reload after 1 second
-                setTimeout(() => location.reload(), 1000);
-            }} else {{
-                showAlert('danger', 'Fehler beim Speichern: ' + result.message);
-                document.getElementById('saveButton').disabled = false;
-                document.getElementById('saveButton').innerHTML = '<i class="bi bi-save"></i> Speichern';
-            }}
-        }} catch (error) {{
-            showAlert('danger', 'Netzwerkfehler: ' + error);
-            document.getElementById('saveButton').disabled = false;
-            document.getElementById('saveButton').innerHTML = '<i class="bi bi-save"></i> Speichern';
-        }}
-    }}
-
-    // Letzte Woche kopieren
-    async function copyLastWeek() {{
+        const dirty = state(key).dirty;
+        if (!dirty[deviceId]) dirty[deviceId] = {};
+        dirty[deviceId][day] = value;
+
+        input.classList.toggle('has-value', value > 0);
+        input.classList.add('is-dirty');
+
+        // Zeilensumme aus den Eingaben
+        let rowTotal = 0;
+        input.closest('tr').querySelectorAll('.revenue-input').forEach(i => rowTotal += parseFloat(i.value) || 0);
+        input.closest('tr').querySelector('.device-total').textContent = euro(rowTotal);
+
+        refreshSaveButtons();
+    }
+
+    function renderSummary(summary) {
+        summary.groups.forEach(group => {
+            const header = document.querySelector(`tr[data-group-header="${CSS.escape(group.key)}"]`);
+            if (!header) return;
+            header.querySelector('.group-devices').textContent = group.devices;
+            header.querySelectorAll('.group-day').forEach((cell, i) => cell.textContent = euro(group.days[i]));
+            header.querySelector('.group-total').textContent = euro(group.total);
+        });
+        document.querySelectorAll('.week-day-total').forEach((cell, i) => cell.textContent = euro(summary.days[i]));
+        document.getElementById('grand-total').textContent = euro(summary.total);
+        document.getElementById('grand-total-2').textContent = euro(summary.total);
+        document.getElementById('daily-avg').textContent = euro(summary.daily_avg);
+        document.getElementById('best-device').textContent = summary.best_device || '-';
+    }
+
+    async function postCells(entries) {
+        const response = await fetch(WEEK.urls.save, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/json'},
+            body: JSON.stringify({week_start: WEEK.weekStart, entries: entries, summary: true})
+        });
+        const result = await response.json();
+        if (!result.success) throw new Error(result.message);
+        return result;
+    }
+
+    // Teilspeicherung: nur die geänderten Zellen einer Gruppe
+    async function saveGroup(key) {
+        const s = state(key);
+        if (Object.keys(s.dirty).length === 0) return null;
+
+        const result = await postCells(s.dirty);
+        s.dirty = {};
+        groupBody(key).querySelectorAll('.is-dirty').forEach(i => i.classList.remove('is-dirty'));
+        renderSummary(result.summary);
+        refreshSaveButtons();
+        return result;
+    }
+
+    async function saveEntries(key) {
+        const button = document.getElementById('saveButton');
+        button.disabled = true;
+        button.innerHTML = '<span class="spinner-border spinner-border-sm"></span> Speichert...';
+
+        try {
+            const keys = key === undefined ? Object.keys(groupState) : [key];
+            for (const k of keys) await saveGroup(k);
+
+            // Kopierte Werte für nie geöffnete Gruppen
+            if (key === undefined && Object.keys(copied).length > 0) {
+                const entries = {};
+                Object.entries(copied).forEach(([deviceId, days]) => {
+                    entries[deviceId] = {};
+                    Object.entries(days).forEach(([offset, amount]) => entries[deviceId][WEEK.days[offset]] = amount);
+                });
+                renderSummary((await postCells(entries)).summary);
+                copied = {};
+            }
+            showAlert('success', 'Einnahmen wurden gespeichert!');
+        } catch (error) {
+            showAlert('danger', 'Fehler beim Speichern: ' + error.message);
+        }
+        button.innerHTML = '<i class="bi bi-save"></i> Alles speichern';
+        refreshSaveButtons();
+    }
+
+    function applyCopy(deviceId, days) {
+        Object.entries(days).forEach(([offset, amount]) => {
+            const input = document.querySelector(`input[data-device-id="${deviceId}"][data-day="${offset}"]`);
+            if (input) {
+                input.value = amount;
+                updateCell(input);
+            }
+        });
+    }
+
+    // Letzte Woche kopieren - geladene Zeilen sofort, der Rest beim Nachladen/Speichern
+    async function copyLastWeek() {
         if (!confirm('Möchten Sie die Werte der letzten Woche übernehmen?')) return;
 
-        try {{
-            const response = await fetch('/entries/copy-last-week?week_offset={week_offset}');
+        try {
+            const response = await fetch(WEEK.urls.copy);
             const data = await response.json();
 
-            // Fill inputs with last week's data
-            Object.keys(data).forEach(deviceId => {{
-                Object.keys(data[deviceId]).forEach(dayOffset => {{
-                    const input = document.querySelector(`input[data-device-id="${{deviceId}}"][data-day="${{dayOffset}}"]`);
-                    if (input) {{
-                        input.value = data[deviceId][dayOffset];
-                        input.classList.add('has-value');
-                    }}
-                }});
-            }});
-
-            updateTotals();
-            hasChanges = true;
-            document.getElementById('saveButton').disabled = false;
+            Object.entries(data).forEach(([deviceId, days]) => {
+                if (document.querySelector(`tr[data-device-row="${deviceId}"]`)) {
+                    applyCopy(deviceId, days);
+                } else {
+                    copied[deviceId] = days;
+                }
+            });
+            refreshSaveButtons();
             showAlert('info', 'Werte der letzten Woche wurden übernommen');
-        }} catch (error) {{
+        } catch (error) {
             showAlert('danger', 'Fehler beim Laden der letzten Woche');
-        }}
-    }}
+        }
+    }
 
     // Alert anzeigen
-    function showAlert(type, message) {{
-        const alertHtml = `
-            <div class="alert alert-${{type}} alert-dismissible fade show" role="alert">
-                ${{message}}
+    function showAlert(type, message) {
+        document.getElementById('alerts').innerHTML = `
+            <div class="alert alert-${type} alert-dismissible fade show" role="alert">
+                ${escapeHtml(message)}
                 <button type="button" class="btn-close" data-bs-dismiss="alert"></button>
             </div>
         `;
-        document.getElementById('alerts').innerHTML = alertHtml;
-    }}
+    }
 
-    // Tab Navigation
-    function switchTab(tab) {{
-        // Update buttons
-        document.querySelectorAll('.tab-btn').forEach(btn => btn.classList.remove('active'));
-        event.target.classList.add('active');
+    document.addEventListener('change', function(e) {
+        if (e.target.classList.contains('revenue-input')) updateCell(e.target);
+    });
 
-        // Show/hide content
-        document.querySelectorAll('.tab-content').forEach(content => content.style.display = 'none');
-        document.getElementById(tab).style.display = 'block';
-    }}
+    // Enter-Taste Navigation (innerhalb der geladenen Zeilen)
+    document.addEventListener('keydown', function(e) {
+        if (e.key === 'Enter' && e.target.classList.contains('revenue-input')) {
+            e.preventDefault();
+            const inputs = Array.from(document.querySelectorAll('.revenue-input'));
+            const currentIndex = inputs.indexOf(e.target);
+            if (currentIndex < inputs.length - 1) {
+                inputs[currentIndex + 1].focus();
+                inputs[currentIndex + 1].select();
+            }
+        }
+    });
 
     // Beim Verlassen warnen
-    window.addEventListener('beforeunload', function (e) {{
-        if (hasChanges) {{
+    window.addEventListener('beforeunload', function (e) {
+        if (hasChanges()) {
             e.preventDefault();
             e.returnValue = '';
-        }}
-    }});
+        }
+    });
 
-    // Initial totals
-    document.addEventListener('DOMContentLoaded', updateTotals);
+    // Erste Gruppe direkt öffnen
+    document.addEventListener('DOMContentLoaded', function() {
+        const first = document.querySelector('tbody[data-group]');
+        if (first) toggleGroup(first.dataset.group);
+    });
     </script>
     """
 
+    best = summary['best_device'] or '-'
+
     # HTML Content
     content = f"""
     <div id="alerts"></div>
@@ -368,7 +477,7 @@ def index():
                 <i class="bi bi-chevron-left"></i> Vorherige
             </a>
             <button class="btn btn-light" disabled>
-                KW {week_start.isocalendar()[1]} 
+                KW {week_start.isocalendar()[1]}
                 ({week_start.strftime('%d.%m.')} - {week_end.strftime('%d.%m.%Y')})
             </button>
             <a href="?week={week_offset + 1}" class="btn btn-light">
@@ -383,7 +492,7 @@ def index():
             <div class="card summary-card">
                 <div class="card-body text-center">
                     <h6 class="text-muted">Wochensumme</h6>
-                    <h3 id="grand-total-2" class="text-success">0.00 €</h3>
+                    <h3 id="grand-total-2" class="text-success">{summary['total']:.2f} €</h3>
                 </div>
             </div>
         </div>
@@ -391,7 +500,7 @@ def index():
             <div class="card summary-card">
                 <div class="card-body text-center">
                     <h6 class="text-muted">Durchschnitt/Tag</h6>
-                    <h3 id="daily-avg" class="text-info">0.00 €</h3>
+                    <h3 id="daily-avg" class="text-info">{summary['daily_avg']:.2f} €</h3>
                 </div>
             </div>
         </div>
@@ -399,7 +508,7 @@ def index():
             <div class="card summary-card">
                 <div class="card-body text-center">
                     <h6 class="text-muted">Bestes Gerät</h6>
-                    <h3 id="best-device" class="text-primary" style="font-size: 1.2rem;">-</h3>
+                    <h3 id="best-device" class="text-primary" style="font-size: 1.2rem;">{escape(best)}</h3>
                 </div>
             </div>
         </div>
@@ -407,129 +516,82 @@ def index():
             <div class="card summary-card">
                 <div class="card-body text-center">
                     <h6 class="text-muted">Aktive Geräte</h6>
-                    <h3 class="text-secondary">{len(devices)}</h3>
+                    <h3 class="text-secondary">{summary['devices']}</h3>
                 </div>
             </div>
         </div>
     </div>
 
-    <!-- Tabs -->
+    <!-- Wochenraster nach Standort -->
     <div class="card mb-4">
-        <div class="card-header">
-            <div class="btn-group" role="group">
-                <button class="btn btn-outline-primary tab-btn active" onclick="switchTab('week-view')">
-                    <i class="bi bi-table"></i> Wochenansicht
-                </button>
-                <button class="btn btn-outline-primary tab-btn" onclick="switchTab('quick-entry')">
-                    <i class="bi bi-lightning"></i> Schnelleingabe
-                </button>
-            </div>
-        </div>
         <div class="card-body p-0">
-            <!-- Wochenansicht Tab -->
-            <div id="week-view" class="tab-content">
-                <div class="table-responsive">
-                    <table class="table table-hover week-view-table mb-0">
-                        <thead>
-                            <tr>
-                                <th style="width: 200px;">Gerät</th>
+            <div class="table-responsive">
+                <table class="table table-hover week-view-table">
+                    <thead>
+                        <tr>
+                            <th style="width: 200px;">Standort / Gerät</th>
     """
 
     # Spalten-Header für jeden Tag
     for i, day in enumerate(weekdays):
-        classes = 'today-column' if day['is_today'] else 'weekend-column' if day['is_weekend'] else ''
         content += f"""
-                                <th class="{classes}">
-                                    {day['name']}<br>
-                                    <span class="day-header">{day['date'].strftime('%d.%m.')}</span>
-                                </th>
+                            <th class="{day_classes[i]}">
+                                {day['name']}<br>
+                                <span class="day-header">{day['date'].strftime('%d.%m.')}</span>
+                            </th>
         """
 
     content += """
-                                <th style="width: 120px;">Summe</th>
-                            </tr>
-                        </thead>
-                        <tbody>
+                            <th style="width: 120px;">Summe</th>
+                        </tr>
+                    </thead>
     """
 
-    # Zeile für jedes Gerät
-    for device in devices:
+    # Eine Kopfzeile je Standort, die Gerätezeilen kommen beim Aufklappen
+    for group in summary['groups']:
+        key = escape(group['key'])
         content += f"""
-                            <tr class="device-row" data-device-id="{device.id}">
-                                <td>
-                                    <span class="device-status status-{device.status.value}"></span>
-                                    <strong>{device.name}</strong>
-                                    <br>
-                                    <small class="text-muted">{device.location or 'Kein Standort'}</small>
-                                </td>
+                    <tbody>
+                        <tr class="group-header" data-group-header="{key}" onclick="toggleGroup(this.dataset.groupHeader)">
+                            <td>
+                                <i class="bi bi-geo-alt"></i> <strong>{escape(group['label'])}</strong>
+                                <span class="badge bg-secondary group-devices">{group['devices']}</span>
+                                <button class="btn btn-sm btn-warning ms-2 d-none" type="button" data-save-group="{key}"
+                                        onclick="event.stopPropagation(); saveEntries(this.dataset.saveGroup)">
+                                    <i class="bi bi-save"></i>
+                                </button>
+                            </td>
         """
-
-        # Input für jeden Tag
-        for i, day in enumerate(weekdays):
-            value = entries_dict.get(device.id, {}).get(day['date'].isoformat(), '')
-            has_value_class = 'has-value' if value else ''
-            classes = 'today-column' if day['is_today'] else 'weekend-column' if day['is_weekend'] else ''
-
-            content += f"""
-                                <td class="{classes}">
-                                    <input type="number" 
-                                           class="form-control revenue-input day-{i} {has_value_class}"
-                                           data-device-id="{device.id}"
-                                           data-day="{i}"
-                                           value="{value}"
-                                           step="0.01"
-                                           placeholder="0.00"
-                                           onchange="updateEntry({device.id}, '{day['date'].isoformat()}', this)">
-                                </td>
-            """
-
+        for i, amount in enumerate(group['days']):
+            content += f'<td class="text-end text-muted group-day {day_classes[i]}">{amount:.2f} €</td>'
         content += f"""
-                                <td class="text-end">
-                                    <strong id="device-{device.id}-total">0.00 €</strong>
-                                </td>
-                            </tr>
+                            <td class="text-end"><strong class="group-total">{group['total']:.2f} €</strong></td>
+                        </tr>
+                    </tbody>
+                    <tbody class="d-none" data-group="{key}"></tbody>
         """
 
-    # Summen-Zeile
-    content += """
-                            <tr class="total-row">
-                                <td><strong>GESAMT</strong></td>
-    """
-
-    for i in range(7):
-        content += f'<td class="text-center total-cell" id="day-{i}-total">0.00 €</td>'
-
-    content += """
-                                <td class="text-end total-cell" id="grand-total">0.00 €</td>
-                            </tr>
-                        </tbody>
-                    </table>
-                </div>
-            </div>
-
-            <!-- Schnelleingabe Tab -->
-            <div id="quick-entry" class="tab-content" style="display: none;">
-                <div class="p-4">
-                    <h5>Schnelleingabe für heute</h5>
-                    <p class="text-muted">Geben Sie die heutigen Einnahmen schnell ein:</p>
-                    <div class="row">
-    """
-
-    # Schnelleingabe für heute
-    for device in devices:
-        content += f"""
-                        <div class="col-md-6 mb-3">
-                            <div class="input-group">
-                                <span class="input-group-text">{device.name}</span>
-                                <input type="number" class="form-control" step="0.01" placeholder="0.00">
-                                <span class="input-group-text">€</span>
-                            </div>
-                        </div>
+    if not summary['groups']:
+        content += """
+                    <tbody>
+                        <tr><td colspan="9" class="text-center text-muted py-4">Keine aktiven Geräte</td></tr>
+                    </tbody>
         """
 
+    # Summen-Zeile
     content += """
-                    </div>
-                </div>
+                    <tfoot>
+                        <tr class="group-total-row">
+                            <td><strong>GESAMT</strong></td>
+    """
+    for i, amount in enumerate(summary['days']):
+        content += f'<td class="text-end total-cell week-day-total">{amount:.2f} €</td>'
+
+    content += f"""
+                            <td class="text-end total-cell" id="grand-total">{summary['total']:.2f} €</td>
+                        </tr>
+                    </tfoot>
+                </table>
             </div>
         </div>
     </div>
@@ -540,18 +602,18 @@ def index():
             <button class="btn btn-secondary" onclick="copyLastWeek()">
                 <i class="bi bi-clipboard"></i> Letzte Woche kopieren
             </button>
-            <button class="btn btn-warning" onclick="if(confirm('Alle Eingaben löschen?')) location.reload()">
+            <button class="btn btn-warning" onclick="if(confirm('Alle Eingaben verwerfen?')) location.reload()">
                 <i class="bi bi-arrow-clockwise"></i> Neu laden
             </button>
         </div>
         <button id="saveButton" class="btn btn-success btn-lg" onclick="saveEntries()" disabled>
-            <i class="bi bi-save"></i> Speichern
+            <i class="bi bi-save"></i> Alles speichern
         </button>
     </div>
 
     <!-- Quick Actions (Floating) -->
     <div class="quick-actions">
-        <a href="/entries/add" class="btn btn-primary btn-lg rounded-circle" title="Einzelne Einnahme">
+        <a href="{url_for('entries.add_single')}" class="btn btn-primary btn-lg rounded-circle" title="Einzelne Einnahme">
             <i class="bi bi-plus"></i>
         </a>
     </div>
@@ -559,67 +621,82 @@ def index():
 
     # Use modern template
     from app.web.dashboard_modern import render_modern_template
-    
+
     return render_modern_template(
-        content_html=content,
+        content=content,
         title="Einnahmen erfassen",
-        module='income',
-        submodule='weekly',
+        active_module='income',
+        active_submodule='weekly',
         breadcrumb=[
-            {'name': 'Dashboard', 'url': url_for('dashboard_modern.dashboard')},
-            {'name': 'Einnahmen', 'url': url_for('income.index')},
-            {'name': 'Wochenerfassung', 'url': None}
+            {'text': 'Dashboard', 'url': url_for('dashboard_modern.dashboard')},
+            {'text': 'Einnahmen', 'url': url_for('income.index')},
+            {'text': 'Wochenerfassung'}
         ],
         extra_scripts=extra_scripts,
         extra_css=extra_css
     )
 
 
+@entries_bp.route('/week/groups')
+@login_required
+def week_groups():
+    """Standort-Gruppen mit Summen als JSON"""
+    return jsonify(_week_summary(current_user.id, _week_start_arg()))
+
+
+@entries_bp.route('/week/rows')
+@login_required
+def week_rows():
+    """Gerätezeilen eines Standorts seitenweise als JSON (?location=&after=)"""
+    week_start = _week_start_arg()
+    per_page = max(1, min(request.args.get('per_page', GROUP_PAGE_SIZE, type=int), MAX_PER_PAGE))
+    try:
+        page, cells = group_rows(
+            current_user.id, week_start,
+            location=request.args.get('location', ''),
+            after=request.args.get('after'),
+            per_page=per_page
+        )
+    except InvalidCursor:
+        abort(400, 'Ungültiger Seiten-Cursor')
+
+    days = [week_start + timedelta(days=i) for i in range(7)]
+    rows = []
+    for device in page.items:
+        amounts = [cells.get((device.id, day)) for day in days]
+        rows.append({
+            'id': device.id,
+            'name': device.name,
+            'cells': [float(a) if a is not None else None for a in amounts],
+            'total': float(sum(a for a in amounts if a is not None))
+        })
+
+    return jsonify({'rows': rows, 'next_cursor': page.next_cursor})
+
+
 @entries_bp.route('/save-week', methods=['POST'])
 @login_required
 def save_week():
-    """Speichert alle Einnahmen einer Woche"""
+    """Speichert die geänderten Zellen einer Woche"""
     try:
         data = request.get_json()
         week_start = datetime.strptime(data['week_start'], '%Y-%m-%d').date()
-        entries_data = data['entries']
-
-        # Lösche existierende Einträge korrekt
-        week_end = week_start + timedelta(days=6)
-
-        # Erst die Einträge finden
-        existing_entries = Entry.query.join(Device).filter(
-            Device.owner_id == current_user.id,
-            Entry.date >= week_start,
-            Entry.date <= week_end
-        ).all()
-
-        # Dann einzeln löschen
-        for entry in existing_entries:
-            db.session.delete(entry)
-
-        # Neue Einträge erstellen
-        for device_id, dates in entries_data.items():
-            # Prüfen ob das Gerät dem User gehört
-            device = Device.query.filter_by(
-                id=int(device_id),
-                owner_id=current_user.id
-            ).first()
-
-            if device:  # Nur wenn Gerät existiert und dem User gehört
-                for date_str, amount in dates.items():
-                    if amount > 0:  # Nur speichern wenn Betrag > 0
-                        entry = Entry(
-                            device_id=int(device_id),
-                            amount=Decimal(str(amount)),
-                            date=datetime.strptime(date_str, '%Y-%m-%d').date(),
-                            user_id=current_user.id,
-                            description='Wochenerfassung'
-                        )
-                        db.session.add(entry)
+        cells = parse_cells(data['entries'], week_start)
 
+        result = save_week_cells(current_user.id, current_user.id, week_start, cells)
         db.session.commit()
-        return jsonify({'success': True, 'message': 'Einnahmen gespeichert'})
+
+        response = {
+            'success': True,
+            'message': 'Einnahmen gespeichert',
+            'saved': result.upserted,
+            'deleted': result.deleted,
+            'unchanged': result.unchanged
+        }
+        # Aktualisierte Gruppensummen gleich mitliefern (Teilspeicherung im Raster)
+        if data.get('summary'):
+            response['summary'] = _week_summary(current_user.id, week_start)
+        return jsonify(response)
 
     except Exception as e:
         db.session.rollback()
@@ -635,20 +712,10 @@ def copy_last_week():
     # Letzte Woche berechnen
     last_week_start, last_week_end = get_week_dates(week_offset - 1)
 
-    # Einnahmen der letzten Woche laden
-    entries = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        Entry.date >= last_week_start,
-        Entry.date <= last_week_end
-    ).all()
-
     # In Format für Frontend konvertieren (device_id -> day_offset -> amount)
     result = {}
-    for entry in entries:
-        day_offset = (entry.date - last_week_start).days
-        if entry.device_id not in result:
-            result[entry.device_id] = {}
-        result[entry.device_id][day_offset] = float(entry.amount)
+    for (device_id, day), (_, amount) in week_cells(current_user.id, last_week_start).items():
+        result.setdefault(device_id, {})[(day - last_week_start).days] = float(amount)
 
     return jsonify(result)
 
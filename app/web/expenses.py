@@ -8,7 +8,9 @@ from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app import db
-from app.models import Device, Expense, ExpenseCategory
+from app.models import Device, Expense, ExpenseCategory, DailyRevenue
+from app.utils.pagination import paginate_request, pager_html
+from sqlalchemy import func
 # Import erfolgt in den Funktionen
 import json
 import os
@@ -56,34 +58,43 @@ def index():
     device_dict = {d.id: d.name for d in devices}
 
     # Ausgaben des Monats
-    expenses = Expense.query.filter(
+    month_expenses = Expense.query.filter(
         Expense.user_id == current_user.id,
         Expense.date >= current_month,
         Expense.date <= month_end
-    ).order_by(Expense.date.desc()).all()
+    )
+    page = paginate_request(
+        month_expenses,
+        order_by=[Expense.date.desc(), Expense.id.desc()]
+    )
+    expenses = page.items
+
+    # Einnahmen des Monats (für Gewinn/Verlust) aus den Tagesumsätzen
+    month_income = DailyRevenue.totals(current_user.id, current_month, month_end)
 
-    # Einnahmen des Monats (für Gewinn/Verlust)
-    from app.models import Entry
-    entries = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        Entry.date >= current_month,
-        Entry.date <= month_end
-    ).all()
+    # Ausgaben nach Kategorie - gruppiert über den ganzen Monat, nicht nur die Seite
+    category_rows = db.session.query(
+        Expense.category,
+        func.sum(Expense.amount),
+        func.count(Expense.id)
+    ).filter(
+        Expense.user_id == current_user.id,
+        Expense.date >= current_month,
+        Expense.date <= month_end
+    ).group_by(Expense.category).all()
+
+    expenses_by_category = {
+        category.value: {'amount': float(amount), 'count': count}
+        for category, amount, count in category_rows
+    }
+    largest_expense = month_expenses.order_by(Expense.amount.desc()).first()
 
     # Berechnungen
-    total_expenses = sum(e.amount for e in expenses)
-    total_income = sum(e.amount for e in entries)
+    total_expenses = sum((Decimal(amount) for _, amount, _ in category_rows), Decimal('0.00'))
+    expense_count = sum(count for _, _, count in category_rows)
+    total_income = month_income['total']
     profit = total_income - total_expenses
 
-    # Ausgaben nach Kategorie
-    expenses_by_category = {}
-    for expense in expenses:
-        cat = expense.category.value
-        if cat not in expenses_by_category:
-            expenses_by_category[cat] = {'amount': 0, 'count': 0}
-        expenses_by_category[cat]['amount'] += float(expense.amount)
-        expenses_by_category[cat]['count'] += 1
-
     # JavaScript mit erweiterten Funktionen
     extra_scripts = f"""
     <script>
@@ -412,14 +423,14 @@ def index():
             <div class="card stat-card stat-expense">
                 <h6>Ausgaben</h6>
                 <h3>{total_expenses:.2f} €</h3>
-                <small>{len(expenses)} Einträge</small>
+                <small>{expense_count} Einträge</small>
             </div>
         </div>
         <div class="col-md-3">
             <div class="card stat-card stat-income">
                 <h6>Einnahmen</h6>
                 <h3>{total_income:.2f} €</h3>
-                <small>{len(entries)} Einträge</small>
+                <small>{month_income['count']} Einträge</small>
             </div>
         </div>
         <div class="col-md-3">
@@ -432,8 +443,8 @@ def index():
         <div class="col-md-3">
             <div class="card stat-card stat-warning">
                 <h6>Größte Ausgabe</h6>
-                <h3>{max([e.amount for e in expenses], default=0):.2f} €</h3>
-                <small>{expenses[0].category.value if expenses else '-'}</small>
+                <h3>{largest_expense.amount if largest_expense else 0:.2f} €</h3>
+                <small>{largest_expense.category.value if largest_expense else '-'}</small>
             </div>
         </div>
     </div>
@@ -548,6 +559,8 @@ def index():
     else:
         content += '<p class="text-muted text-center py-4">Noch keine Ausgaben in diesem Monat</p>'
 
+    content += pager_html(page, 'Ausgaben')
+
     content += """
                 </div>
             </div>
@@ -759,10 +772,10 @@ def index():
         {'text': 'Ausgaben'}
     ]
     
-    full_content = extra_css + content + extra_scripts
-    
     return render_modern_template(
-        full_content,
+        content=content,
+        extra_css=extra_css,
+        extra_scripts=extra_scripts,
         title="Ausgabenverwaltung",
         active_module='expenses',
         breadcrumb=breadcrumb
@@ -9,8 +9,11 @@ from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy import func, extract
+from sqlalchemy.orm import contains_eager, joinedload
 from app import db
-from app.models import Device, Entry, DeviceStatus, User
+from app.models import Device, Entry, DeviceStatus, User, DailyRevenue
+from app.utils.pagination import paginate_request, pager_html
+from app.utils.period_stats import PeriodStats
 import json
 
 income_bp = Blueprint('income', __name__, url_prefix='/income')
@@ -23,39 +26,18 @@ def index():
     # Zeiträume berechnen
     today = date.today()
     month_start = date(today.year, today.month, 1)
-    week_start = today - timedelta(days=today.weekday())
-    
-    # Statistiken berechnen
-    stats = {
-        'today': db.session.query(func.sum(Entry.amount)).join(Device).filter(
-            Device.owner_id == current_user.id,
-            Entry.date == today
-        ).scalar() or 0,
-        
-        'week': db.session.query(func.sum(Entry.amount)).join(Device).filter(
-            Device.owner_id == current_user.id,
-            Entry.date >= week_start
-        ).scalar() or 0,
-        
-        'month': db.session.query(func.sum(Entry.amount)).join(Device).filter(
-            Device.owner_id == current_user.id,
-            Entry.date >= month_start
-        ).scalar() or 0
-    }
+    
+    # Statistiken berechnen (ein Roundtrip für alle Zeiträume)
+    periods = PeriodStats.standard(current_user.id, 'today', 'week', 'month', today=today)
+    stats = {name: values['income'] for name, values in periods.items()}
     
     # Letzte Einnahmen
-    recent_entries = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id
+    recent_entries = Entry.query.options(joinedload(Entry.device)).filter(
+        Entry.owner_id == current_user.id
     ).order_by(Entry.date.desc(), Entry.created_at.desc()).limit(10).all()
     
     # Top Geräte diesen Monat
-    top_devices = db.session.query(
-        Device.name,
-        func.sum(Entry.amount).label('total')
-    ).join(Entry).filter(
-        Device.owner_id == current_user.id,
-        Entry.date >= month_start
-    ).group_by(Device.id, Device.name).order_by(func.sum(Entry.amount).desc()).limit(5).all()
+    top_devices = DailyRevenue.by_device(current_user.id, month_start, limit=5)
     
     content = f"""
     <div class="d-flex justify-content-between align-items-center mb-4">
@@ -239,8 +221,8 @@ def index():
     
     # Durchschnitt berechnen
     thirty_days_ago = today - timedelta(days=30)
-    avg_daily = db.session.query(func.avg(Entry.amount)).join(Device).filter(
-        Device.owner_id == current_user.id,
+    avg_daily = db.session.query(func.avg(Entry.amount)).filter(
+        Entry.owner_id == current_user.id,
         Entry.date >= thirty_days_ago
     ).scalar() or 0
     
@@ -266,8 +248,8 @@ def index():
     best_day = db.session.query(
         Entry.date,
         func.sum(Entry.amount).label('total')
-    ).join(Device).filter(
-        Device.owner_id == current_user.id,
+    ).filter(
+        Entry.owner_id == current_user.id,
         Entry.date >= thirty_days_ago
     ).group_by(Entry.date).order_by(func.sum(Entry.amount).desc()).first()
     
@@ -426,9 +408,9 @@ def add_income():
 def delete_income(entry_id):
     """Einnahme löschen"""
     try:
-        entry = Entry.query.join(Device).filter(
+        entry = Entry.query.filter(
             Entry.id == entry_id,
-            Device.owner_id == current_user.id
+            Entry.owner_id == current_user.id
         ).first_or_404()
         
         db.session.delete(entry)
@@ -442,15 +424,13 @@ def delete_income(entry_id):
 @login_required
 def all_income():
     """Alle Einnahmen anzeigen"""
-    # Filter-Parameter
-    page = request.args.get('page', 1, type=int)
-    per_page = 50
-    
-    # Alle Einnahmen mit Pagination
-    entries = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id
-    ).order_by(Entry.date.desc(), Entry.created_at.desc()).paginate(
-        page=page, per_page=per_page, error_out=False
+    # Alle Einnahmen mit Keyset-Pagination (Gerät per JOIN mitgeladen)
+    entries = paginate_request(
+        Entry.query.join(Device).options(contains_eager(Entry.device)).filter(
+            Entry.owner_id == current_user.id
+        ),
+        order_by=[Entry.date.desc(), Entry.id.desc()],
+        count='estimate'
     )
     
     content = f"""
@@ -500,18 +480,7 @@ def all_income():
             </div>
     """
     
-    # Pagination
-    if entries.pages > 1:
-        content += '<nav><ul class="pagination justify-content-center">'
-        for num in entries.iter_pages(left_edge=1, right_edge=1, left_current=1, right_current=2):
-            if num:
-                if num != entries.page:
-                    content += f'<li class="page-item"><a class="page-link" href="?page={num}">{num}</a></li>'
-                else:
-                    content += f'<li class="page-item active"><span class="page-link">{num}</span></li>'
-            else:
-                content += '<li class="page-item disabled"><span class="page-link">...</span></li>'
-        content += '</ul></nav>'
+    content += pager_html(entries, 'Einnahmen')
     
     content += """
         </div>
@@ -532,13 +501,9 @@ def all_income():
     
     from app.web.dashboard_modern import render_modern_template
     
-    # Kombiniere Content und Scripts
-    full_content = content
-    if extra_scripts:
-        full_content = full_content + f'<script>{extra_scripts}</script>'
-    
     return render_modern_template(
-        content=full_content,
+        content=content,
+        extra_scripts=extra_scripts,
         title='Alle Einnahmen',
         active_module='income',
         active_submodule='all',
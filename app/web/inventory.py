@@ -9,6 +9,7 @@ from datetime import datetime, date
 from decimal import Decimal
 from app import db
 from app.models import Product, InventoryMovement, Device
+from app.utils.pagination import paginate_request, pager_html
 
 inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 
@@ -17,7 +18,11 @@ inventory_bp = Blueprint('inventory', __name__, url_prefix='/inventory')
 @login_required
 def stocktaking():
     """Inventur - Lagerbestand anpassen"""
-    products = Product.query.filter_by(user_id=current_user.id).all()
+    page = paginate_request(
+        Product.query.filter_by(user_id=current_user.id),
+        order_by=[Product.name.asc(), Product.id.asc()]
+    )
+    products = page.items
     devices = Device.query.filter_by(owner_id=current_user.id).all()
     
     # JavaScript für Inventur
@@ -209,8 +214,9 @@ def stocktaking():
                     <tbody>
     """
     
+    stock_levels = Product.get_stock_levels(p.id for p in products)
     for product in products:
-        current_stock = product.get_current_stock()
+        current_stock = stock_levels[product.id]
         
         # Status berechnen
         if product.min_stock:
@@ -261,10 +267,11 @@ def stocktaking():
                         </tr>
         """
     
-    content += """
+    content += f"""
                     </tbody>
                 </table>
             </form>
+            {pager_html(page, 'Produkte')}
             
             <div class="mt-4">
                 <button type="button" class="btn btn-primary btn-lg" onclick="saveInventory()">
@@ -286,10 +293,10 @@ def stocktaking():
     # Use modern template
     from app.web.dashboard_modern import render_modern_template
     
-    full_content = extra_css + content + extra_scripts
-    
     return render_modern_template(
-        content=full_content,
+        content=content,
+        extra_css=extra_css,
+        extra_scripts=extra_scripts,
         title='Inventur',
         active_module='inventory',
         active_submodule='stocktaking',
@@ -352,7 +359,14 @@ def update_stock():
 @login_required  
 def quick_view():
     """Schnellansicht des Lagerbestands"""
-    products = Product.query.filter_by(user_id=current_user.id).all()
+    page = paginate_request(
+        Product.query.filter_by(user_id=current_user.id),
+        order_by=[Product.category.asc(), Product.name.asc(), Product.id.asc()],
+        per_page=100
+    )
+    products = page.items
+    
+    stock_levels = Product.get_stock_levels(p.id for p in products)
     
     # Gruppiere nach Kategorien
     by_category = {}
@@ -361,7 +375,7 @@ def quick_view():
         if category not in by_category:
             by_category[category] = []
         
-        stock = product.get_current_stock()
+        stock = stock_levels[product.id]
         status = 'ok'
         if product.min_stock:
             if stock <= 0:
@@ -433,8 +447,9 @@ def quick_view():
         </div>
         """
     
-    content += """
+    content += f"""
     </div>
+    {pager_html(page, 'Produkte')}
     """
     
     # Use modern template
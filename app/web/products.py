@@ -9,6 +9,7 @@ from datetime import datetime
 from decimal import Decimal
 from app import db
 from app.models import Product, ProductUnit, ProductCategory, InventoryMovement
+from app.utils.pagination import paginate_request, pager_html
 products_bp = Blueprint('products', __name__, url_prefix='/products')
 
 # Import render_modern_template am Ende der Datei
@@ -18,7 +19,12 @@ products_bp = Blueprint('products', __name__, url_prefix='/products')
 @login_required
 def index():
     """Produkt-Übersicht"""
-    products = Product.query.filter_by(user_id=current_user.id).all()
+    page = paginate_request(
+        Product.query.filter_by(user_id=current_user.id),
+        order_by=[Product.name.asc(), Product.id.asc()],
+        per_page=30
+    )
+    products = page.items
 
     content = """
     <div class="d-flex justify-content-between align-items-center mb-4">
@@ -39,8 +45,9 @@ def index():
     """
 
     if products:
+        stock_levels = Product.get_stock_levels(p.id for p in products)
         for product in products:
-            stock = product.get_current_stock()
+            stock = stock_levels[product.id]
             stock_status = 'success'
             if product.reorder_point and stock <= product.reorder_point:
                 stock_status = 'warning'
@@ -93,9 +100,12 @@ def index():
         </div>
         """
 
-    content += """
+    content += f"""
     </div>
+    {pager_html(page, 'Produkte')}
+    """
 
+    content += """
     <!-- Single Product Modal -->
     <div class="modal fade" id="productModal" tabindex="-1">
         <div class="modal-dialog">
@@ -327,10 +337,10 @@ def index():
     from app.web.dashboard_modern import render_modern_template
     
     # Kombiniere Content, Scripts und CSS
-    full_content = extra_css + content + extra_scripts
-    
     return render_modern_template(
-        content=full_content,
+        content=content,
+        extra_css=extra_css,
+        extra_scripts=extra_scripts,
         title='Produkte',
         active_module='inventory',
         active_submodule='products',
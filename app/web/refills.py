@@ -30,10 +30,11 @@ def index():
 
     # Produkte mit niedrigem Bestand
     products = Product.query.filter_by(user_id=current_user.id).all()
+    stock_levels = Product.get_stock_levels(p.id for p in products)
     low_stock_products = []
 
     for product in products:
-        current_stock = product.get_current_stock()
+        current_stock = stock_levels[product.id]
         if product.reorder_point and current_stock <= product.reorder_point:
             low_stock_products.append({
                 'product': product,
@@ -272,7 +273,7 @@ def index():
     """
 
     for product in products[:5]:  # Nur die ersten 5 zeigen
-        stock = product.get_current_stock()
+        stock = stock_levels[product.id]
         if product.max_stock:
             percentage = (stock / product.max_stock) * 100
             badge_class = 'stock-high' if percentage > 60 else 'stock-ok' if percentage > 30 else 'stock-low'
@@ -488,10 +489,10 @@ def index():
     from app.web.dashboard_modern import render_modern_template
     
     # Kombiniere Content, Scripts und CSS
-    full_content = extra_css + content + extra_scripts
-    
     return render_modern_template(
-        content=full_content,
+        content=content,
+        extra_css=extra_css,
+        extra_scripts=extra_scripts,
         title='Nachfüllungen',
         active_module='inventory',
         active_submodule='refills',
@@ -525,19 +526,16 @@ def edit_refill(refill_id):
             refill.discount_amount = Decimal(request.form.get('discount_amount', 0))
             refill.discount_reason = request.form.get('discount_reason', '')
             
+            # Alte InventoryMovements löschen (vor den Items, Bestand wird mitgebucht)
+            InventoryMovement.bulk_delete(
+                InventoryMovement.refill_item_id.in_(
+                    db.session.query(RefillItem.id).filter_by(refill_id=refill_id)
+                )
+            )
+            
             # Alte Items löschen
             RefillItem.query.filter_by(refill_id=refill_id).delete()
             
-            # Alte InventoryMovements löschen
-            from app.models import InventoryMovement
-            InventoryMovement.query.filter_by(
-                reason='Nachfüllung',
-                user_id=current_user.id
-            ).filter(
-                InventoryMovement.created_at >= refill.created_at - timedelta(seconds=5),
-                InventoryMovement.created_at <= refill.created_at + timedelta(seconds=5)
-            ).delete()
-            
             # Neue Produkte hinzufügen
             product_ids = request.form.getlist('product_id[]')
             quantities = request.form.getlist('quantity[]')
@@ -569,6 +567,7 @@ def edit_refill(refill_id):
                         line_discount_reason=line_discount_reason
                     )
                     db.session.add(item)
+                    db.session.flush()  # Item-ID für die Lagerbewegung
                     items_total += net_price
                     total_line_discount += line_discount
                     
@@ -897,10 +896,10 @@ def edit_refill(refill_id):
     # Use modern template
     from app.web.dashboard_modern import render_modern_template
     
-    full_content = extra_css + content + extra_scripts
-    
     return render_modern_template(
-        content=full_content,
+        content=content,
+        extra_css=extra_css,
+        extra_scripts=extra_scripts,
         title=f'Nachfüllung #{refill_id} bearbeiten',
         active_module='inventory',
         active_submodule='refills',
@@ -923,19 +922,15 @@ def delete_refill(refill_id):
         # Speichere Datum für die Erfolgsmeldung
         refill_date = refill.date.strftime('%d.%m.%Y')
         
-        # Lösche zuerst alle zugehörigen RefillItems
-        RefillItem.query.filter_by(refill_id=refill_id).delete()
+        # Lösche zuerst die zugehörigen InventoryMovements (Bestand wird mitgebucht)
+        InventoryMovement.bulk_delete(
+            InventoryMovement.refill_item_id.in_(
+                db.session.query(RefillItem.id).filter_by(refill_id=refill_id)
+            )
+        )
         
-        # Lösche zugehörige InventoryMovements wenn vorhanden
-        try:
-            from app.models import InventoryMovement
-            InventoryMovement.query.filter(
-                InventoryMovement.refill_item_id.in_(
-                    db.session.query(RefillItem.id).filter_by(refill_id=refill_id)
-                )
-            ).delete(synchronize_session=False)
-        except:
-            pass  # Falls InventoryMovement nicht existiert
+        # Dann alle zugehörigen RefillItems
+        RefillItem.query.filter_by(refill_id=refill_id).delete()
         
         # Lösche die zugehörige Ausgabe falls vorhanden
         if hasattr(refill, 'expense_id') and refill.expense_id:
@@ -1049,6 +1044,7 @@ def add_refill():
                     line_discount_reason=line_discount_reason
                 )
                 db.session.add(item)
+                db.session.flush()  # Item-ID für die Lagerbewegung
                 items_total += net_price
                 total_line_discount += line_discount
 
@@ -4,16 +4,26 @@ Berichte-Modul für Automaten Manager
 Vollständige Implementation mit Export-Funktionen
 """
 
-from flask import Blueprint, render_template_string, redirect, url_for, flash, request, jsonify, send_file
+from flask import (Blueprint, render_template_string, redirect, url_for, flash, request, jsonify, send_file,
+                   current_app, abort, Response, stream_with_context)
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from sqlalchemy import func, extract, and_, or_
 from app import db
-from app.models import Device, Entry, Expense, Product, Refill, RefillItem, Supplier, DeviceStatus, ExpenseCategory
+from app.models import Device, Entry, Expense, Product, Refill, RefillItem, Supplier, DeviceStatus, ExpenseCategory, Report
+from app.jobs import job, enqueue
+from app.utils import metrics
+from app.utils.fleet_summary import FleetSummary
+from app.utils.period_stats import PeriodStats
+from app.utils.report_data import ReportData
+from app.utils.streaming_export import DATASETS as EXPORT_DATASETS, ZIP_MIMETYPE, export_stream, full_export_stream
 import io
+import os
 import csv
 import json
+import time
+from werkzeug.utils import secure_filename
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak, Image
@@ -37,28 +47,12 @@ def index():
     current_year = today.year
     last_month = (today.replace(day=1) - timedelta(days=1))
     
-    # Schnellstatistiken für Übersicht
-    month_income = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        extract('year', Entry.date) == current_year,
-        extract('month', Entry.date) == current_month
-    ).with_entities(func.sum(Entry.amount)).scalar() or 0
-    
-    month_expenses = Expense.query.filter(
-        Expense.user_id == current_user.id,
-        extract('year', Expense.date) == current_year,
-        extract('month', Expense.date) == current_month
-    ).with_entities(func.sum(Expense.amount)).scalar() or 0
-    
-    year_income = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
-        extract('year', Entry.date) == current_year
-    ).with_entities(func.sum(Entry.amount)).scalar() or 0
-    
-    year_expenses = Expense.query.filter(
-        Expense.user_id == current_user.id,
-        extract('year', Expense.date) == current_year
-    ).with_entities(func.sum(Expense.amount)).scalar() or 0
+    # Schnellstatistiken für Übersicht (ein Roundtrip)
+    periods = PeriodStats.standard(current_user.id, 'month', 'year', today=today)
+    month_income = periods['month']['income']
+    month_expenses = periods['month']['expenses']
+    year_income = periods['year']['income']
+    year_expenses = periods['year']['expenses']
     
     content = f"""
     <div class="d-flex justify-content-between align-items-center mb-4">
@@ -253,9 +247,30 @@ def index():
                         <i class="bi bi-download text-secondary"></i> Datenexport
                     </h5>
                     <p class="card-text">Komplette Daten als CSV/Excel</p>
-                    <a href="{url_for('reports.export_data')}" class="btn btn-secondary w-100">
-                        <i class="bi bi-database"></i> Daten exportieren
-                    </a>
+                    <div class="btn-group w-100 mb-2">
+                        <a href="{url_for('reports.export_data')}" class="btn btn-secondary">
+                            <i class="bi bi-database"></i> Alles (JSON)
+                        </a>
+                        <a href="{url_for('reports.export_data', format='csv')}" class="btn btn-secondary">
+                            Alles (CSV)
+                        </a>
+                    </div>
+                    <div class="btn-group w-100 mb-2">
+                        <a href="{url_for('reports.export_dataset', dataset='entries')}" class="btn btn-outline-secondary btn-sm">
+                            Einnahmen CSV
+                        </a>
+                        <a href="{url_for('reports.export_dataset', dataset='entries', format='xlsx')}" class="btn btn-outline-secondary btn-sm">
+                            Einnahmen Excel
+                        </a>
+                    </div>
+                    <div class="btn-group w-100">
+                        <a href="{url_for('reports.export_dataset', dataset='expenses')}" class="btn btn-outline-secondary btn-sm">
+                            Ausgaben CSV
+                        </a>
+                        <a href="{url_for('reports.export_dataset', dataset='expenses', format='xlsx')}" class="btn btn-outline-secondary btn-sm">
+                            Ausgaben Excel
+                        </a>
+                    </div>
                 </div>
             </div>
         </div>
@@ -286,31 +301,18 @@ def index():
     )
 
 
-@reports_bp.route('/monthly', methods=['POST'])
-@login_required
-def monthly_report():
-    """Monatsbericht generieren"""
-    month = int(request.form.get('month', datetime.now().month))
-    year = int(request.form.get('year', datetime.now().year))
-    format_type = request.form.get('format', 'pdf')
-    
-    # Daten sammeln
-    start_date = date(year, month, 1)
-    if month == 12:
-        end_date = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        end_date = date(year, month + 1, 1) - timedelta(days=1)
-    
+def collect_monthly_data(owner_id, start_date, end_date):
+    """Einnahmen, Ausgaben und Geräte-Performance für einen Monatsbericht"""
     # Einnahmen
-    entries = Entry.query.join(Device).filter(
-        Device.owner_id == current_user.id,
+    entries = Entry.query.filter(
+        Entry.owner_id == owner_id,
         Entry.date >= start_date,
         Entry.date <= end_date
     ).order_by(Entry.date).all()
     
     # Ausgaben
     expenses = Expense.query.filter(
-        Expense.user_id == current_user.id,
+        Expense.user_id == owner_id,
         Expense.date >= start_date,
         Expense.date <= end_date
     ).order_by(Expense.date).all()
@@ -321,23 +323,92 @@ def monthly_report():
         func.sum(Entry.amount).label('total'),
         func.count(Entry.id).label('count')
     ).join(Entry).filter(
-        Device.owner_id == current_user.id,
+        Entry.owner_id == owner_id,
         Entry.date >= start_date,
         Entry.date <= end_date
     ).group_by(Device.id, Device.name).all()
     
-    if format_type == 'excel':
-        return generate_excel_report(
-            f'Monatsbericht_{month}_{year}',
-            entries, expenses, device_stats,
-            start_date, end_date
-        )
+    return entries, expenses, device_stats
+
+
+def collect_device_data(owner_id, device_id, start_date, end_date):
+    """Kennzahlen je Gerät für einen Gerätebericht"""
+    devices = Device.query.filter_by(owner_id=owner_id)
+    if device_id != 'all':
+        devices = devices.filter_by(id=int(device_id))
+    devices = devices.all()
+    
+    summary = FleetSummary.for_owner(
+        owner_id,
+        device_ids=[d.id for d in devices],
+        start_date=start_date,
+        end_date=end_date
+    )
+    
+    device_data = []
+    for device in devices:
+        stats = summary[device.id]
+        
+        device_data.append({
+            'device': device,
+            'income': stats.revenue,
+            'expenses': stats.expenses,
+            'profit': stats.profit,
+            'entries': stats.entry_count,
+            'avg_daily': stats.revenue / ((end_date - start_date).days or 1)
+        })
+    
+    return device_data
+
+
+def queue_report(report_type, name, filename, start_date, end_date, parameters):
+    """Report-Datensatz anlegen und Generierung im Hintergrund starten"""
+    report = Report(
+        user_id=current_user.id,
+        name=name,
+        type=report_type,
+        period_start=start_date,
+        period_end=end_date,
+        parameters=dict(parameters, filename=filename),
+        statistics={'status': 'queued', 'progress': 0}
+    )
+    db.session.add(report)
+    db.session.commit()
+    
+    enqueue('reports.generate', report.id)
+    
+    if request.is_json or request.accept_mimetypes.best == 'application/json':
+        return jsonify({
+            'report_id': report.id,
+            'status_url': url_for('reports.report_status', report_id=report.id),
+            'download_url': url_for('reports.download_report', report_id=report.id)
+        }), 202
+    
+    return redirect(url_for('reports.report_job', report_id=report.id))
+
+
+@reports_bp.route('/monthly', methods=['POST'])
+@login_required
+def monthly_report():
+    """Monatsbericht generieren"""
+    month = int(request.form.get('month', datetime.now().month))
+    year = int(request.form.get('year', datetime.now().year))
+    format_type = request.form.get('format', 'pdf')
+    
+    start_date = date(year, month, 1)
+    if month == 12:
+        end_date = date(year + 1, 1, 1) - timedelta(days=1)
     else:
-        return generate_pdf_report(
-            f'Monatsbericht {month}/{year}',
-            entries, expenses, device_stats,
-            start_date, end_date
-        )
+        end_date = date(year, month + 1, 1) - timedelta(days=1)
+    
+    extension = 'xlsx' if format_type == 'excel' else 'pdf'
+    return queue_report(
+        'monthly',
+        f'Monatsbericht {month}/{year}',
+        f'Monatsbericht_{month}_{year}.{extension}',
+        start_date, end_date,
+        {'format': format_type, 'month': month, 'year': year}
+    )
 
 
 @reports_bp.route('/yearly', methods=['POST'])
@@ -347,38 +418,14 @@ def yearly_report():
     year = int(request.form.get('year', datetime.now().year))
     format_type = request.form.get('format', 'pdf')
     
-    # Monatsweise Daten sammeln
-    monthly_data = []
-    for month in range(1, 13):
-        start_date = date(year, month, 1)
-        if month == 12:
-            end_date = date(year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = date(year, month + 1, 1) - timedelta(days=1)
-        
-        month_income = Entry.query.join(Device).filter(
-            Device.owner_id == current_user.id,
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).with_entities(func.sum(Entry.amount)).scalar() or 0
-        
-        month_expenses = Expense.query.filter(
-            Expense.user_id == current_user.id,
-            Expense.date >= start_date,
-            Expense.date <= end_date
-        ).with_entities(func.sum(Expense.amount)).scalar() or 0
-        
-        monthly_data.append({
-            'month': datetime(year, month, 1).strftime('%B'),
-            'income': month_income,
-            'expenses': month_expenses,
-            'profit': month_income - month_expenses
-        })
-    
-    if format_type == 'excel':
-        return generate_yearly_excel(year, monthly_data)
-    else:
-        return generate_yearly_pdf(year, monthly_data)
+    extension = 'xlsx' if format_type == 'excel' else 'pdf'
+    return queue_report(
+        'yearly',
+        f'Jahresbericht {year}',
+        f'Jahresbericht_{year}.{extension}',
+        date(year, 1, 1), date(year, 12, 31),
+        {'format': format_type, 'year': year}
+    )
 
 
 @reports_bp.route('/device', methods=['POST'])
@@ -398,41 +445,230 @@ def device_report():
     else:  # year
         start_date = end_date - timedelta(days=365)
     
-    if device_id == 'all':
-        devices = Device.query.filter_by(owner_id=current_user.id).all()
+    if device_id != 'all':
+        Device.query.filter_by(id=device_id, owner_id=current_user.id).first_or_404()
+    
+    extension = 'xlsx' if format_type == 'excel' else 'pdf'
+    return queue_report(
+        'device',
+        'Gerätebericht',
+        f'Geraetebericht_{start_date.strftime("%Y%m%d")}.{extension}',
+        start_date, end_date,
+        {'format': format_type, 'device_id': device_id, 'period': period}
+    )
+
+
+# ============================================================================
+# HINTERGRUND-GENERIERUNG
+# ============================================================================
+
+def _set_report_status(report, status, progress, **extra):
+    """Status/Fortschritt im statistics-JSON ablegen und sofort committen"""
+    report.statistics = dict(report.statistics or {}, status=status, progress=progress, **extra)
+    db.session.commit()
+
+
+def _build_monthly_report(report, output, progress):
+    entries, expenses, device_stats = collect_monthly_data(
+        report.user_id, report.period_start, report.period_end
+    )
+    progress(50)
+    
+    if report.parameters.get('format') == 'excel':
+        render_excel_report(output, report.name, entries, expenses, device_stats,
+                            report.period_start, report.period_end)
     else:
-        devices = [Device.query.get(device_id)]
+        render_pdf_report(output, report.name, entries, expenses, device_stats,
+                          report.period_start, report.period_end)
+    
+    return {
+        'income': float(sum(e.amount for e in entries)),
+        'expenses': float(sum(e.amount for e in expenses)),
+        'entry_count': len(entries),
+        'expense_count': len(expenses)
+    }
+
+
+def _build_yearly_report(report, output, progress):
+    year = report.parameters['year']
+    monthly_data = ReportData.year_series(report.user_id, year)
+    progress(50)
     
-    device_data = []
-    for device in devices:
-        entries = Entry.query.filter(
-            Entry.device_id == device.id,
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).all()
+    if report.parameters.get('format') == 'excel':
+        render_yearly_excel(output, year, monthly_data)
+    else:
+        render_yearly_pdf(output, year, monthly_data)
+    
+    return {
+        'income': float(sum(d['income'] for d in monthly_data)),
+        'expenses': float(sum(d['expenses'] for d in monthly_data))
+    }
+
+
+def _build_device_report(report, output, progress):
+    device_data = collect_device_data(
+        report.user_id, report.parameters.get('device_id', 'all'),
+        report.period_start, report.period_end
+    )
+    progress(50)
+    
+    if report.parameters.get('format') == 'excel':
+        render_device_excel(output, device_data, report.period_start, report.period_end)
+    else:
+        render_device_pdf(output, device_data, report.period_start, report.period_end)
+    
+    return {
+        'income': float(sum(d['income'] for d in device_data)),
+        'expenses': float(sum(d['expenses'] for d in device_data)),
+        'device_count': len(device_data)
+    }
+
+
+REPORT_BUILDERS = {
+    'monthly': _build_monthly_report,
+    'yearly': _build_yearly_report,
+    'device': _build_device_report,
+}
+
+
+@job('reports.generate')
+def generate_report(report_id):
+    """Report-Datei erzeugen und am Report-Datensatz ablegen (läuft im Hintergrund)"""
+    report = Report.query.get(report_id)
+    if not report:
+        return
+    
+    started = time.monotonic()
+    _set_report_status(report, 'running', 5)
+    
+    try:
+        folder = os.path.join(current_app.config['REPORTS_FOLDER'], str(report.user_id))
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{report.id}_{secure_filename(report.parameters['filename'])}")
         
-        expenses = Expense.query.filter(
-            Expense.device_id == device.id,
-            Expense.date >= start_date,
-            Expense.date <= end_date
-        ).all()
+        with open(path, 'wb') as output:
+            statistics = REPORT_BUILDERS[report.type](
+                report, output, lambda progress: _set_report_status(report, 'running', progress)
+            )
         
-        total_income = sum(e.amount for e in entries)
-        total_expenses = sum(e.amount for e in expenses)
+        report.file_path = path
+        report.file_size = os.path.getsize(path)
+        report.generated_at = datetime.utcnow()
+        _set_report_status(report, 'done', 100, duration=round(time.monotonic() - started, 3), **statistics)
+        metrics.observe_report(report.type, 'done', time.monotonic() - started)
         
-        device_data.append({
-            'device': device,
-            'income': total_income,
-            'expenses': total_expenses,
-            'profit': total_income - total_expenses,
-            'entries': len(entries),
-            'avg_daily': total_income / ((end_date - start_date).days or 1)
-        })
+    except Exception as e:
+        db.session.rollback()
+        report = Report.query.get(report_id)
+        _set_report_status(report, 'failed', 100, error=str(e))
+        metrics.observe_report(report.type, 'failed', time.monotonic() - started)
+        raise
+
+
+@reports_bp.route('/jobs/<int:report_id>')
+@login_required
+def report_job(report_id):
+    """Statusseite für einen Report in Arbeit"""
+    report = Report.query.filter_by(id=report_id, user_id=current_user.id).first_or_404()
     
-    if format_type == 'excel':
-        return generate_device_excel(device_data, start_date, end_date)
-    else:
-        return generate_device_pdf(device_data, start_date, end_date)
+    content = f"""
+    <div class="d-flex justify-content-between align-items-center mb-4">
+        <h2 class="text-white">
+            <i class="bi bi-hourglass-split"></i> {report.name}
+        </h2>
+    </div>
+
+    <div class="card">
+        <div class="card-body">
+            <p id="reportStatus" class="mb-3">Bericht wird erstellt...</p>
+            <div class="progress mb-3" style="height: 24px;">
+                <div id="reportProgress" class="progress-bar progress-bar-striped progress-bar-animated"
+                     role="progressbar" style="width: 0%">0%</div>
+            </div>
+            <a id="reportDownload" href="{url_for('reports.download_report', report_id=report.id)}"
+               class="btn btn-success d-none">
+                <i class="bi bi-download"></i> Herunterladen
+            </a>
+            <a href="{url_for('reports.index')}" class="btn btn-outline-secondary">Zurück zu Berichten</a>
+        </div>
+    </div>
+
+    <script>
+    function pollReport() {{
+        fetch('{url_for('reports.report_status', report_id=report.id)}')
+            .then(response => response.json())
+            .then(data => {{
+                const bar = document.getElementById('reportProgress');
+                bar.style.width = data.progress + '%';
+                bar.textContent = data.progress + '%';
+                
+                if (data.status === 'done') {{
+                    bar.classList.remove('progress-bar-animated');
+                    bar.classList.add('bg-success');
+                    document.getElementById('reportStatus').textContent = 'Bericht ist fertig.';
+                    document.getElementById('reportDownload').classList.remove('d-none');
+                    window.location = data.download_url;
+                }} else if (data.status === 'failed') {{
+                    bar.classList.remove('progress-bar-animated');
+                    bar.classList.add('bg-danger');
+                    document.getElementById('reportStatus').textContent = 'Fehler: ' + data.error;
+                }} else {{
+                    setTimeout(pollReport, 1000);
+                }}
+            }});
+    }}
+    pollReport();
+    </script>
+    """
+    
+    from app.web.dashboard_modern import render_modern_template
+    
+    return render_modern_template(
+        content=content,
+        title=report.name,
+        active_module='reports',
+        breadcrumb=[
+            {'text': 'Dashboard', 'url': url_for('dashboard_modern.dashboard')},
+            {'text': 'Berichte', 'url': url_for('reports.index')},
+            {'text': report.name}
+        ]
+    )
+
+
+@reports_bp.route('/jobs/<int:report_id>/status')
+@login_required
+def report_status(report_id):
+    """Status/Fortschritt eines Reports (Polling)"""
+    report = Report.query.filter_by(id=report_id, user_id=current_user.id).first_or_404()
+    statistics = report.statistics or {}
+    
+    return jsonify({
+        'report_id': report.id,
+        'name': report.name,
+        'status': statistics.get('status', 'done' if report.file_path else 'queued'),
+        'progress': statistics.get('progress', 0),
+        'error': statistics.get('error'),
+        'file_size': report.file_size,
+        'generated_at': report.generated_at.isoformat() if report.file_path and report.generated_at else None,
+        'download_url': url_for('reports.download_report', report_id=report.id) if report.file_path else None
+    })
+
+
+@reports_bp.route('/jobs/<int:report_id>/download')
+@login_required
+def download_report(report_id):
+    """Fertigen Report herunterladen"""
+    report = Report.query.filter_by(id=report_id, user_id=current_user.id).first_or_404()
+    
+    if not report.file_path or not os.path.exists(report.file_path):
+        flash('Der Bericht ist noch nicht fertig.', 'warning')
+        return redirect(url_for('reports.report_job', report_id=report.id))
+    
+    return send_file(
+        report.file_path,
+        as_attachment=True,
+        download_name=report.parameters.get('filename', os.path.basename(report.file_path))
+    )
 
 
 @reports_bp.route('/product-analysis')
@@ -440,24 +676,31 @@ def device_report():
 def product_analysis():
     """Produktanalyse-Seite"""
     products = Product.query.filter_by(user_id=current_user.id).all()
+    stock_levels = Product.get_stock_levels(p.id for p in products)
+    
+    # Verbrauch aller Produkte in einer Abfrage
+    refill_totals = {
+        row.product_id: (row.total_quantity, row.total_value)
+        for row in db.session.query(
+            RefillItem.product_id,
+            func.sum(RefillItem.quantity).label('total_quantity'),
+            func.sum(RefillItem.total_price).label('total_value')
+        ).join(Refill).filter(
+            Refill.user_id == current_user.id
+        ).group_by(RefillItem.product_id)
+    }
     
     product_stats = []
     for product in products:
-        # Verbrauch berechnen
-        refill_items = RefillItem.query.join(Refill).filter(
-            RefillItem.product_id == product.id,
-            Refill.user_id == current_user.id
-        ).all()
-        
-        total_quantity = sum(item.quantity for item in refill_items)
-        total_value = sum(item.total_price for item in refill_items)
+        total_quantity, total_value = refill_totals.get(product.id, (0, 0))
+        current_stock = stock_levels[product.id]
         
         product_stats.append({
             'product': product,
             'total_quantity': total_quantity,
             'total_value': total_value,
-            'current_stock': product.get_current_stock(),
-            'turnover_rate': (total_quantity / product.get_current_stock()) if product.get_current_stock() > 0 else 0
+            'current_stock': current_stock,
+            'turnover_rate': (total_quantity / current_stock) if current_stock > 0 else 0
         })
     
     # Nach Wert sortieren
@@ -542,44 +785,16 @@ def product_analysis():
 @login_required
 def cashflow():
     """Cashflow-Analyse"""
-    # Letzten 12 Monate
-    months = []
-    for i in range(11, -1, -1):
-        month_date = date.today().replace(day=1) - timedelta(days=i*30)
-        months.append(month_date)
-    
-    cashflow_data = []
-    cumulative = 0
-    
-    for month_date in months:
-        start_date = month_date.replace(day=1)
-        if month_date.month == 12:
-            end_date = date(month_date.year + 1, 1, 1) - timedelta(days=1)
-        else:
-            end_date = date(month_date.year, month_date.month + 1, 1) - timedelta(days=1)
-        
-        income = Entry.query.join(Device).filter(
-            Device.owner_id == current_user.id,
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).with_entities(func.sum(Entry.amount)).scalar() or 0
-        
-        expenses = Expense.query.filter(
-            Expense.user_id == current_user.id,
-            Expense.date >= start_date,
-            Expense.date <= end_date
-        ).with_entities(func.sum(Expense.amount)).scalar() or 0
-        
-        net = income - expenses
-        cumulative += net
-        
-        cashflow_data.append({
-            'month': month_date.strftime('%b %Y'),
-            'income': float(income),
-            'expenses': float(expenses),
-            'net': float(net),
-            'cumulative': float(cumulative)
-        })
+    # Letzte n Monate (Standard 12), eine Abfrage je Tabelle
+    month_count = min(max(request.args.get('months', 12, type=int), 1), 120)
+    
+    cashflow_data = [{
+        'month': row['month'],
+        'income': float(row['income']),
+        'expenses': float(row['expenses']),
+        'net': float(row['profit']),
+        'cumulative': float(row['cumulative'])
+    } for row in ReportData.trailing_months(current_user.id, month_count)]
     
     content = f"""
     <div class="d-flex justify-content-between align-items-center mb-4">
@@ -672,7 +887,7 @@ def cashflow():
                 }},
                 title: {{
                     display: true,
-                    text: 'Cashflow Verlauf (12 Monate)'
+                    text: 'Cashflow Verlauf ({month_count} Monate)'
                 }}
             }},
             scales: {{
@@ -705,8 +920,8 @@ def cashflow():
     )
 
 
-def generate_excel_report(title, entries, expenses, device_stats, start_date, end_date):
-    """Excel-Report generieren"""
+def render_excel_report(output, title, entries, expenses, device_stats, start_date, end_date):
+    """Excel-Report in output schreiben"""
     wb = openpyxl.Workbook()
     
     # Übersicht Sheet
@@ -757,23 +972,12 @@ def generate_excel_report(title, entries, expenses, device_stats, start_date, en
         ws3[f'C{i}'] = float(expense.amount)
         ws3[f'D{i}'] = expense.description
     
-    # Speichern und senden
-    output = io.BytesIO()
     wb.save(output)
-    output.seek(0)
-    
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=f'{title}.xlsx'
-    )
 
 
-def generate_pdf_report(title, entries, expenses, device_stats, start_date, end_date):
-    """PDF-Report generieren"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
+def render_pdf_report(output, title, entries, expenses, device_stats, start_date, end_date):
+    """PDF-Report in output schreiben"""
+    doc = SimpleDocTemplate(output, pagesize=A4)
     elements = []
     styles = getSampleStyleSheet()
     
@@ -821,18 +1025,10 @@ def generate_pdf_report(title, entries, expenses, device_stats, start_date, end_
     
     # Build PDF
     doc.build(elements)
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'{title}.pdf'
-    )
 
 
-def generate_yearly_excel(year, monthly_data):
-    """Jahres-Excel generieren"""
+def render_yearly_excel(output, year, monthly_data):
+    """Jahres-Excel in output schreiben"""
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = f"Jahresbericht {year}"
@@ -860,22 +1056,12 @@ def generate_yearly_excel(year, monthly_data):
     ws[f'C{16}'] = sum(d['expenses'] for d in monthly_data)
     ws[f'D{16}'] = sum(d['profit'] for d in monthly_data)
     
-    output = io.BytesIO()
     wb.save(output)
-    output.seek(0)
-    
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=f'Jahresbericht_{year}.xlsx'
-    )
 
 
-def generate_yearly_pdf(year, monthly_data):
-    """Jahres-PDF generieren"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=landscape(A4))
+def render_yearly_pdf(output, year, monthly_data):
+    """Jahres-PDF in output schreiben"""
+    doc = SimpleDocTemplate(output, pagesize=landscape(A4))
     elements = []
     styles = getSampleStyleSheet()
     
@@ -917,18 +1103,10 @@ def generate_yearly_pdf(year, monthly_data):
     
     elements.append(table)
     doc.build(elements)
-    buffer.seek(0)
-    
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'Jahresbericht_{year}.pdf'
-    )
 
 
-def generate_device_excel(device_data, start_date, end_date):
-    """Geräte-Excel generieren"""
+def render_device_excel(output, device_data, start_date, end_date):
+    """Geräte-Excel in output schreiben"""
     wb = openpyxl.Workbook()
     ws = wb.active
     ws.title = "Gerätebericht"
@@ -952,22 +1130,12 @@ def generate_device_excel(device_data, start_date, end_date):
         ws[f'E{i}'] = data['entries']
         ws[f'F{i}'] = float(data['avg_daily'])
     
-    output = io.BytesIO()
     wb.save(output)
-    output.seek(0)
-    
-    return send_file(
-        output,
-        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-        as_attachment=True,
-        download_name=f'Geraetebericht_{start_date.strftime("%Y%m%d")}.xlsx'
-    )
 
 
-def generate_device_pdf(device_data, start_date, end_date):
-    """Geräte-PDF generieren"""
-    buffer = io.BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=A4)
+def render_device_pdf(output, device_data, start_date, end_date):
+    """Geräte-PDF in output schreiben"""
+    doc = SimpleDocTemplate(output, pagesize=A4)
     elements = []
     styles = getSampleStyleSheet()
     
@@ -1000,23 +1168,60 @@ def generate_device_pdf(device_data, start_date, end_date):
     
     elements.append(table)
     doc.build(elements)
-    buffer.seek(0)
+
+
+def _parse_date_arg(name):
+    """Optionales Datum (YYYY-MM-DD) aus der Query, 400 bei ungültigem Wert"""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        abort(400, f'Ungültiges Datum für {name}: {value}')
+
+
+@reports_bp.route('/export/<dataset>')
+@login_required
+def export_dataset(dataset):
+    """Einnahmen/Ausgaben als CSV oder Excel streamen (?format=csv|xlsx&start=&end=)"""
+    if dataset not in EXPORT_DATASETS:
+        abort(404)
+    
+    fmt = 'xlsx' if request.args.get('format') in ('xlsx', 'excel') else 'csv'
+    body, mimetype, extension = export_stream(
+        dataset, current_user.id, fmt,
+        start_date=_parse_date_arg('start'),
+        end_date=_parse_date_arg('end')
+    )
     
-    return send_file(
-        buffer,
-        mimetype='application/pdf',
-        as_attachment=True,
-        download_name=f'Geraetebericht_{start_date.strftime("%Y%m%d")}.pdf'
+    filename = f'{dataset}_{datetime.now().strftime("%Y%m%d_%H%M%S")}.{extension}'
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            # Nginx soll den Stream nicht puffern
+            'X-Accel-Buffering': 'no'
+        }
     )
 
 
 @reports_bp.route('/export-data')
 @login_required
 def export_data():
-    """Kompletter Datenexport"""
-    # Implementierung folgt
-    flash('Datenexport wird vorbereitet...', 'info')
-    return redirect(url_for('reports.index'))
+    """Kompletter Datenexport aller eigenen Tabellen als Zip (?format=ndjson|csv)"""
+    fmt = 'csv' if request.args.get('format') == 'csv' else 'ndjson'
+    filename = f'export_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+    
+    return Response(
+        stream_with_context(full_export_stream(current_user.id, fmt)),
+        mimetype=ZIP_MIMETYPE,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
+        }
+    )
 
 
 @reports_bp.route('/quick')
@@ -4,12 +4,15 @@ Einstellungen-Modul für Automaten Manager
 Vollständige Implementation mit Unternehmensdaten, Sicherheit, Backup und System-Einstellungen
 """
 
-from flask import Blueprint, render_template_string, redirect, url_for, flash, request, jsonify, send_file, current_app
+from flask import (Blueprint, render_template_string, redirect, url_for, flash, request, jsonify, send_file,
+                   current_app, Response, stream_with_context)
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from decimal import Decimal
 from app import db
 from app.models import User, Device, Entry, Expense, Product, Refill
+from app.utils.streaming_export import ZIP_MIMETYPE, full_export_stream
+from app.utils import cache as aggregate_cache
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
 import os
@@ -527,15 +530,13 @@ def backup():
     <script>
     function createBackup() {{
         if (confirm('Möchten Sie jetzt ein Backup erstellen?')) {{
-            fetch('/settings/create-backup', {{method: 'POST'}})
-                .then(response => response.blob())
-                .then(blob => {{
-                    const url = window.URL.createObjectURL(blob);
-                    const a = document.createElement('a');
-                    a.href = url;
-                    a.download = 'backup_' + new Date().toISOString().split('T')[0] + '.zip';
-                    a.click();
-                }});
+            // Formular-POST statt fetch: der Browser speichert den Stream direkt
+            const form = document.createElement('form');
+            form.method = 'POST';
+            form.action = '/settings/create-backup';
+            document.body.appendChild(form);
+            form.submit();
+            form.remove();
         }}
     }}
 
@@ -816,6 +817,7 @@ def system():
     total_size = db.session.execute(
         text("SELECT pg_database_size(current_database())")
     ).scalar() / (1024 * 1024)  # In MB
+    cache_stats = aggregate_cache.stats()
     
     content = f"""
     <div class="d-flex justify-content-between align-items-center mb-4">
@@ -840,10 +842,14 @@ def system():
                         <span>Größe:</span>
                         <strong>{total_size:.2f} MB</strong>
                     </div>
-                    <div class="d-flex justify-content-between mb-3">
+                    <div class="d-flex justify-content-between mb-2">
                         <span>Verbindungen:</span>
                         <strong>3 / 100</strong>
                     </div>
+                    <div class="d-flex justify-content-between mb-3">
+                        <span>Cache ({cache_stats['backend']}):</span>
+                        <strong>{cache_stats['hit_rate']:.1f}% Treffer ({cache_stats['hits']} / {cache_stats['hits'] + cache_stats['misses']})</strong>
+                    </div>
                     
                     <button class="btn btn-primary me-2" onclick="optimizeDatabase()">
                         <i class="bi bi-speedometer"></i> Optimieren
@@ -1406,10 +1412,15 @@ def optimize_db():
 @settings_bp.route('/clear-cache', methods=['POST'])
 @login_required
 def clear_cache():
-    """Cache leeren"""
+    """Kennzahlen-Cache leeren (Administratoren: komplett, sonst eigene Kennzahlen)"""
     try:
-        # Hier würde man den Cache leeren
-        return jsonify({'success': True, 'message': 'Cache wurde geleert!'})
+        if current_user.is_admin:
+            count = aggregate_cache.clear()
+            message = f'Cache wurde geleert! ({count} Einträge)'
+        else:
+            aggregate_cache.invalidate_owner(current_user.id)
+            message = 'Cache wurde geleert!'
+        return jsonify({'success': True, 'message': message, 'stats': aggregate_cache.stats()})
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)})
 
@@ -1430,40 +1441,13 @@ def regenerate_api_key():
 @settings_bp.route('/create-backup', methods=['POST'])
 @login_required
 def create_backup():
-    """Backup erstellen"""
-    try:
-        # Backup-Daten sammeln
-        backup_data = {
-            'user': current_user.id,
-            'date': datetime.now().isoformat(),
-            'devices': [],
-            'products': [],
-            'entries': [],
-            'expenses': []
+    """Backup erstellen - alle eigenen Daten als Zip (NDJSON je Tabelle), gestreamt"""
+    filename = f'backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
+    return Response(
+        stream_with_context(full_export_stream(current_user.id)),
+        mimetype=ZIP_MIMETYPE,
+        headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'X-Accel-Buffering': 'no'
         }
-        
-        # Daten exportieren
-        devices = Device.query.filter_by(owner_id=current_user.id).all()
-        for device in devices:
-            backup_data['devices'].append({
-                'id': device.id,
-                'name': device.name,
-                'location': device.location,
-                'serial_number': device.serial_number
-            })
-        
-        # ZIP-Datei erstellen
-        memory_file = io.BytesIO()
-        with zipfile.ZipFile(memory_file, 'w', zipfile.ZIP_DEFLATED) as zf:
-            zf.writestr('backup.json', json.dumps(backup_data, indent=2))
-        
-        memory_file.seek(0)
-        
-        return send_file(
-            memory_file,
-            mimetype='application/zip',
-            as_attachment=True,
-            download_name=f'backup_{datetime.now().strftime("%Y%m%d_%H%M%S")}.zip'
-        )
-    except Exception as e:
-        return jsonify({'success': False, 'message': str(e)})
+    )
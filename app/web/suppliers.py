@@ -7,9 +7,10 @@ from flask import Blueprint, render_template_string, redirect, url_for, flash, r
 from flask_login import login_required, current_user
 from datetime import datetime, date, timedelta
 from decimal import Decimal
-from sqlalchemy import func, desc
 from app import db
-from app.models import Supplier, Refill, RefillItem, Product
+from app.models import Supplier, Refill
+from app.utils.pagination import paginate_request, pager_html
+from app.utils.supplier_stats import supplier_stats, supplier_overview, order_history
 suppliers_bp = Blueprint('suppliers', __name__, url_prefix='/suppliers')
 
 # Import render_modern_template am Ende der Datei
@@ -19,48 +20,18 @@ suppliers_bp = Blueprint('suppliers', __name__, url_prefix='/suppliers')
 @login_required
 def index():
     """Lieferanten-Übersicht"""
-    suppliers = Supplier.query.filter_by(user_id=current_user.id).all()
-
-    # Statistiken für jeden Lieferanten berechnen
-    supplier_stats = []
-    for supplier in suppliers:
-        refills = Refill.query.filter_by(
-            supplier_id=supplier.id,
-            user_id=current_user.id
-        ).all()
+    page = paginate_request(
+        Supplier.query.filter_by(user_id=current_user.id),
+        order_by=[Supplier.name.asc(), Supplier.id.asc()],
+        per_page=30
+    )
+    suppliers = page.items
 
-        total_orders = len(refills)
-        total_amount = sum(r.total_amount for r in refills) if refills else 0
+    # Übersicht über alle Lieferanten (nicht nur die aktuelle Seite)
+    supplier_count, all_orders, all_amount = supplier_overview(current_user.id)
 
-        # Letzte Bestellung
-        last_order = Refill.query.filter_by(
-            supplier_id=supplier.id,
-            user_id=current_user.id
-        ).order_by(Refill.date.desc()).first()
-
-        # Top-Produkte von diesem Lieferanten
-        top_products = db.session.query(
-            Product.name,
-            func.sum(RefillItem.quantity).label('total_quantity'),
-            func.sum(RefillItem.total_price).label('total_spent')
-        ).join(
-            RefillItem, RefillItem.product_id == Product.id
-        ).join(
-            Refill, RefillItem.refill_id == Refill.id
-        ).filter(
-            Refill.supplier_id == supplier.id,
-            Refill.user_id == current_user.id
-        ).group_by(Product.id, Product.name).order_by(
-            desc('total_spent')
-        ).limit(3).all()
-
-        supplier_stats.append({
-            'supplier': supplier,
-            'total_orders': total_orders,
-            'total_amount': total_amount,
-            'last_order': last_order.date if last_order else None,
-            'top_products': top_products
-        })
+    # Statistiken für alle Lieferanten der Seite (zwei gruppierte Abfragen)
+    stats = supplier_stats(current_user.id, [supplier.id for supplier in suppliers])
 
     # JavaScript
     extra_scripts = """
@@ -163,7 +134,7 @@ def index():
             <div class="card bg-primary text-white">
                 <div class="card-body">
                     <h6>Anzahl Lieferanten</h6>
-                    <h3>""" + str(len(suppliers)) + """</h3>
+                    <h3>""" + str(supplier_count) + """</h3>
                 </div>
             </div>
         </div>
@@ -171,7 +142,7 @@ def index():
             <div class="card bg-success text-white">
                 <div class="card-body">
                     <h6>Gesamt-Umsatz</h6>
-                    <h3>""" + f"{sum(s['total_amount'] for s in supplier_stats):.2f} €" + """</h3>
+                    <h3>""" + f"{all_amount:.2f} €" + """</h3>
                 </div>
             </div>
         </div>
@@ -179,7 +150,7 @@ def index():
             <div class="card bg-info text-white">
                 <div class="card-body">
                     <h6>Bestellungen gesamt</h6>
-                    <h3>""" + str(sum(s['total_orders'] for s in supplier_stats)) + """</h3>
+                    <h3>""" + str(all_orders) + """</h3>
                 </div>
             </div>
         </div>
@@ -187,9 +158,7 @@ def index():
             <div class="card bg-warning text-white">
                 <div class="card-body">
                     <h6>Ø pro Bestellung</h6>
-                    <h3>""" + (
-        f"{sum(s['total_amount'] for s in supplier_stats) / sum(s['total_orders'] for s in supplier_stats):.2f} €" if sum(
-            s['total_orders'] for s in supplier_stats) > 0 else "0.00 €") + """</h3>
+                    <h3>""" + (f"{all_amount / all_orders:.2f} €" if all_orders > 0 else "0.00 €") + """</h3>
                 </div>
             </div>
         </div>
@@ -199,8 +168,8 @@ def index():
     <div class="row">
     """
 
-    for stat in supplier_stats:
-        supplier = stat['supplier']
+    for supplier in suppliers:
+        stat = stats[supplier.id]
         content += f"""
         <div class="col-md-6 col-lg-4 mb-4">
             <div class="card supplier-card" onclick="viewSupplierDetails({supplier.id})">
@@ -225,13 +194,13 @@ def index():
                     <div class="row">
                         <div class="col-6">
                             <div class="stat-box text-center">
-                                <div class="stat-value">{stat['total_orders']}</div>
+                                <div class="stat-value">{stat.total_orders}</div>
                                 <div class="stat-label">Bestellungen</div>
                             </div>
                         </div>
                         <div class="col-6">
                             <div class="stat-box text-center">
-                                <div class="stat-value">{stat['total_amount']:.0f}€</div>
+                                <div class="stat-value">{stat.total_amount:.0f}€</div>
                                 <div class="stat-label">Gesamtumsatz</div>
                             </div>
                         </div>
@@ -240,7 +209,7 @@ def index():
                     <div class="mt-3">
                         <small class="text-muted">
                             <i class="bi bi-calendar"></i> Letzte Bestellung: 
-                            {stat['last_order'].strftime('%d.%m.%Y') if stat['last_order'] else 'Noch keine'}
+                            {stat.last_order.strftime('%d.%m.%Y') if stat.last_order else 'Noch keine'}
                         </small>
                     </div>
 
@@ -248,8 +217,8 @@ def index():
                         <small class="text-muted">Top-Produkte:</small>
         """
 
-        if stat['top_products']:
-            for product in stat['top_products'][:3]:
+        if stat.top_products:
+            for product in stat.top_products[:3]:
                 content += f"""
                         <div class="top-product">
                             {product.name}: {product.total_quantity:.0f} Stk - {product.total_spent:.2f} €
@@ -276,9 +245,12 @@ def index():
         </div>
         """
 
-    content += """
+    content += f"""
     </div>
+    {pager_html(page, 'Lieferanten')}
+    """
 
+    content += """
     <!-- Neuer Lieferant Modal -->
     <div class="modal fade" id="addSupplierModal" tabindex="-1">
         <div class="modal-dialog">
@@ -372,10 +344,10 @@ def index():
     from app.web.dashboard_modern import render_modern_template
     
     # Kombiniere Content, Scripts und CSS
-    full_content = extra_css + content + extra_scripts
-    
     return render_modern_template(
-        content=full_content,
+        content=content,
+        extra_css=extra_css,
+        extra_scripts=extra_scripts,
         title='Lieferanten',
         active_module='inventory',
         active_submodule='suppliers',
@@ -469,11 +441,9 @@ def supplier_details(supplier_id):
         user_id=current_user.id
     ).first_or_404()
 
-    # Alle Bestellungen von diesem Lieferanten
-    refills = Refill.query.filter_by(
-        supplier_id=supplier_id,
-        user_id=current_user.id
-    ).order_by(Refill.date.desc()).all()
+    # Kennzahlen und Bestellungen mit Positionsanzahl (gruppierte Abfragen)
+    stat = supplier_stats(current_user.id, [supplier_id], top_n=5)[supplier_id]
+    refills = order_history(current_user.id, supplier_id)
 
     content = f"""
     <div class="container">
@@ -481,6 +451,29 @@ def supplier_details(supplier_id):
             <i class="bi bi-building"></i> {supplier.name}
         </h2>
 
+        <div class="row mb-4">
+            <div class="col-md-3">
+                <div class="card"><div class="card-body text-center">
+                    <h3>{stat.total_orders}</h3><small class="text-muted">Bestellungen</small>
+                </div></div>
+            </div>
+            <div class="col-md-3">
+                <div class="card"><div class="card-body text-center">
+                    <h3>{stat.total_amount:.2f} €</h3><small class="text-muted">Gesamtumsatz</small>
+                </div></div>
+            </div>
+            <div class="col-md-3">
+                <div class="card"><div class="card-body text-center">
+                    <h3>{stat.average_order:.2f} €</h3><small class="text-muted">Ø Bestellwert</small>
+                </div></div>
+            </div>
+            <div class="col-md-3">
+                <div class="card"><div class="card-body text-center">
+                    <h3>{stat.last_order.strftime('%d.%m.%Y') if stat.last_order else '—'}</h3><small class="text-muted">Letzte Bestellung</small>
+                </div></div>
+            </div>
+        </div>
+
         <div class="row">
             <div class="col-md-4">
                 <div class="card">
@@ -495,6 +488,18 @@ def supplier_details(supplier_id):
                         <p><strong>Notizen:</strong><br>{supplier.notes or '—'}</p>
                     </div>
                 </div>
+
+                <div class="card mt-3">
+                    <div class="card-header">
+                        <h5>Top-Produkte</h5>
+                    </div>
+                    <div class="card-body">
+                        {''.join(
+                            f'<div class="top-product">{product.name}: {product.total_quantity:.0f} Stk - {product.total_spent:.2f} €</div>'
+                            for product in stat.top_products
+                        ) or '<div class="text-muted small">Noch keine Bestellungen</div>'}
+                    </div>
+                </div>
             </div>
 
             <div class="col-md-8">
@@ -516,12 +521,12 @@ def supplier_details(supplier_id):
                             <tbody>
     """
 
-    for refill in refills:
+    for refill, item_count in refills:
         content += f"""
                                 <tr>
                                     <td>{refill.date.strftime('%d.%m.%Y')}</td>
                                     <td>{refill.invoice_number or '—'}</td>
-                                    <td>{refill.items.count()}</td>
+                                    <td>{item_count}</td>
                                     <td>{refill.total_amount:.2f} €</td>
                                     <td>
                                         <a href="/refills/view/{refill.id}" class="btn btn-sm btn-info">
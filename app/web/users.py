@@ -14,10 +14,12 @@ import string
 import csv
 import io
 from app import db
-from app.models import User, LoginLog, AuditLog, AuditAction
+from app.models import User, LoginLog, LoginStat, AuditLog, AuditAction
+from app.utils.pagination import paginate_request, pager_html
+from app.utils import user_cache
 # Import wird später in den Funktionen gemacht, um zirkuläre Imports zu vermeiden
 from functools import wraps
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, func
 
 users_bp = Blueprint('users', __name__, url_prefix='/users')
 
@@ -73,6 +75,22 @@ def log_audit(action_type, details, entity_type='User', entity_id=None):
         pass
 
 
+def user_counts():
+    """Kennzahlen der Benutzerverwaltung in einer Abfrage"""
+    now = datetime.utcnow()
+    row = db.session.query(
+        func.count(User.id),
+        func.count(User.id).filter(User.is_active.is_(True)),
+        func.count(User.id).filter(User.is_admin.is_(True)),
+        func.count(User.id).filter(User.is_verified.is_(True)),
+        func.count(User.id).filter(User.two_factor_enabled.is_(True)),
+        func.count(User.id).filter(User.locked_until > now),
+        func.count(User.id).filter(User.created_at >= now - timedelta(days=30))
+    ).one()
+    keys = ('total', 'active', 'admins', 'verified', 'twofa', 'locked', 'new')
+    return dict(zip(keys, row))
+
+
 @users_bp.route('/')
 @login_required
 def index():
@@ -116,26 +134,29 @@ def index():
     elif filter_role == 'user':
         query = query.filter(User.is_admin == False)
 
-    # Sortierung
-    if sort_by == 'name_asc':
-        query = query.order_by(User.username.asc())
-    elif sort_by == 'name_desc':
-        query = query.order_by(User.username.desc())
-    elif sort_by == 'created_asc':
-        query = query.order_by(User.created_at.asc())
-    elif sort_by == 'created_desc':
-        query = query.order_by(User.created_at.desc())
-    elif sort_by == 'last_login':
-        query = query.order_by(User.last_login.desc().nullslast())
-
-    users = query.all()
+    # Sortierung (immer mit ID als eindeutigem Abschluss für die Keyset-Pagination)
+    sort_orders = {
+        'name_asc': [User.username.asc(), User.id.asc()],
+        'name_desc': [User.username.desc(), User.id.desc()],
+        'created_asc': [User.created_at.asc(), User.id.asc()],
+        'created_desc': [User.created_at.desc(), User.id.desc()],
+        'last_login': [func.coalesce(User.last_login, datetime(1970, 1, 1)).desc(), User.id.desc()],
+    }
+    page = paginate_request(
+        query,
+        order_by=sort_orders.get(sort_by, sort_orders['created_desc']),
+        per_page=30,
+        count='exact'
+    )
+    users = page.items
 
     # Statistiken
-    total_users = User.query.count()
-    active_users = User.query.filter_by(is_active=True).count()
-    admin_users = User.query.filter_by(is_admin=True).count()
-    verified_users = User.query.filter_by(is_verified=True).count()
-    locked_users = User.query.filter(User.locked_until > datetime.utcnow()).count() if User.query.first() else 0
+    counts = user_counts()
+    total_users = counts['total']
+    active_users = counts['active']
+    admin_users = counts['admins']
+    verified_users = counts['verified']
+    locked_users = counts['locked']
 
     content = f'''
     <div class="container-fluid">
@@ -245,7 +266,7 @@ def index():
                                 </button>
                             </div>
                         </form>
-                        {f'<div class="mt-2"><small class="text-muted">{len(users)} von {total_users} Benutzern angezeigt</small></div>' if search_query or filter_status != 'all' or filter_role != 'all' else ''}
+                        {f'<div class="mt-2"><small class="text-muted">{page.total} von {total_users} Benutzern gefunden</small></div>' if search_query or filter_status != 'all' or filter_role != 'all' else ''}
                     </div>
                 </div>
 
@@ -297,10 +318,9 @@ def index():
         # Avatar mit Initialen
         initials = user.full_name[:2].upper() if user.full_name else user.username[:2].upper()
 
-        # Letzte Aktivität
-        last_login = LoginLog.query.filter_by(user_id=user.id, success=True).order_by(LoginLog.timestamp.desc()).first()
-        if last_login:
-            time_diff = datetime.utcnow() - last_login.timestamp
+        # Letzte Aktivität (Zähler am User, werden bei jedem Login gepflegt)
+        if user.last_login:
+            time_diff = datetime.utcnow() - user.last_login
             if time_diff.days == 0:
                 if time_diff.seconds < 3600:
                     last_activity = f"Vor {time_diff.seconds // 60} Minuten"
@@ -314,7 +334,7 @@ def index():
             last_activity = "Noch nie eingeloggt"
 
         # Login-Anzahl
-        login_count = LoginLog.query.filter_by(user_id=user.id, success=True).count()
+        login_count = user.login_count or 0
 
         # Status-Badges
         badges = []
@@ -416,6 +436,8 @@ def index():
             </div>
         '''
 
+    content += f'<div class="col-12">{pager_html(page, "Benutzer")}</div>'
+
     content += '''
                 </div>
             </div>
@@ -1024,10 +1046,9 @@ def index():
         {'text': 'Benutzer'}
     ]
     
-    full_content = content + extra_scripts
-    
     return render_modern_template(
-        full_content,
+        content=content,
+        extra_scripts=extra_scripts,
         title="Benutzerverwaltung",
         active_module='settings',
         active_submodule='users',
@@ -1353,10 +1374,9 @@ def profile():
         {'text': 'Profil'}
     ]
     
-    full_content = content + extra_scripts
-    
     return render_modern_template(
-        full_content,
+        content=content,
+        extra_scripts=extra_scripts,
         title="Mein Profil",
         active_module='dashboard',
         breadcrumb=breadcrumb
@@ -1763,12 +1783,14 @@ def bulk_action():
         if action == 'activate':
             User.query.filter(User.id.in_(user_ids)).update({'is_active': True})
             db.session.commit()
+            user_cache.invalidate(user_ids)
             log_audit('BULK_ACTIVATE', f'{len(user_ids)} users activated')
             return jsonify({'success': True})
 
         elif action == 'deactivate':
             User.query.filter(User.id.in_(user_ids)).update({'is_active': False})
             db.session.commit()
+            user_cache.invalidate(user_ids)
             log_audit('BULK_DEACTIVATE', f'{len(user_ids)} users deactivated')
             return jsonify({'success': True})
 
@@ -1794,6 +1816,7 @@ def bulk_action():
 
             User.query.filter(User.id.in_(user_ids)).delete()
             db.session.commit()
+            user_cache.invalidate(user_ids)
             log_audit('BULK_DELETE', f'{len(user_ids)} users deleted')
             return jsonify({'success': True})
 
@@ -1941,10 +1964,13 @@ def user_details(user_id):
     try:
         user = User.query.get_or_404(user_id)
 
-        # Login-Statistiken
-        total_logins = LoginLog.query.filter_by(user_id=user_id, success=True).count()
-        failed_logins = LoginLog.query.filter_by(user_id=user_id, success=False).count()
-        last_login = LoginLog.query.filter_by(user_id=user_id, success=True).order_by(LoginLog.timestamp.desc()).first()
+        # Login-Statistiken (eine Abfrage)
+        total_logins, failed_logins, last_login = db.session.query(
+            func.count(LoginLog.id).filter(LoginLog.success.is_(True)),
+            func.count(LoginLog.id).filter(LoginLog.success.is_(False)),
+            func.max(LoginLog.timestamp).filter(LoginLog.success.is_(True))
+        ).filter(LoginLog.user_id == user_id).one()
+        last_login = last_login or user.last_login
 
         # Aktivitäten zählen
         activities = AuditLog.query.filter_by(user_id=user_id).count()
@@ -1961,7 +1987,7 @@ def user_details(user_id):
             'is_verified': user.is_verified,
             'two_factor_enabled': user.two_factor_enabled,
             'created_at': user.created_at.strftime('%d.%m.%Y %H:%M') if user.created_at else None,
-            'last_login': last_login.timestamp.strftime('%d.%m.%Y %H:%M') if last_login else None,
+            'last_login': last_login.strftime('%d.%m.%Y %H:%M') if last_login else None,
             'login_count': total_logins,
             'failed_login_count': failed_logins,
             'activity_count': activities,
@@ -2030,31 +2056,19 @@ def search_users():
 def user_stats():
     """Benutzer-Statistiken für Dashboard"""
     try:
-        # Basis-Statistiken
-        total_users = User.query.count()
-        active_users = User.query.filter_by(is_active=True).count()
-        admin_users = User.query.filter_by(is_admin=True).count()
-        verified_users = User.query.filter_by(is_verified=True).count()
-
-        # 2FA-Statistiken
-        twofa_users = User.query.filter_by(two_factor_enabled=True).count()
-
-        # Login-Statistiken (letzte 30 Tage)
-        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
-        recent_logins = LoginLog.query.filter(
-            LoginLog.timestamp >= thirty_days_ago,
-            LoginLog.success == True
-        ).count()
-
-        # Neue Benutzer (letzte 30 Tage)
-        new_users = User.query.filter(
-            User.created_at >= thirty_days_ago
-        ).count()
-
-        # Gesperrte Benutzer
-        locked_users = User.query.filter(
-            User.locked_until > datetime.utcnow()
-        ).count()
+        # Basis-, 2FA-, Sperr- und Neu-Statistiken (eine Abfrage)
+        counts = user_counts()
+        total_users = counts['total']
+        active_users = counts['active']
+        admin_users = counts['admins']
+        verified_users = counts['verified']
+        twofa_users = counts['twofa']
+        new_users = counts['new']
+        locked_users = counts['locked']
+
+        # Login-Statistiken (letzte 30 Tage) aus der Tageszusammenfassung
+        logins = LoginStat.totals(since=datetime.utcnow().date() - timedelta(days=30))
+        recent_logins = logins['success']
 
         return jsonify({
             'total_users': total_users,
@@ -2063,6 +2077,7 @@ def user_stats():
             'verified_users': verified_users,
             'twofa_users': twofa_users,
             'recent_logins': recent_logins,
+            'recent_failed_logins': logins['failure'],
             'new_users': new_users,
             'locked_users': locked_users,
             'active_percentage': round((active_users / total_users * 100) if total_users > 0 else 0, 1),
@@ -0,0 +1,17 @@
+"""
+Benchmarks für Automaten Manager
+Deterministischer Generator für synthetische Flotten-Daten (datagen) und
+wiederholbare Messungen der wichtigsten Endpoints (runner) mit
+Latenz-Perzentilen und Abfrageanzahl, als JSON speicher- und zwischen
+Commits vergleichbar (compare). Dazu ein Lasttest mit gleichzeitigen
+Benutzern gegen eine laufende Instanz (loadtest).
+
+    python -m benchmarks generate --profile medium --reset
+    python -m benchmarks run --output bench-$(git rev-parse --short HEAD).json
+    python -m benchmarks compare bench-alt.json bench-neu.json
+    python -m benchmarks load --url http://nas:5000 --stages 10:60,25:60,50:120 --owners 5
+
+Läuft gegen die konfigurierte Datenbank (DB_HOST, DB_NAME, ...) - dafür
+eine eigene Benchmark-Datenbank verwenden. Der Lasttest schreibt über die
+Oberfläche (Einnahmen, Nachfüllungen, Berichte) ebenfalls nur dorthin.
+"""
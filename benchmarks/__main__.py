@@ -0,0 +1,158 @@
+# benchmarks/__main__.py
+"""
+Kommandozeile: python -m benchmarks {generate,run,compare,load} ...
+"""
+
+import argparse
+from datetime import date
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+
+def _create_app():
+    from app import create_app
+    return create_app(os.getenv('FLASK_ENV', 'production'))
+
+
+def cmd_generate(args):
+    from benchmarks import datagen
+
+    profile = datagen.PROFILES[args.profile]
+    overrides = {field: getattr(args, field) for field in profile._fields if getattr(args, field) is not None}
+    profile = profile._replace(**overrides)
+
+    app = _create_app()
+    with app.app_context():
+        if args.reset:
+            if datagen.foreign_users() and not args.force:
+                sys.exit("Datenbank enthält echte Benutzer - --reset nur auf einer Benchmark-Datenbank (oder --force)")
+            datagen.reset_schema()
+        elif datagen.existing_bench_users():
+            sys.exit("Benchmark-Daten existieren bereits - mit --reset neu erzeugen")
+
+        print(f"Profil {args.profile}: {dict(profile._asdict())}, Seed {args.seed}")
+        anchor = date.fromisoformat(args.anchor) if args.anchor else None
+        counts = datagen.FleetGenerator(profile, seed=args.seed, anchor=anchor).generate()
+        print(f"Fertig: {counts}")
+        print(f"Login: {datagen.bench_owner_name()} / {datagen.BENCH_PASSWORD}")
+
+
+def cmd_run(args):
+    from benchmarks.runner import BenchmarkRunner
+
+    app = _create_app()
+    runner = BenchmarkRunner(app, iterations=args.iterations, warmup=args.warmup, cold=args.cold,
+                             skip_writes=args.skip_writes, only=args.only)
+    result = runner.run(owner=args.owner)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Ergebnis gespeichert: {args.output}")
+
+
+def cmd_compare(args):
+    from benchmarks import compare
+
+    base, new = compare.load(args.base), compare.load(args.new)
+    rows = compare.compare(base, new, metric=args.metric, tolerance=args.tolerance, min_delta_ms=args.min_delta)
+    print(compare.report(base, new, rows, metric=args.metric))
+    if args.fail_on_regression and any(row.regression for row in rows):
+        sys.exit(1)
+
+
+def cmd_load(args):
+    from benchmarks import loadtest
+
+    weights = dict(loadtest.JOURNEY_WEIGHTS)
+    for item in args.weight or ():
+        name, _, weight = item.partition('=')
+        if name not in loadtest.JOURNEYS or not weight.isdigit():
+            sys.exit(f"Ungültige Gewichtung: {item} (Abläufe: {', '.join(loadtest.JOURNEYS)})")
+        weights[name] = int(weight)
+    if not any(weights.values()):
+        sys.exit("Mindestens ein Ablauf braucht ein Gewicht > 0")
+
+    test = loadtest.LoadTest(args.url, args.stages, ramp=args.ramp, owners=args.owners, username=args.username,
+                             password=args.password, think_time=args.think, weights=weights,
+                             timeout=args.timeout, seed=args.seed)
+    result = test.run()
+    print(loadtest.format_report(result))
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+        print(f"Ergebnis gespeichert: {args.output}")
+
+
+def main(argv=None):
+    from benchmarks.common import BENCH_PASSWORD, FleetProfile, PROFILES
+
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description='Benchmarks für Automaten Manager')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    generate = commands.add_parser('generate', help='Synthetische Flotte erzeugen')
+    generate.add_argument('--profile', choices=sorted(PROFILES), default='small')
+    generate.add_argument('--seed', type=int, default=42)
+    generate.add_argument('--anchor', help='Stichtag YYYY-MM-DD (Standard: heute)')
+    generate.add_argument('--reset', action='store_true', help='Tabellen vorher neu anlegen')
+    generate.add_argument('--force', action='store_true', help='--reset auch bei fremden Benutzern')
+    for field in FleetProfile._fields:
+        generate.add_argument(f'--{field}', type=int, help=f'{field} abweichend vom Profil')
+    generate.set_defaults(func=cmd_generate)
+
+    run = commands.add_parser('run', help='Endpoints messen')
+    run.add_argument('--iterations', type=int, default=20)
+    run.add_argument('--warmup', type=int, default=3)
+    run.add_argument('--cold', action='store_true', help='Kennzahlen-Cache vor jedem Aufruf verwerfen')
+    run.add_argument('--skip-writes', action='store_true', help='Schreibende Szenarien auslassen')
+    run.add_argument('--only', nargs='+', help='Nur diese Szenarien (Muster wie reports.*)')
+    run.add_argument('--owner', help='Benutzername des Besitzers (Standard: bench_owner_0)')
+    run.add_argument('--output', help='Ergebnis als JSON speichern')
+    run.set_defaults(func=cmd_run)
+
+    diff = commands.add_parser('compare', help='Zwei Ergebnisse vergleichen')
+    diff.add_argument('base')
+    diff.add_argument('new')
+    diff.add_argument('--metric', default='p95', choices=['p50', 'p90', 'p95', 'p99', 'mean', 'max'])
+    diff.add_argument('--tolerance', type=float, default=10.0, help='Erlaubte Verschlechterung in Prozent')
+    diff.add_argument('--min-delta', type=float, default=1.0, help='Mindestabstand in ms')
+    diff.add_argument('--fail-on-regression', action='store_true', help='Exit-Code 1 bei Regression')
+    diff.set_defaults(func=cmd_compare)
+
+    load = commands.add_parser('load', help='Lasttest gegen eine laufende Instanz')
+    load.add_argument('--url', default='http://localhost:5000')
+    load.add_argument('--users', type=int, default=10, help='Gleichzeitige Benutzer')
+    load.add_argument('--duration', type=float, default=60, help='Dauer in Sekunden')
+    load.add_argument('--stages', help='Stufen Benutzer:Sekunden, z.B. 10:60,25:60,50:120 (statt --users/--duration)')
+    load.add_argument('--ramp', type=float, default=10, help='Sekunden, über die neue Benutzer starten')
+    load.add_argument('--think', type=float, default=1.0, help='Mittlere Denkpause zwischen Abläufen (s)')
+    load.add_argument('--weight', action='append', metavar='ABLAUF=GEWICHT',
+                      help='Gewichtung ändern, z.B. --weight report=0')
+    load.add_argument('--owners', type=int, default=1, help='Benutzer auf bench_owner_0..n-1 verteilen')
+    load.add_argument('--username', help='Stattdessen alle als dieser Benutzer')
+    load.add_argument('--password', default=BENCH_PASSWORD)
+    load.add_argument('--timeout', type=float, default=60, help='HTTP-Timeout in Sekunden')
+    load.add_argument('--seed', type=int, default=1)
+    load.add_argument('--output', help='Ergebnis als JSON speichern')
+    load.set_defaults(func=cmd_load)
+
+    args = parser.parse_args(argv)
+    if args.command == 'run' and args.iterations < 1:
+        parser.error('--iterations muss mindestens 1 sein')
+    if args.command == 'load':
+        from benchmarks.loadtest import Stage, parse_stages
+        try:
+            args.stages = parse_stages(args.stages) if args.stages else [Stage(args.users, args.duration)]
+        except ValueError as e:
+            parser.error(str(e))
+        if any(stage.users < 1 or stage.seconds <= 0 for stage in args.stages):
+            parser.error('--users und --duration müssen größer als 0 sein')
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# benchmarks/common.py
+"""
+Gemeinsame Teile der Benchmarks ohne App-Abhängigkeit
+Zugangsdaten und Profile der generierten Flotte sowie die Perzentil-
+Auswertung - damit laufen "load" und "compare" auch auf einem Rechner,
+auf dem nur die Standardbibliothek installiert ist.
+"""
+
+from typing import Dict, List, NamedTuple
+
+# Zugangsdaten der generierten Benutzer (auch für Lasttests)
+BENCH_PREFIX = 'bench_'
+BENCH_PASSWORD = 'bench123'
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class FleetProfile(NamedTuple):
+    """Datenmengen einer synthetischen Flotte"""
+    owners: int
+    users: int
+    devices: int
+    entries: int
+    products: int
+    suppliers: int
+    refills: int
+    movements: int
+    expenses: int
+    days: int
+
+
+PROFILES = {
+    'small': FleetProfile(owners=2, users=20, devices=20, entries=20_000, products=50, suppliers=5,
+                          refills=500, movements=10_000, expenses=1_000, days=365),
+    'medium': FleetProfile(owners=4, users=100, devices=200, entries=500_000, products=200, suppliers=20,
+                           refills=5_000, movements=200_000, expenses=10_000, days=730),
+    'large': FleetProfile(owners=4, users=500, devices=1_000, entries=5_000_000, products=500, suppliers=50,
+                          refills=20_000, movements=2_000_000, expenses=50_000, days=730),
+}
+
+
+def bench_owner_name(index: int = 0) -> str:
+    return f'{BENCH_PREFIX}owner_{index}'
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Perzentil mit linearer Interpolation (values sortiert)"""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * pct / 100
+    lower = int(position)
+    upper = min(lower + 1, len(values) - 1)
+    return values[lower] + (values[upper] - values[lower]) * (position - lower)
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    values = sorted(samples)
+    result = {f'p{pct}': round(percentile(values, pct), 3) for pct in PERCENTILES}
+    result.update(
+        min=round(values[0], 3) if values else 0.0,
+        max=round(values[-1], 3) if values else 0.0,
+        mean=round(sum(values) / len(values), 3) if values else 0.0,
+    )
+    return result
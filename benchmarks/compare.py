@@ -0,0 +1,82 @@
+# benchmarks/compare.py
+"""
+Zwei Benchmark-Ergebnisse vergleichen (z.B. vor und nach einem Commit)
+Als Regression gilt ein Szenario, dessen Perzentil um mehr als die
+Toleranz (und mindestens min_delta_ms) langsamer ist oder das mehr
+Datenbank-Abfragen braucht.
+"""
+
+import json
+from typing import List, NamedTuple, Optional
+
+
+# Weichen diese Angaben ab, sind die Läufe nur bedingt vergleichbar
+CONDITION_KEYS = ('database', 'iterations', 'warmup', 'cold_cache')
+
+
+class Comparison(NamedTuple):
+    name: str
+    base_ms: Optional[float]
+    new_ms: Optional[float]
+    base_queries: Optional[float]
+    new_queries: Optional[float]
+    regression: bool
+
+    @property
+    def change(self) -> Optional[float]:
+        """Änderung in Prozent (positiv = langsamer)"""
+        if not self.base_ms or self.new_ms is None:
+            return None
+        return (self.new_ms - self.base_ms) / self.base_ms * 100
+
+
+def load(path: str) -> dict:
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(base: dict, new: dict, metric: str = 'p95', tolerance: float = 10.0,
+            min_delta_ms: float = 1.0) -> List[Comparison]:
+    rows = []
+    base_results, new_results = base['scenarios'], new['scenarios']
+    for name in list(base_results) + [n for n in new_results if n not in base_results]:
+        old, current = base_results.get(name, {}), new_results.get(name, {})
+        base_ms = old.get('latency_ms', {}).get(metric)
+        new_ms = current.get('latency_ms', {}).get(metric)
+        base_queries = old.get('queries', {}).get('mean')
+        new_queries = current.get('queries', {}).get('mean')
+
+        slower = (base_ms is not None and new_ms is not None
+                  and new_ms - base_ms > min_delta_ms
+                  and new_ms > base_ms * (1 + tolerance / 100))
+        more_queries = base_queries is not None and new_queries is not None and new_queries > base_queries
+        rows.append(Comparison(name, base_ms, new_ms, base_queries, new_queries, slower or more_queries))
+    return rows
+
+
+def _fmt(value, suffix=''):
+    return f'{value:.2f}{suffix}' if value is not None else '-'
+
+
+def report(base: dict, new: dict, rows: List[Comparison], metric: str = 'p95') -> str:
+    def commit(result):
+        git = result['meta'].get('git') or {}
+        return (git.get('commit') or '?')[:10] + (' (dirty)' if git.get('dirty') else '')
+
+    lines = [
+        f"Basis: {commit(base)}  {base['meta']['timestamp']}  {base['meta'].get('dataset')}",
+        f"Neu:   {commit(new)}  {new['meta']['timestamp']}  {new['meta'].get('dataset')}",
+    ]
+    differing = [key for key in CONDITION_KEYS if base['meta'].get(key) != new['meta'].get(key)]
+    if differing:
+        lines.append(f"Achtung: unterschiedliche Bedingungen ({', '.join(differing)}) - nur bedingt vergleichbar")
+    lines += [
+        '',
+        f"{'Szenario':<36} {metric + ' alt':>10} {metric + ' neu':>10} {'Änderung':>9} {'Abfragen':>15}",
+    ]
+    for row in rows:
+        change = f'{row.change:+.1f}%' if row.change is not None else '-'
+        queries = f'{_fmt(row.base_queries)} -> {_fmt(row.new_queries)}'
+        marker = '  <-- Regression' if row.regression else ''
+        lines.append(f"{row.name:<36} {_fmt(row.base_ms):>10} {_fmt(row.new_ms):>10} {change:>9} {queries:>15}{marker}")
+    return '\n'.join(lines)
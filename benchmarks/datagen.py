@@ -0,0 +1,442 @@
+# benchmarks/datagen.py
+"""
+Synthetische Flotten-Daten für Benchmarks
+Füllt das Schema mit konfigurierbaren Mengen (Geräte, Einnahmen, Produkte,
+Lagerbewegungen, Ausgaben, ...). Gleicher Seed und gleiches Stichtag-Datum
+ergeben dieselben Daten; jeder Bereich hat einen eigenen Zufallsgenerator,
+damit z.B. mehr Einnahmen die Geräte nicht verändern.
+
+Geschrieben wird per Core-Insert in Stapeln (an den Mapper-Events vorbei),
+danach werden Tagesumsatz-Rollup und Bestandstabelle neu aufgebaut.
+"""
+
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+import random
+import uuid
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from sqlalchemy import insert, text
+from werkzeug.security import generate_password_hash
+
+from app import db
+from app.models import (
+    User, Device, DeviceType, DeviceStatus, Entry, Expense, ExpenseCategory, DailyRevenue,
+    AuditLog, AuditAction
+)
+from app.models.inventory import (
+    Product, ProductCategory, ProductUnit, Supplier, Refill, RefillItem, InventoryMovement, StockBalance
+)
+from app.utils import cache as aggregate_cache
+
+from benchmarks.common import BENCH_PREFIX, BENCH_PASSWORD, FleetProfile, PROFILES, bench_owner_name
+
+BATCH_SIZE = 5000
+# So viele Wochen vor dem Stichtag werden als Wochenerfassung (source='week') angelegt
+WEEK_GRID_WEEKS = 4
+# Audit-Eintrag mit Profil, Seed und Stichtag des erzeugten Datenbestands
+DATASET_ENTITY = 'benchmark_dataset'
+
+
+LOCATIONS = ('Foyer', 'Kantine', 'Werkstatt', 'Büro', 'Lager', 'Empfang', 'Pausenraum', 'Halle')
+MANUFACTURERS = ('WMF', 'Jura', 'Rheavendors', 'Necta', 'Bianchi', 'Sielaff')
+
+
+def _rng(seed: int, section: str) -> random.Random:
+    return random.Random(f'{seed}:{section}')
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _money(value: float) -> Decimal:
+    return Decimal(str(round(value, 2)))
+
+
+def _chunks(rows: Iterable[dict], size: int = BATCH_SIZE) -> Iterator[List[dict]]:
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _insert(model, rows: Iterable[dict]) -> int:
+    """Zeilen stapelweise einfügen (ohne RETURNING) -> Anzahl"""
+    count = 0
+    for batch in _chunks(rows):
+        db.session.execute(insert(model.__table__), batch)
+        db.session.commit()
+        count += len(batch)
+    return count
+
+
+def _insert_returning(model, rows: List[dict]) -> List[int]:
+    """Zeilen einfügen und die IDs in Eingabe-Reihenfolge liefern"""
+    ids = []
+    for batch in _chunks(rows):
+        result = db.session.execute(
+            insert(model.__table__).returning(model.__table__.c.id, sort_by_parameter_order=True),
+            batch
+        )
+        ids.extend(result.scalars())
+    db.session.commit()
+    return ids
+
+
+def _split(total: int, parts: int) -> List[int]:
+    """total möglichst gleichmäßig auf parts verteilen"""
+    base, rest = divmod(total, parts)
+    return [base + (1 if i < rest else 0) for i in range(parts)]
+
+
+def existing_bench_users() -> int:
+    return User.query.filter(User.username.like(f'{BENCH_PREFIX}%')).count()
+
+
+def foreign_users() -> int:
+    """Benutzer, die nicht vom Generator stammen (außer dem Standard-Admin)"""
+    return User.query.filter(
+        ~User.username.like(f'{BENCH_PREFIX}%'),
+        User.username != 'admin'
+    ).count()
+
+
+def dataset_anchor() -> Optional[date]:
+    """Stichtag des zuletzt erzeugten Datenbestands (None bei Daten ohne Audit-Eintrag)"""
+    log = AuditLog.query.filter_by(entity_type=DATASET_ENTITY).order_by(AuditLog.id.desc()).first()
+    if log is None or not (log.details or {}).get('anchor'):
+        return None
+    return date.fromisoformat(log.details['anchor'])
+
+
+def reset_schema():
+    """Alle Tabellen neu anlegen - nur für eine eigene Benchmark-Datenbank"""
+    db.session.remove()
+    db.drop_all()
+    db.create_all()
+
+
+class FleetGenerator:
+    """Erzeugt eine Flotte nach Profil; generate() liefert die Zeilenanzahlen"""
+
+    def __init__(self, profile: FleetProfile, seed: int = 42, anchor: date = None, log=print):
+        self.profile = profile
+        self.seed = seed
+        self.anchor = anchor or date.today()
+        self.start = self.anchor - timedelta(days=profile.days - 1)
+        self.log = log
+        self.counts: Dict[str, int] = {}
+
+        self.owner_ids: List[int] = []
+        self.device_owner: Dict[int, int] = {}
+        self.suppliers_by_owner: Dict[int, List[int]] = {}
+        self.products_by_owner: Dict[int, List[int]] = {}
+        self.devices_by_owner: Dict[int, List[int]] = {}
+
+    def generate(self) -> Dict[str, int]:
+        for step in (self._users, self._suppliers, self._products, self._devices,
+                     self._entries, self._expenses, self._refills_and_movements):
+            step()
+        self._rebuild_rollups()
+        self._record_dataset()
+        return self.counts
+
+    def _created_at(self, rng: random.Random, day: date = None) -> datetime:
+        day = day or self.start + timedelta(days=rng.randrange(self.profile.days))
+        return datetime.combine(day, time(rng.randrange(6, 22), rng.randrange(60)))
+
+    # --- Stammdaten ---
+
+    def _users(self):
+        rng = _rng(self.seed, 'users')
+        password_hash = generate_password_hash(BENCH_PASSWORD)
+        rows = []
+        names = [bench_owner_name(i) for i in range(self.profile.owners)]
+        names += [f'{BENCH_PREFIX}user_{i}' for i in range(self.profile.users)]
+        for index, username in enumerate(names):
+            logins = rng.randrange(0, 500)
+            rows.append({
+                'username': username,
+                'email': f'{username}@bench.local',
+                'password_hash': password_hash,
+                'first_name': 'Bench',
+                'last_name': str(index),
+                'is_active': rng.random() > 0.05 or index < self.profile.owners,
+                'is_admin': index == 0,
+                'is_verified': True,
+                'login_count': logins,
+                'last_login': self._created_at(rng) if logins else None,
+                'failed_login_count': 0,
+                'created_at': self._created_at(rng, self.start),
+                'uuid': _uuid(rng),
+            })
+        ids = _insert_returning(User, rows)
+        self.owner_ids = ids[:self.profile.owners]
+        self.counts['users'] = len(ids)
+        self.log(f"Benutzer: {len(ids)} ({self.profile.owners} Besitzer)")
+
+    def _suppliers(self):
+        rng = _rng(self.seed, 'suppliers')
+        rows, owners = [], []
+        for owner_id, count in zip(self.owner_ids, _split(self.profile.suppliers, len(self.owner_ids))):
+            for i in range(count):
+                owners.append(owner_id)
+                rows.append({
+                    'name': f'Lieferant {owner_id}-{i}',
+                    'contact_person': f'Kontakt {i}',
+                    'email': f'lieferant{owner_id}-{i}@bench.local',
+                    'delivery_time': rng.randrange(1, 10),
+                    'user_id': owner_id,
+                    'is_active': True,
+                    'uuid': str(_uuid(rng)),
+                })
+        for owner_id, supplier_id in zip(owners, _insert_returning(Supplier, rows)):
+            self.suppliers_by_owner.setdefault(owner_id, []).append(supplier_id)
+        self.counts['suppliers'] = len(rows)
+        self.log(f"Lieferanten: {len(rows)}")
+
+    def _products(self):
+        rng = _rng(self.seed, 'products')
+        categories, units = list(ProductCategory), list(ProductUnit)
+        rows, owners = [], []
+        for owner_id, count in zip(self.owner_ids, _split(self.profile.products, len(self.owner_ids))):
+            suppliers = self.suppliers_by_owner.get(owner_id) or [None]
+            for i in range(count):
+                price = rng.uniform(0.5, 40)
+                owners.append(owner_id)
+                rows.append({
+                    'name': f'Produkt {owner_id}-{i}',
+                    'category': rng.choice(categories),
+                    'unit': rng.choice(units),
+                    'article_number': f'A-{owner_id}-{i:05d}',
+                    'default_price': _money(price),
+                    'min_price': _money(price * 0.9),
+                    'max_price': _money(price * 1.2),
+                    'min_stock': Decimal(rng.randrange(0, 50)),
+                    'reorder_point': Decimal(rng.randrange(10, 80)),
+                    'default_supplier_id': rng.choice(suppliers),
+                    'user_id': owner_id,
+                    'is_active': rng.random() > 0.05,
+                    'created_at': self._created_at(rng, self.start),
+                    'uuid': str(_uuid(rng)),
+                })
+        for owner_id, product_id in zip(owners, _insert_returning(Product, rows)):
+            self.products_by_owner.setdefault(owner_id, []).append(product_id)
+        self.counts['products'] = len(rows)
+        self.log(f"Produkte: {len(rows)}")
+
+    def _devices(self):
+        rng = _rng(self.seed, 'devices')
+        types = list(DeviceType)
+        rows = []
+        for i in range(self.profile.devices):
+            owner_id = self.owner_ids[i % len(self.owner_ids)]
+            rows.append({
+                'name': f'Automat {i:04d}',
+                'type': rng.choice(types),
+                'status': DeviceStatus.ACTIVE if rng.random() > 0.1 else rng.choice(list(DeviceStatus)),
+                'serial_number': f'BENCH-{self.seed}-{i:05d}',
+                'manufacturer': rng.choice(MANUFACTURERS),
+                'location': f'{rng.choice(LOCATIONS)} {rng.randrange(1, 40)}',
+                'purchase_date': self.start,
+                'purchase_price': _money(rng.uniform(1500, 9000)),
+                'capacity': rng.randrange(100, 600),
+                'owner_id': owner_id,
+                'created_at': self._created_at(rng, self.start),
+                'uuid': _uuid(rng),
+            })
+        for row, device_id in zip(rows, _insert_returning(Device, rows)):
+            self.device_owner[device_id] = row['owner_id']
+            self.devices_by_owner.setdefault(row['owner_id'], []).append(device_id)
+        self.counts['devices'] = len(rows)
+        self.log(f"Geräte: {len(rows)}")
+
+    # --- Bewegungsdaten ---
+
+    def _entries(self):
+        """Wochenerfassung der letzten Wochen plus frei erfasste Einnahmen im Zeitraum"""
+        rng = _rng(self.seed, 'entries')
+        week_start = self.anchor - timedelta(days=self.anchor.weekday())
+        grid_start = max(week_start - timedelta(weeks=WEEK_GRID_WEEKS - 1), self.start)
+        grid_days = [grid_start + timedelta(days=i) for i in range((self.anchor - grid_start).days + 1)]
+
+        device_ids = list(self.device_owner)
+        grid_total = min(self.profile.entries, len(grid_days) * len(device_ids))
+        free_counts = _split(self.profile.entries - grid_total, len(device_ids)) if device_ids else []
+        base = {device_id: rng.uniform(8, 60) for device_id in device_ids}
+
+        def entry(device_id, day, source=None):
+            amount = base[device_id] * rng.uniform(0.4, 1.6) * (0.6 if day.weekday() >= 5 else 1)
+            cash = amount * rng.uniform(0.3, 1)
+            owner_id = self.device_owner[device_id]
+            return {
+                'device_id': device_id,
+                'owner_id': owner_id,
+                'user_id': owner_id,
+                'amount': _money(amount),
+                'cash_amount': _money(cash),
+                'card_amount': _money(amount) - _money(cash),
+                'date': day,
+                'time': time(rng.randrange(6, 22), rng.randrange(60)),
+                'product_count': rng.randrange(1, 60),
+                'source': source,
+                'is_validated': rng.random() > 0.3,
+                'created_at': self._created_at(rng, day),
+                'uuid': _uuid(rng),
+            }
+
+        def rows():
+            produced = 0
+            for day in grid_days:
+                for device_id in device_ids:
+                    if produced >= grid_total:
+                        return
+                    produced += 1
+                    yield entry(device_id, day, Entry.SOURCE_WEEK)
+            for device_id, count in zip(device_ids, free_counts):
+                for _ in range(count):
+                    yield entry(device_id, self.start + timedelta(days=rng.randrange(self.profile.days)))
+
+        self.counts['entries'] = _insert(Entry, rows())
+        self.log(f"Einnahmen: {self.counts['entries']}")
+
+    def _expenses(self):
+        rng = _rng(self.seed, 'expenses')
+        categories = list(ExpenseCategory)
+        device_ids = list(self.device_owner)
+
+        def rows():
+            for i in range(self.profile.expenses):
+                category = rng.choice(categories)
+                device_id = rng.choice(device_ids) if device_ids and rng.random() < 0.7 else None
+                owner_id = self.device_owner[device_id] if device_id else rng.choice(self.owner_ids)
+                day = self.start + timedelta(days=rng.randrange(self.profile.days))
+                yield {
+                    'device_id': device_id,
+                    'category': category,
+                    'amount': _money(rng.uniform(5, 400)),
+                    'date': day,
+                    'description': f'{category.value.capitalize()} #{i}',
+                    'supplier': f'Firma {rng.randrange(1, 50)}',
+                    'user_id': owner_id,
+                    'is_recurring': False,
+                    'created_at': self._created_at(rng, day),
+                    'uuid': _uuid(rng),
+                }
+
+        self.counts['expenses'] = _insert(Expense, rows())
+        self.log(f"Ausgaben: {self.counts['expenses']}")
+
+    def _refills_and_movements(self):
+        """Nachfüllungen mit Positionen; jede Position bucht einen Eingang, der Rest ist Verbrauch"""
+        rng = _rng(self.seed, 'refills')
+        refill_rows, item_specs = [], []
+        for owner_id, count in zip(self.owner_ids, _split(self.profile.refills, len(self.owner_ids))):
+            products = self.products_by_owner.get(owner_id, [])
+            suppliers = self.suppliers_by_owner.get(owner_id) or [None]
+            devices = self.devices_by_owner.get(owner_id) or [None]
+            if not products:
+                continue
+            for _ in range(count):
+                day = self.start + timedelta(days=rng.randrange(self.profile.days))
+                items = []
+                for product_id in rng.sample(products, min(len(products), rng.randrange(1, 9))):
+                    quantity = Decimal(rng.randrange(1, 100))
+                    unit_price = Decimal(str(round(rng.uniform(0.2, 30), 4)))
+                    items.append((product_id, quantity, unit_price, _money(quantity * unit_price)))
+                total = sum(item[3] for item in items)
+                refill_rows.append({
+                    'date': day,
+                    'supplier_id': rng.choice(suppliers),
+                    'device_id': rng.choice(devices) if rng.random() < 0.5 else None,
+                    'order_number': f'B-{owner_id}-{len(refill_rows):06d}',
+                    'subtotal': _money(float(total) / 1.2),
+                    'tax_amount': total - _money(float(total) / 1.2),
+                    'total_amount': total,
+                    'user_id': owner_id,
+                    'created_at': self._created_at(rng, day),
+                    'uuid': str(_uuid(rng)),
+                })
+                item_specs.append((owner_id, day, items))
+
+        refill_ids = _insert_returning(Refill, refill_rows)
+        item_rows, item_meta = [], []
+        for refill_id, (owner_id, day, items) in zip(refill_ids, item_specs):
+            for product_id, quantity, unit_price, total in items:
+                item_rows.append({
+                    'refill_id': refill_id,
+                    'product_id': product_id,
+                    'quantity': quantity,
+                    'unit_price': unit_price,
+                    'total_price': total,
+                    'created_at': datetime.combine(day, time(8)),
+                })
+                item_meta.append((owner_id, day, product_id, quantity))
+        item_ids = _insert_returning(RefillItem, item_rows)
+        self.counts['refills'] = len(refill_ids)
+        self.counts['refill_items'] = len(item_ids)
+        self.log(f"Nachfüllungen: {len(refill_ids)} ({len(item_ids)} Positionen)")
+
+        owners_with_products = [owner_id for owner_id in self.owner_ids if self.products_by_owner.get(owner_id)]
+
+        def movements():
+            produced = 0
+            for item_id, (owner_id, day, product_id, quantity) in zip(item_ids, item_meta):
+                if produced >= self.profile.movements:
+                    return
+                produced += 1
+                yield {
+                    'product_id': product_id,
+                    'device_id': None,
+                    'refill_item_id': item_id,
+                    'type': 'IN',
+                    'quantity': quantity,
+                    'reason': 'Nachfüllung',
+                    'user_id': owner_id,
+                    'date': datetime.combine(day, time(8)),
+                }
+            while produced < self.profile.movements and owners_with_products:
+                produced += 1
+                owner_id = rng.choice(owners_with_products)
+                devices = self.devices_by_owner.get(owner_id) or [None]
+                yield {
+                    'product_id': rng.choice(self.products_by_owner[owner_id]),
+                    'device_id': rng.choice(devices),
+                    'refill_item_id': None,
+                    'type': 'OUT',
+                    'quantity': Decimal(rng.randrange(1, 5)),
+                    'reason': 'Verbrauch',
+                    'user_id': owner_id,
+                    'date': self._created_at(rng),
+                }
+
+        self.counts['movements'] = _insert(InventoryMovement, movements())
+        self.log(f"Lagerbewegungen: {self.counts['movements']}")
+
+    def _record_dataset(self):
+        """Profil, Seed und Stichtag festhalten - der Runner misst die Woche des Stichtags"""
+        db.session.add(AuditLog(
+            user_id=self.owner_ids[0] if self.owner_ids else None,
+            action=AuditAction.IMPORT,
+            entity_type=DATASET_ENTITY,
+            details={'profile': self.profile._asdict(), 'seed': self.seed, 'anchor': self.anchor.isoformat()},
+        ))
+        db.session.commit()
+
+    def _rebuild_rollups(self):
+        """Rollups nachziehen (Core-Inserts lösen keine Events aus), Statistiken aktualisieren"""
+        self.counts['daily_revenue'] = DailyRevenue.rebuild()
+        self.counts['stock_balances'] = StockBalance.rebuild()
+        aggregate_cache.clear()
+        for owner_id in self.owner_ids:
+            aggregate_cache.invalidate_owner(owner_id)
+
+        if db.engine.dialect.name == 'postgresql':
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(text('ANALYZE'))
+        self.log(f"Rollups: {self.counts['daily_revenue']} Tagesumsätze, {self.counts['stock_balances']} Bestände")
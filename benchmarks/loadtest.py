@@ -0,0 +1,441 @@
+# benchmarks/loadtest.py
+"""
+Lasttest gegen eine laufende Instanz (z.B. gunicorn auf der Synology)
+Virtuelle Benutzer (Threads) melden sich als Benchmark-Besitzer an und
+spielen gewichtete Abläufe ab: Wochenerfassung speichern, Nachfüllung mit
+vielen Positionen, Monatsbericht erzeugen und herunterladen, PWA-Sync und
+erneutes Anmelden. Die Last steigt in Stufen (--stages 10:60,25:120 =
+Benutzer:Sekunden), neue Benutzer kommen über --ramp Sekunden verteilt
+dazu. Je Stufe und Schritt werden Durchsatz, Fehlerquote und
+Latenz-Perzentile ausgegeben - die Grundlage für die Worker-Anzahl
+(gunicorn_config.py) und DATABASE_POOL_SIZE.
+
+HTTP über http.client mit einer Keep-Alive-Verbindung je Benutzer; das
+Modul braucht nur die Standardbibliothek (keine App, keinen DB-Treiber).
+"""
+
+import base64
+from collections import Counter
+from datetime import date, datetime, timedelta
+import http.client
+from http.cookies import SimpleCookie
+import json
+import random
+import threading
+import time
+import zlib
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+from benchmarks.common import BENCH_PASSWORD, bench_owner_name, summarize
+
+# Monatsende: überwiegend Erfassung, einige Berichte
+JOURNEY_WEIGHTS = {'week_entry': 5, 'pwa_sync': 3, 'refill': 2, 'report': 1, 'relogin': 1}
+
+REFILL_ITEMS = 25
+WEEK_DEVICES = 15
+# Maximale Wartezeit auf einen Bericht (Sekunden) und Abfrageintervall
+REPORT_TIMEOUT = 120
+REPORT_POLL_INTERVAL = 0.5
+
+
+class Stage(NamedTuple):
+    users: int
+    seconds: float
+
+
+def parse_stages(text: str) -> List[Stage]:
+    """'10:60,25:120' -> [Stage(10, 60.0), Stage(25, 120.0)]"""
+    stages = []
+    for part in text.split(','):
+        users, _, seconds = part.partition(':')
+        try:
+            stages.append(Stage(int(users), float(seconds)))
+        except ValueError:
+            raise ValueError(f"Ungültige Stufe '{part}' (erwartet Benutzer:Sekunden)")
+    if any(stage.users < 1 or stage.seconds <= 0 for stage in stages):
+        raise ValueError(f"Ungültige Stufen: {text}")
+    return stages
+
+
+class HttpClient:
+    """Eine Keep-Alive-Verbindung mit Session-Cookies (wie ein Browser-Tab)"""
+
+    def __init__(self, base_url: str, timeout: float = 60):
+        parts = urlsplit(base_url)
+        self.connection_class = (http.client.HTTPSConnection if parts.scheme == 'https'
+                                 else http.client.HTTPConnection)
+        self.host = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.cookies: Dict[str, str] = {}
+        self.connection = None
+
+    def request(self, method: str, path: str, form: dict = None, payload=None,
+                headers: dict = None) -> Tuple[int, bytes, http.client.HTTPMessage]:
+        headers = dict(headers or {})
+        body = None
+        if form is not None:
+            body = urlencode(form, doseq=True)
+            headers['Content-Type'] = 'application/x-www-form-urlencoded'
+        elif payload is not None:
+            body = json.dumps(payload)
+            headers['Content-Type'] = 'application/json'
+        if self.cookies:
+            headers['Cookie'] = '; '.join(f'{name}={value}' for name, value in self.cookies.items())
+
+        # Eine Wiederholung, falls der Server die Keep-Alive-Verbindung geschlossen hat
+        for attempt in range(2):
+            if self.connection is None:
+                self.connection = self.connection_class(self.host, timeout=self.timeout)
+            try:
+                self.connection.request(method, self.prefix + path, body=body, headers=headers)
+                response = self.connection.getresponse()
+                data = response.read()
+                break
+            except (http.client.HTTPException, ConnectionError):
+                self.close()
+                if attempt:
+                    raise
+
+        for header in response.headers.get_all('Set-Cookie') or ():
+            for name, morsel in SimpleCookie(header).items():
+                if morsel.value and '1970' not in morsel['expires']:
+                    self.cookies[name] = morsel.value
+                else:
+                    self.cookies.pop(name, None)
+        return response.status, data, response.headers
+
+    def flash_categories(self, cookie_name: str = 'session') -> List[str]:
+        """Kategorien der Flash-Meldungen im (signierten, nicht verschlüsselten) Session-Cookie"""
+        value = self.cookies.get(cookie_name)
+        if not value:
+            return []
+        compressed = value.startswith('.')
+        payload = value.lstrip('.').split('.')[0]
+        try:
+            data = base64.urlsafe_b64decode(payload + '=' * (-len(payload) % 4))
+            session = json.loads(zlib.decompress(data) if compressed else data)
+        except (ValueError, zlib.error):
+            return []
+        # Flask speichert die Tupel getaggt: {" t": [kategorie, text]}
+        return [flash.get(' t', flash)[0] if isinstance(flash, dict) else flash[0]
+                for flash in session.get('_flashes', [])]
+
+    def close(self):
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+class Recorder:
+    """Messwerte aller virtuellen Benutzer, je Stufe und Schritt"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.samples: Dict[Tuple[str, str], List[float]] = {}
+        self.errors: Counter = Counter()
+        self.statuses: Dict[Tuple[str, str], Counter] = {}
+        self.stage_times: Dict[str, float] = {}
+
+    def record(self, stage: str, step: str, elapsed_ms: float, status, ok: bool):
+        key = (stage, step)
+        with self._lock:
+            self.samples.setdefault(key, []).append(elapsed_ms)
+            self.statuses.setdefault(key, Counter())[str(status)] += 1
+            if not ok:
+                self.errors[key] += 1
+
+    def summary(self) -> Dict[str, dict]:
+        """{stage: {'duration': s, 'steps': {step: kennzahlen}}}"""
+        with self._lock:
+            result = {}
+            for (stage, step), samples in self.samples.items():
+                duration = self.stage_times.get(stage) or 1
+                errors = self.errors[(stage, step)]
+                stage_result = result.setdefault(stage, {'duration': round(duration, 1), 'steps': {}})
+                stage_result['steps'][step] = {
+                    'count': len(samples),
+                    'errors': errors,
+                    'error_rate': round(errors / len(samples) * 100, 2),
+                    'throughput': round(len(samples) / duration, 2),
+                    'latency_ms': summarize(samples),
+                    'status': dict(self.statuses[(stage, step)]),
+                }
+            for stage_result in result.values():
+                stage_result['steps'] = dict(sorted(stage_result['steps'].items()))
+            return result
+
+
+class LoadTest:
+    """Steuert die Stufen und startet/stoppt die virtuellen Benutzer"""
+
+    def __init__(self, base_url: str, stages: List[Stage], ramp: float = 0, owners: int = 1,
+                 username: str = None, password: str = BENCH_PASSWORD, think_time: float = 1.0,
+                 weights: Dict[str, int] = None, timeout: float = 60, seed: int = 1, log=print):
+        self.base_url = base_url
+        self.stages = stages
+        self.ramp = ramp
+        self.owners = owners
+        self.username = username
+        self.password = password
+        self.think_time = think_time
+        self.weights = weights or dict(JOURNEY_WEIGHTS)
+        self.timeout = timeout
+        self.seed = seed
+        self.log = log
+
+        self.recorder = Recorder()
+        self.active = 0
+        self.stage_name = ''
+        self.stopped = threading.Event()
+
+    def credentials(self, index: int) -> Tuple[str, str]:
+        if self.username:
+            return self.username, self.password
+        return bench_owner_name(index % self.owners), self.password
+
+    def record(self, step: str, elapsed_ms: float, status, ok: bool):
+        self.recorder.record(self.stage_name, step, elapsed_ms, status, ok)
+
+    def run(self) -> dict:
+        max_users = max(stage.users for stage in self.stages)
+        threads = [threading.Thread(target=self._user_loop, args=(index,), daemon=True, name=f'vu-{index}')
+                   for index in range(max_users)]
+        for thread in threads:
+            thread.start()
+
+        started = time.monotonic()
+        previous = 0
+        for stage in self.stages:
+            self.stage_name = f'{stage.users} Benutzer'
+            self.log(f"Stufe: {stage.users} Benutzer für {stage.seconds:g} s")
+            stage_started = time.monotonic()
+            ramp = min(self.ramp, stage.seconds)
+            while True:
+                elapsed = time.monotonic() - stage_started
+                if elapsed >= stage.seconds:
+                    break
+                share = min(elapsed / ramp, 1) if ramp else 1
+                self.active = previous + round((stage.users - previous) * share)
+                time.sleep(0.1)
+            self.recorder.stage_times[self.stage_name] = time.monotonic() - stage_started
+            previous = stage.users
+
+        self.stopped.set()
+        for thread in threads:
+            thread.join(timeout=self.timeout + 5)
+
+        return {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'url': self.base_url,
+                'stages': [stage._asdict() for stage in self.stages],
+                'ramp': self.ramp,
+                'think_time': self.think_time,
+                'weights': self.weights,
+                'duration': round(time.monotonic() - started, 1),
+            },
+            'stages': self.recorder.summary(),
+        }
+
+    def _user_loop(self, index: int):
+        rng = random.Random(f'{self.seed}:{index}')
+        names = list(self.weights)
+        weights = [self.weights[name] for name in names]
+        user = None
+        while not self.stopped.is_set():
+            # Benutzer oberhalb der aktuellen Stufe warten (bzw. melden sich ab)
+            if index >= self.active:
+                if user is not None:
+                    user.client.close()
+                    user = None
+                self.stopped.wait(0.1)
+                continue
+            try:
+                if user is None:
+                    user = VirtualUser(self, index, rng)
+                    user.login()
+                    user.load_context()
+                JOURNEYS[rng.choices(names, weights=weights)[0]](user)
+            except Exception as e:
+                self.record('exception', 0.0, type(e).__name__, ok=False)
+                if user is not None:
+                    user.client.close()
+                user = None
+            self.stopped.wait(rng.uniform(0.5, 1.5) * self.think_time)
+        if user is not None:
+            user.client.close()
+
+
+class VirtualUser:
+    """Ein angemeldeter Bediener mit seinen Geräten und Produkten"""
+
+    def __init__(self, test: LoadTest, index: int, rng: random.Random):
+        self.test = test
+        self.index = index
+        self.rng = rng
+        self.client = HttpClient(test.base_url, timeout=test.timeout)
+        self.device_ids: List[int] = []
+        self.products: List[dict] = []
+        self.sequence = 0
+
+    def step(self, name: str, method: str, path: str, expect=(200,),
+             check: Callable[[int, bytes, http.client.HTTPMessage], bool] = None, **kwargs):
+        """Anfrage ausführen und messen -> (status, body, headers, ok)"""
+        started = time.perf_counter()
+        try:
+            status, body, headers = self.client.request(method, path, **kwargs)
+        except Exception:
+            self.test.record(name, (time.perf_counter() - started) * 1000, 'connection', ok=False)
+            raise
+        elapsed = (time.perf_counter() - started) * 1000
+        ok = status in expect and (check is None or check(status, body, headers))
+        self.test.record(name, elapsed, status, ok)
+        return status, body, headers, ok
+
+    def json(self, name: str, method: str, path: str, expect=(200,), **kwargs) -> Optional[dict]:
+        _, body, _, ok = self.step(name, method, path, expect=expect, **kwargs)
+        return json.loads(body) if ok else None
+
+    def login(self):
+        username, password = self.test.credentials(self.index)
+        # Erfolg = Redirect ins Dashboard, Fehler = Login-Seite erneut (200)
+        _, _, _, ok = self.step('login', 'POST', '/login', expect=(302,),
+                                check=lambda status, body, headers: '/login' not in headers.get('Location', ''),
+                                form={'username': username, 'password': password})
+        if not ok:
+            raise RuntimeError(f"Anmeldung als {username} fehlgeschlagen")
+
+    def load_context(self):
+        """Geräte und Produkte laden, wie die PWA beim Start"""
+        dashboard = self.json('pwa_cache_dashboard', 'GET', '/api/pwa/cache/dashboard') or {}
+        self.device_ids = [device['id'] for device in dashboard.get('devices', [])]
+        products = self.json('pwa_cache_products', 'GET', '/api/pwa/cache/products') or {}
+        self.products = products.get('products', [])
+        if not self.device_ids:
+            raise RuntimeError("Benutzer hat keine Geräte - zuerst 'python -m benchmarks generate'")
+
+    def next_key(self) -> str:
+        self.sequence += 1
+        return f'load-{self.test.seed}-{self.index}-{self.sequence}-{time.time_ns()}'
+
+
+def _success(status, body, headers) -> bool:
+    return bool(json.loads(body).get('success'))
+
+
+# --- Abläufe ---
+
+def week_entry_journey(user: VirtualUser):
+    """Wochenerfassung: Gruppen laden, Beträge mehrerer Geräte speichern"""
+    today = date.today()
+    week_start = today - timedelta(days=today.weekday())
+    user.step('week_groups', 'GET', f'/entries/week/groups?week_start={week_start}')
+
+    devices = user.rng.sample(user.device_ids, min(len(user.device_ids), WEEK_DEVICES))
+    days = [(week_start + timedelta(days=offset)).isoformat() for offset in range(7)]
+    user.step('save_week', 'POST', '/entries/save-week', check=_success, payload={
+        'week_start': week_start.isoformat(),
+        'entries': {str(device_id): {day: round(user.rng.uniform(5, 80), 2) for day in days}
+                    for device_id in devices},
+        'summary': True,
+    })
+
+
+def refill_journey(user: VirtualUser):
+    """Nachfüllung mit vielen Positionen erfassen (Formular wie im Browser)"""
+    if not user.products:
+        return
+    products = user.rng.sample(user.products, min(len(user.products), REFILL_ITEMS))
+    form = {
+        'date': date.today().isoformat(),
+        'device_id': user.rng.choice(user.device_ids),
+        'tax_rate': '20',
+        'prices_include_tax': 'on',
+        'product_id[]': [product['id'] for product in products],
+        'quantity[]': [user.rng.randrange(1, 40) for _ in products],
+        'unit_price[]': [f"{product['default_price'] or user.rng.uniform(0.2, 5):.2f}" for product in products],
+    }
+    # Die Route leitet auch bei Fehlern um - erkennbar an einer neuen 'danger'-Flash-Meldung
+    errors_before = user.client.flash_categories().count('danger')
+    user.step('refill_add', 'POST', '/refills/add', expect=(302,), form=form,
+              check=lambda status, body, headers: user.client.flash_categories().count('danger') <= errors_before)
+    user.step('refill_list', 'GET', '/refills/')
+
+
+def report_journey(user: VirtualUser):
+    """Monatsbericht anstoßen, Fortschritt abfragen, Datei herunterladen"""
+    started = time.perf_counter()
+    today = date.today()
+    queued = user.json('report_queue', 'POST', '/reports/monthly', expect=(202,),
+                       form={'month': today.month, 'year': today.year, 'format': 'pdf'},
+                       headers={'Accept': 'application/json'})
+    if queued:
+        deadline = time.monotonic() + REPORT_TIMEOUT
+        while time.monotonic() < deadline and not user.test.stopped.is_set():
+            status = user.json('report_status', 'GET', queued['status_url']) or {}
+            if status.get('status') == 'done':
+                _, _, _, ok = user.step('report_download', 'GET', status.get('download_url') or queued['download_url'])
+                user.test.record('report_total', (time.perf_counter() - started) * 1000, 'done', ok)
+                return
+            if status.get('status') in (None, 'failed'):
+                break
+            time.sleep(REPORT_POLL_INTERVAL)
+        if user.test.stopped.is_set():
+            return
+    user.test.record('report_total', (time.perf_counter() - started) * 1000, 'failed', ok=False)
+
+
+def pwa_sync_journey(user: VirtualUser):
+    """Offline erfasste Einnahmen synchronisieren und Änderungen abholen"""
+    today = date.today().isoformat()
+    user.step('pwa_sync', 'POST', '/api/pwa/sync/entries',
+              check=lambda status, body, headers: not json.loads(body).get('failed'),
+              payload={'entries': [{
+                  'idempotency_key': user.next_key(),
+                  'device_id': user.rng.choice(user.device_ids),
+                  'amount': round(user.rng.uniform(1, 30), 2),
+                  'date': today,
+              } for _ in range(user.rng.randrange(1, 20))]})
+    user.step('pwa_changes', 'GET', '/api/pwa/changes')
+
+
+def relogin_journey(user: VirtualUser):
+    """Abmelden und wieder anmelden (Schichtwechsel, abgelaufene Session)"""
+    user.step('logout', 'GET', '/logout', expect=(302,))
+    user.client.cookies.clear()
+    user.login()
+    user.step('dashboard', 'GET', '/modern/dashboard')
+
+
+JOURNEYS = {
+    'week_entry': week_entry_journey,
+    'refill': refill_journey,
+    'report': report_journey,
+    'pwa_sync': pwa_sync_journey,
+    'relogin': relogin_journey,
+}
+
+
+def format_report(result: dict) -> str:
+    lines = []
+    for stage, data in result['stages'].items():
+        steps = data['steps']
+        total = sum(step['count'] for step in steps.values())
+        errors = sum(step['errors'] for step in steps.values())
+        lines += [
+            '',
+            f"{stage} ({data['duration']} s): {total / data['duration']:.1f} Anfragen/s, "
+            f"Fehler {errors / total * 100 if total else 0:.2f}%",
+            f"  {'Schritt':<20} {'Anzahl':>7} {'/s':>7} {'Fehler':>7} "
+            f"{'p50':>8} {'p90':>8} {'p95':>8} {'p99':>8} {'max':>8}",
+        ]
+        for name, step in steps.items():
+            latency = step['latency_ms']
+            lines.append(
+                f"  {name:<20} {step['count']:>7} {step['throughput']:>7.2f} {step['error_rate']:>6.1f}% "
+                f"{latency['p50']:>8.1f} {latency['p90']:>8.1f} {latency['p95']:>8.1f} "
+                f"{latency['p99']:>8.1f} {latency['max']:>8.1f}"
+            )
+    return '\n'.join(lines)
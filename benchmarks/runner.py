@@ -0,0 +1,187 @@
+# benchmarks/runner.py
+"""
+Benchmarks der Endpoints über den Flask-Test-Client
+Jedes Szenario läuft nach einigen Aufwärm-Durchläufen mehrfach als
+Benchmark-Besitzer; gemessen werden Latenz (Perzentile) und Anzahl der
+Datenbank-Abfragen je Aufruf. Das Ergebnis enthält Commit, Datenbank und
+Datenmengen, damit Läufe zwischen Commits vergleichbar sind.
+"""
+
+from datetime import date, datetime, timedelta
+import fnmatch
+import platform
+import subprocess
+import time
+import uuid
+from typing import Dict, List, Optional
+
+from app import db
+from app.models import User, Device, Entry
+from app.models.inventory import Supplier
+from app.utils import cache as aggregate_cache
+from app.utils.sql_profiler import collect_queries
+from app.utils.week_grid import location_groups
+
+from benchmarks.common import bench_owner_name, summarize
+from benchmarks.datagen import dataset_anchor
+from benchmarks.scenarios import SCENARIOS, BenchContext, Scenario
+
+
+def git_revision() -> Dict[str, Optional[str]]:
+    """Aktueller Commit (None außerhalb eines Git-Checkouts)"""
+    def git(*args):
+        try:
+            return subprocess.run(['git', *args], capture_output=True, text=True, timeout=10,
+                                  check=True).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return None
+
+    status = git('status', '--porcelain', '--untracked-files=no')
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'branch': git('rev-parse', '--abbrev-ref', 'HEAD'),
+        'dirty': bool(status) if status is not None else None,
+    }
+
+
+class BenchmarkRunner:
+    """Führt die Szenarien gegen eine App mit generierten Daten aus"""
+
+    def __init__(self, app, iterations: int = 20, warmup: int = 3, cold: bool = False,
+                 skip_writes: bool = False, only: Optional[List[str]] = None, log=print):
+        self.app = app
+        self.iterations = iterations
+        self.warmup = warmup
+        self.cold = cold
+        self.skip_writes = skip_writes
+        self.only = only
+        self.log = log
+
+    def context(self, owner: str = None) -> BenchContext:
+        user = User.query.filter_by(username=owner or bench_owner_name()).first()
+        if user is None:
+            raise RuntimeError("Keine Benchmark-Daten - zuerst 'python -m benchmarks generate' ausführen")
+
+        device_ids = [row.id for row in db.session.query(Device.id).filter(
+            Device.owner_id == user.id).order_by(Device.id).limit(50)]
+        supplier = db.session.query(Supplier.id).filter(Supplier.user_id == user.id).order_by(Supplier.id).first()
+        # Woche des Stichtags messen, sonst träfen die Wochenraster-Szenarien bei
+        # --anchor eine leere Woche
+        anchor = dataset_anchor() or date.today()
+        week_start = anchor - timedelta(days=anchor.weekday())
+        # Größte Standort-Gruppe für die nachgeladenen Gerätezeilen
+        groups = location_groups(user.id, week_start)
+        location = max(groups, key=lambda group: group.devices).key if groups else ''
+        return BenchContext(
+            user_id=user.id,
+            device_ids=device_ids,
+            supplier_id=supplier.id if supplier else None,
+            week_start=week_start,
+            location=location,
+            run_id=uuid.uuid4().hex[:8],
+        )
+
+    def selected(self) -> List[Scenario]:
+        scenarios = SCENARIOS
+        if self.only:
+            scenarios = [s for s in scenarios if any(fnmatch.fnmatch(s.name, pattern) for pattern in self.only)]
+        if self.skip_writes:
+            scenarios = [s for s in scenarios if not s.writes]
+        return scenarios
+
+    def dataset(self, ctx: BenchContext) -> Dict[str, int]:
+        """Datenmengen des Benchmark-Besitzers (für die Vergleichbarkeit)"""
+        return {
+            'devices': Device.query.filter_by(owner_id=ctx.user_id).count(),
+            'entries': db.session.query(Entry.id).filter(Entry.owner_id == ctx.user_id).count(),
+            'users': User.query.count(),
+        }
+
+    def _jwt_headers(self, ctx: BenchContext):
+        from flask_jwt_extended import create_access_token
+        return {'Authorization': f'Bearer {create_access_token(identity=ctx.user_id)}'}
+
+    def run(self, owner: str = None) -> dict:
+        with self.app.app_context():
+            ctx = self.context(owner)
+            dataset = self.dataset(ctx)
+
+        client = self.app.test_client()
+        with client.session_transaction() as session:
+            session['_user_id'] = str(ctx.user_id)
+            session['_fresh'] = True
+
+        results = {}
+        for scenario in self.selected():
+            results[scenario.name] = self._run_scenario(client, scenario, ctx)
+            self.log(format_line(scenario.name, results[scenario.name]))
+
+        return {
+            'meta': {
+                'timestamp': datetime.now().isoformat(timespec='seconds'),
+                'git': git_revision(),
+                'python': platform.python_version(),
+                'database': self.app.config['SQLALCHEMY_DATABASE_URI'].split(':', 1)[0],
+                'iterations': self.iterations,
+                'warmup': self.warmup,
+                'cold_cache': self.cold,
+                'week_start': ctx.week_start.isoformat(),
+                'dataset': dataset,
+            },
+            'scenarios': results,
+        }
+
+    def _run_scenario(self, client, scenario: Scenario, ctx: BenchContext) -> dict:
+        if scenario.name not in self.app.view_functions:
+            return {'skipped': 'Endpoint nicht registriert'}
+
+        headers = {}
+        if scenario.jwt:
+            try:
+                with self.app.app_context():
+                    headers = self._jwt_headers(ctx)
+            except Exception as e:
+                return {'skipped': f'Kein JWT: {e}'}
+
+        path = scenario.path(ctx) if callable(scenario.path) else scenario.path
+        latencies, queries, statuses = [], [], set()
+
+        for iteration in range(self.warmup + self.iterations):
+            if self.cold:
+                aggregate_cache.invalidate_owner(ctx.user_id)
+            kwargs = {'headers': headers}
+            if scenario.payload is not None:
+                kwargs['json'] = scenario.payload(ctx, iteration)
+
+            with collect_queries() as stats:
+                started = time.perf_counter()
+                response = client.open(path, method=scenario.method, **kwargs)
+                elapsed = (time.perf_counter() - started) * 1000
+            response.close()
+
+            if iteration < self.warmup:
+                continue
+            latencies.append(elapsed)
+            queries.append(stats.count)
+            statuses.add(response.status_code)
+
+        return {
+            'path': path,
+            'method': scenario.method,
+            'status': sorted(statuses),
+            'latency_ms': summarize(latencies),
+            'queries': {
+                'min': min(queries),
+                'max': max(queries),
+                'mean': round(sum(queries) / len(queries), 1),
+            },
+        }
+
+
+def format_line(name: str, result: dict) -> str:
+    if 'skipped' in result:
+        return f"{name:<36} übersprungen ({result['skipped']})"
+    latency = result['latency_ms']
+    status = ','.join(str(code) for code in result['status'])
+    return (f"{name:<36} p50 {latency['p50']:8.2f} ms  p95 {latency['p95']:8.2f} ms  "
+            f"p99 {latency['p99']:8.2f} ms  {result['queries']['mean']:6.1f} Abfragen  [{status}]")
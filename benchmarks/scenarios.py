@@ -0,0 +1,89 @@
+# benchmarks/scenarios.py
+"""
+Gemessene Endpoints
+Pfade und Payloads dürfen Funktionen sein, die den BenchContext (IDs des
+Benchmark-Besitzers) bzw. zusätzlich die Nummer des Durchlaufs erhalten.
+Schreibende Szenarien verändern den Datenbestand und lassen sich mit
+--skip-writes auslassen.
+"""
+
+from datetime import date, timedelta
+from typing import Any, Callable, List, NamedTuple, Optional, Union
+from urllib.parse import urlencode
+
+
+class BenchContext(NamedTuple):
+    """IDs des Benchmark-Besitzers für Pfade und Payloads"""
+    user_id: int
+    device_ids: List[int]
+    supplier_id: Optional[int]
+    week_start: date
+    location: str
+    run_id: str
+
+
+class Scenario(NamedTuple):
+    """Ein gemessener Aufruf - name ist der Flask-Endpoint (nicht registriert = übersprungen)"""
+    name: str
+    method: str
+    path: Union[str, Callable[[BenchContext], str]]
+    payload: Optional[Callable[[BenchContext, int], Any]] = None
+    writes: bool = False
+    jwt: bool = False
+
+
+def _week_payload(ctx: BenchContext, iteration: int):
+    """Wochenraster der ersten Geräte - Beträge wechseln je Durchlauf, damit wirklich geschrieben wird"""
+    days = [(ctx.week_start + timedelta(days=offset)).isoformat() for offset in range(7)]
+    return {
+        'week_start': ctx.week_start.isoformat(),
+        'entries': {
+            str(device_id): {day: 10 + (iteration + index) % 7 for day in days}
+            for index, device_id in enumerate(ctx.device_ids[:20])
+        },
+        'summary': True,
+    }
+
+
+def _sync_payload(ctx: BenchContext, iteration: int):
+    """Offline-Stapel der PWA mit neuen Idempotenz-Schlüsseln"""
+    return {
+        'entries': [{
+            'idempotency_key': f'bench-{ctx.run_id}-{iteration}-{index}',
+            'device_id': device_id,
+            'amount': 12.5,
+            'date': ctx.week_start.isoformat(),
+        } for index, device_id in enumerate(ctx.device_ids[:20])]
+    }
+
+
+SCENARIOS = [
+    Scenario('dashboard_modern.dashboard', 'GET', '/modern/dashboard'),
+    Scenario('entries.index', 'GET', '/entries/'),
+    Scenario('entries.week_groups', 'GET', lambda ctx: f'/entries/week/groups?week_start={ctx.week_start}'),
+    Scenario('entries.week_rows', 'GET',
+             lambda ctx: '/entries/week/rows?' + urlencode({'week_start': ctx.week_start, 'location': ctx.location})),
+    Scenario('entries.save_week', 'POST', '/entries/save-week', payload=_week_payload, writes=True),
+    Scenario('income.index', 'GET', '/income/'),
+    Scenario('expenses.index', 'GET', '/expenses/'),
+    Scenario('devices.index', 'GET', '/devices/'),
+    Scenario('reports.index', 'GET', '/reports/'),
+    Scenario('reports.cashflow', 'GET', '/reports/cashflow?months=12'),
+    Scenario('reports.product_analysis', 'GET', '/reports/product-analysis'),
+    Scenario('reports.quick_report', 'GET', '/reports/quick'),
+    Scenario('refills.index', 'GET', '/refills/'),
+    Scenario('products.index', 'GET', '/products/'),
+    Scenario('inventory.quick_view', 'GET', '/inventory/quick_view'),
+    Scenario('suppliers.index', 'GET', '/suppliers/'),
+    Scenario('suppliers.supplier_details', 'GET',
+             lambda ctx: f'/suppliers/details/{ctx.supplier_id}'),
+    Scenario('users.index', 'GET', '/users/'),
+    Scenario('users.user_stats', 'GET', '/users/stats'),
+    Scenario('api_v1.get_devices', 'GET', '/api/v1/devices', jwt=True),
+    Scenario('api_v1.get_entries', 'GET', '/api/v1/entries', jwt=True),
+    Scenario('api_v1.get_statistics_overview', 'GET', '/api/v1/statistics/overview', jwt=True),
+    Scenario('pwa_api.cache_dashboard', 'GET', '/api/pwa/cache/dashboard'),
+    Scenario('pwa_api.cache_products', 'GET', '/api/pwa/cache/products'),
+    Scenario('pwa_api.changes', 'GET', '/api/pwa/changes'),
+    Scenario('pwa_api.sync_entries', 'POST', '/api/pwa/sync/entries', payload=_sync_payload, writes=True),
+]
@@ -0,0 +1,15 @@
+# celery_worker.py
+"""
+Celery-Worker für Hintergrund-Jobs (Reports)
+Start: celery -A celery_worker.celery worker --loglevel=info
+Benötigt CELERY_BROKER_URL (z.B. redis://redis:6379/1)
+"""
+
+from app import create_app
+from app.jobs import get_celery
+
+app = create_app()
+celery = get_celery()
+
+if celery is None:
+    raise RuntimeError("CELERY_BROKER_URL ist nicht gesetzt - Jobs laufen im Thread-Pool der App")
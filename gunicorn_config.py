@@ -0,0 +1,38 @@
+# gunicorn_config.py
+"""
+Gunicorn-Konfiguration für den Produktivbetrieb
+Start: gunicorn -c gunicorn_config.py run:app
+
+Prometheus-Metriken werden im Multiprocess-Modus gesammelt: jeder Worker
+schreibt in PROMETHEUS_MULTIPROC_DIR, /metrics fasst alle Worker zusammen.
+Die Variable muss gesetzt sein, bevor prometheus_client importiert wird -
+deshalb hier und nicht in der App.
+"""
+
+import multiprocessing
+import os
+import shutil
+
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/automaten_prometheus')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:5000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+# Für die App (Worker erben die Umgebung): ohne Redis kein prozessinterner Cache
+os.environ['WEB_CONCURRENCY'] = str(workers)
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+accesslog = '-'
+errorlog = '-'
+
+
+def on_starting(server):
+    """Metrik-Dateien eines früheren Laufs verwerfen"""
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    """Live-Gauges (laufende Requests, Pool) des beendeten Workers entfernen"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
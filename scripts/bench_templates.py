@@ -0,0 +1,63 @@
+"""
+Micro-Benchmark: render_modern_template-Layout mit und ohne Template-Cache
+Misst die Renderzeit pro Request für das Layout (ohne Datenbank).
+
+Aufruf: python scripts/bench_templates.py [anzahl]
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask import Flask, render_template_string
+from app.utils.templating import render_cached_template, clear_template_cache
+from app.web.dashboard_modern import MODERN_LAYOUT
+
+# Typischer Seiteninhalt (Karten + Tabelle), wie ihn die Blueprints per f-String bauen
+CONTENT = '<div class="row">' + ''.join(
+    f'<div class="col-md-3"><div class="card"><div class="card-body">Karte {i}</div></div></div>'
+    for i in range(8)
+) + '</div><table class="table">' + ''.join(
+    f'<tr><td>Gerät {i}</td><td>{i * 12.5:.2f} €</td></tr>' for i in range(100)
+) + '</table>'
+
+NAVIGATION = [
+    {'icon': 'bi-speedometer2', 'text': 'Dashboard', 'active': True, 'route': None},
+    {'divider': True},
+    {'section': 'Module'},
+] + [{'icon': 'bi-cpu', 'text': f'Modul {i}', 'route': None} for i in range(8)]
+
+CONTEXT = dict(
+    content=CONTENT,
+    title='Benchmark',
+    navigation=NAVIGATION,
+    breadcrumb=[{'text': 'Dashboard', 'url': '/'}, {'text': 'Benchmark'}],
+    extra_css='',
+    extra_scripts='',
+    url_for=lambda endpoint, **values: '#'
+)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    app = Flask(__name__)
+
+    with app.test_request_context('/'):
+        uncached = timeit.timeit(lambda: render_template_string(MODERN_LAYOUT, **CONTEXT), number=runs)
+
+        clear_template_cache()
+        first = timeit.timeit(lambda: render_cached_template(MODERN_LAYOUT, **CONTEXT), number=1)
+        cached = timeit.timeit(lambda: render_cached_template(MODERN_LAYOUT, **CONTEXT), number=runs)
+
+        assert render_template_string(MODERN_LAYOUT, **CONTEXT) == render_cached_template(MODERN_LAYOUT, **CONTEXT)
+
+    print(f"Layout: {len(MODERN_LAYOUT)} Zeichen, Inhalt: {len(CONTENT)} Zeichen, {runs} Durchläufe")
+    print(f"render_template_string:  {uncached / runs * 1000:8.3f} ms/Request")
+    print(f"Cache (erster Aufruf):   {first * 1000:8.3f} ms")
+    print(f"Cache (danach):          {cached / runs * 1000:8.3f} ms/Request")
+    print(f"Faktor:                  {uncached / cached:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
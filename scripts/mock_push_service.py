@@ -0,0 +1,79 @@
+"""
+Lokaler Mock-Push-Dienst zum Testen des Web-Push-Versands
+Beantwortet POST /push/<id> mit 201 (zugestellt), /gone/<id> mit 410
+(Abonnement abgelaufen) und /fail/<id> mit 500. Beim Start werden
+Abonnements mit gültigen Schlüsseln (P-256) ausgegeben, die per
+POST /api/pwa/push/subscribe registriert werden können.
+
+Aufruf: python scripts/mock_push_service.py [port] [anzahl]
+"""
+import base64
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.hazmat.primitives import serialization
+
+STATUS = {'push': 201, 'gone': 410, 'fail': 500}
+
+received = {'push': 0, 'gone': 0, 'fail': 0}
+_lock = threading.Lock()
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def make_subscription(base_url: str, kind: str = 'push', name: str = '1') -> dict:
+    """Abonnement wie PushSubscription.toJSON() im Browser"""
+    key = ec.generate_private_key(ec.SECP256R1())
+    p256dh = key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return {
+        'endpoint': f'{base_url}/{kind}/{name}',
+        'keys': {'p256dh': b64url(p256dh), 'auth': b64url(os.urandom(16))}
+    }
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        kind = self.path.strip('/').split('/')[0]
+        self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status = STATUS.get(kind, 404)
+        with _lock:
+            if kind in received:
+                received[kind] += 1
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve(port: int = 0):
+    """Server im Hintergrund starten -> (server, base_url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+if __name__ == '__main__':
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8099
+    count = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    server, base_url = serve(port)
+    print(f"Mock-Push-Dienst auf {base_url}")
+    for i in range(count):
+        print(json.dumps(make_subscription(base_url, 'push', str(i))))
+    print(json.dumps(make_subscription(base_url, 'gone', 'expired')))
+
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        print(f"\nEmpfangen: {received}")
+        server.shutdown()
@@ -0,0 +1,41 @@
+"""
+Kennzahlen-Cache: Wahl des Backends
+"""
+
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from app.utils import cache
+
+
+@pytest.fixture
+def init(monkeypatch):
+    """init_cache mit eigener Konfiguration, ohne den Zustand anderer Tests zu ändern"""
+    monkeypatch.setattr(cache, '_state', dict(cache._state))
+
+    def init_cache(**config):
+        cache.init_cache(SimpleNamespace(config=config, logger=logging.getLogger('test')))
+        return cache.backend_name()
+    return init_cache
+
+
+def test_local_cache_for_a_single_worker(init):
+    assert init(CACHE_REDIS_URL=None, WEB_CONCURRENCY=1) == 'local'
+
+
+def test_no_local_cache_for_several_workers(init):
+    calls = []
+
+    @cache.cached('test')
+    def figures(owner_id):
+        calls.append(owner_id)
+        return len(calls)
+
+    assert init(CACHE_REDIS_URL=None, WEB_CONCURRENCY=4) == 'none'
+    assert [figures(owner_id=1), figures(owner_id=1)] == [1, 2]
+
+
+def test_unreachable_redis_with_several_workers(init):
+    assert init(CACHE_REDIS_URL='redis://127.0.0.1:1/0', WEB_CONCURRENCY=4) == 'none'
@@ -0,0 +1,37 @@
+"""
+Delta-Sync: Besitzerwechsel eines Geräts
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.models import Device, Entry, SyncTombstone, User
+from app.utils.delta_sync import changes_since
+
+
+def test_owner_change_tombstones_only_the_device(database, owner):
+    device = Device.query.filter_by(owner_id=owner.id).first()
+    for days in range(40):
+        database.session.add(Entry(device_id=device.id, amount=Decimal('1.00'),
+                                   date=date.today() - timedelta(days=days)))
+    buyer = User(username='buyer', email='buyer@example.com')
+    buyer.set_password('secret123')
+    database.session.add(buyer)
+    database.session.commit()
+    cursor = changes_since(owner.id)['cursor']
+    buyer_cursor = changes_since(buyer.id)['cursor']
+
+    device.owner_id = buyer.id
+    database.session.commit()
+
+    tombstones = SyncTombstone.query.filter_by(owner_id=owner.id).all()
+    assert [(t.entity, t.entity_id) for t in tombstones] == [('devices', device.id)]
+
+    old = changes_since(owner.id, cursor)
+    assert old['devices']['deleted'] == [device.id]
+    assert old['entries']['upserted'] == []
+
+    new = changes_since(buyer.id, buyer_cursor)
+    assert [d['id'] for d in new['devices']['upserted']] == [device.id]
+    assert len(new['entries']['upserted']) == 31
+    assert Entry.query.filter_by(owner_id=buyer.id).count() == 40
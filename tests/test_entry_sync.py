@@ -0,0 +1,111 @@
+"""
+PWA-Offline-Sync: sync_entries fügt per Upsert ein und bucht den Tagesumsatz
+selbst - Wiederholungen dürfen nichts doppelt buchen, fehlerhafte Einträge
+scheitern einzeln.
+"""
+
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from app.models import DailyRevenue, Device, Entry
+from app.utils.entry_sync import CREATED, DUPLICATE, FAILED, sync_entries
+
+
+def sync(db, owner, items):
+    results = sync_entries(owner.id, owner.id, items)
+    db.session.commit()
+    return results
+
+
+def device_ids(owner):
+    return [device.id for device in Device.query.filter_by(owner_id=owner.id).order_by(Device.id)]
+
+
+def item(key, device_id, amount='10.00', day='2025-03-10', **extra):
+    return dict(idempotency_key=key, device_id=device_id, amount=amount, date=day, **extra)
+
+
+def test_new_entries_book_the_rollup(database, owner):
+    north, south = device_ids(owner)
+
+    results = sync(database, owner, [
+        item('a', north, '10.00', cash_amount='6.00', card_amount='4.00'),
+        item('b', south, '2.50', day='2025-03-11'),
+    ])
+
+    assert [r['status'] for r in results] == [CREATED, CREATED]
+    assert Entry.query.filter_by(owner_id=owner.id).count() == 2
+    totals = DailyRevenue.totals(owner.id)
+    assert (totals['total'], totals['count'], totals['cash'], totals['card']) == \
+        (Decimal('12.50'), 2, Decimal('6.00'), Decimal('4.00'))
+    assert DailyRevenue.verify() == []
+
+
+def test_replay_returns_existing_ids(database, owner):
+    north, _ = device_ids(owner)
+    batch = [item('a', north), item('b', north, '5.00', day='2025-03-11')]
+    first = sync(database, owner, batch)
+
+    replay = sync(database, owner, batch)
+
+    assert [r['status'] for r in replay] == [DUPLICATE, DUPLICATE]
+    assert [r['id'] for r in replay] == [r['id'] for r in first]
+    assert Entry.query.count() == 2
+    assert DailyRevenue.totals(owner.id)['total'] == Decimal('15.00')
+    assert DailyRevenue.verify() == []
+
+
+def test_same_key_twice_in_one_batch(database, owner):
+    north, _ = device_ids(owner)
+
+    results = sync(database, owner, [item('a', north, '10.00'), item('a', north, '99.00')])
+
+    assert [r['status'] for r in results] == [CREATED, DUPLICATE]
+    assert results[0]['id'] == results[1]['id']
+    assert Entry.query.one().amount == Decimal('10.00')
+    assert DailyRevenue.verify() == []
+
+
+@pytest.mark.parametrize('bad', [
+    item('bad', None, 'NaN'),
+    item('bad', None, 'Infinity'),
+    item('bad', None, 'abc'),
+    item('bad', None, '1e30'),
+    item('bad', None, '-1.00'),
+    item('bad', None, None),
+    item('bad', None, day='2025-13-40'),
+    {'idempotency_key': 'bad', 'amount': '1.00', 'date': '2025-03-10'},
+    'kein Objekt',
+])
+def test_bad_item_fails_alone(database, owner, bad):
+    north, _ = device_ids(owner)
+    if isinstance(bad, dict) and 'device_id' in bad:
+        bad = dict(bad, device_id=north)
+
+    results = sync(database, owner, [bad, item('good', north, '3.00')])
+
+    assert results[0]['status'] == FAILED
+    assert results[0]['error']
+    assert results[1]['status'] == CREATED
+    assert Entry.query.one().idempotency_key == 'good'
+    assert DailyRevenue.verify() == []
+
+
+def test_foreign_device_is_rejected(database, owner):
+    from app.models import DeviceType, User
+
+    other = User(username='other', email='other@example.com')
+    other.set_password('secret123')
+    database.session.add(other)
+    database.session.flush()
+    foreign = Device(name='Fremd', type=DeviceType.KAFFEE, owner_id=other.id)
+    database.session.add(foreign)
+    database.session.commit()
+
+    results = sync(database, owner, [item('a', foreign.id)])
+
+    assert results[0]['status'] == FAILED
+    assert Entry.query.count() == 0
+    assert DailyRevenue.totals(other.id, date(2025, 1, 1))['count'] == 0
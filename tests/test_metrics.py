@@ -0,0 +1,27 @@
+"""
+/metrics: ohne Token nicht öffentlich
+"""
+
+from flask import Flask
+
+from app import db
+from app.utils.metrics import init_metrics
+
+
+def test_metrics_off_without_token(app):
+    assert app.config['METRICS_ENABLED'] is False
+    assert app.test_client().get('/metrics').status_code == 404
+
+
+def test_metrics_require_bearer_token():
+    app = Flask('metrics-test')
+    app.config.update(METRICS_ENABLED=True, METRICS_TOKEN='geheim', SQLALCHEMY_DATABASE_URI='sqlite://')
+    db.init_app(app)
+    init_metrics(app)
+    client = app.test_client()
+
+    assert client.get('/metrics').status_code == 403
+    assert client.get('/metrics', headers={'Authorization': 'Bearer falsch'}).status_code == 403
+    response = client.get('/metrics', headers={'Authorization': 'Bearer geheim'})
+    assert response.status_code == 200
+    assert b'automaten_http_requests_total' in response.data
@@ -0,0 +1,98 @@
+"""
+Web-Push-Versand: deliver() mit einem Ersatz für pywebpush.webpush, der je
+nach Endpunkt zustellt (201), abgelaufen meldet (404/410) oder scheitert (500).
+"""
+
+from types import SimpleNamespace
+
+import pytest
+from pywebpush import WebPushException
+
+from app.models import Notification, NotificationType, PushSubscription, User
+from app.utils import push
+
+STATUS = {'ok': 201, 'missing': 404, 'gone': 410, 'fail': 500}
+
+
+@pytest.fixture
+def sent(app, monkeypatch):
+    """Zustellversuche (Endpunkte) des Ersatz-webpush"""
+    calls = []
+
+    def fake_webpush(subscription_info, data, **kwargs):
+        endpoint = subscription_info['endpoint']
+        calls.append(endpoint)
+        status = STATUS[endpoint.rsplit('/', 2)[-2]]
+        if status >= 400:
+            raise WebPushException(f'Push fehlgeschlagen: {status}',
+                                   response=SimpleNamespace(status_code=status))
+
+    monkeypatch.setattr(push, 'webpush', fake_webpush)
+    monkeypatch.setitem(app.config, 'VAPID_PRIVATE_KEY', 'test-key')
+    return calls
+
+
+def subscribe(db, user, *kinds, failures=0):
+    for kind in kinds:
+        db.session.add(PushSubscription(
+            user_id=user.id, endpoint=f'https://push.example.com/{kind}/{user.id}-{failures}',
+            p256dh='p256dh', auth='auth', failure_count=failures
+        ))
+    db.session.commit()
+
+
+def notify(db, user):
+    notification = Notification(user_id=user.id, type=NotificationType.INFO,
+                                title='Nachfüllen', message='Automat Nord ist fast leer')
+    db.session.add(notification)
+    db.session.commit()
+    return notification.id
+
+
+def endpoints(user):
+    return sorted(s.endpoint.split('/')[3] for s in PushSubscription.query.filter_by(user_id=user.id))
+
+
+def test_expired_endpoints_are_pruned(database, owner, sent):
+    subscribe(database, owner, 'ok', 'missing', 'gone')
+    notification_id = notify(database, owner)
+
+    result = push.deliver([notification_id])
+
+    assert len(sent) == 3
+    assert result == {'sent': 1, 'delivered': 1, 'failed': 0, 'pruned': 2}
+    assert endpoints(owner) == ['ok']
+    assert PushSubscription.query.one().last_success_at is not None
+    assert database.session.get(Notification, notification_id).push_sent is True
+
+
+def test_failures_are_counted_and_pruned_at_limit(database, owner, sent):
+    subscribe(database, owner, 'fail')
+    subscribe(database, owner, 'fail', failures=push.MAX_FAILURES - 1)
+    notification_id = notify(database, owner)
+
+    result = push.deliver([notification_id])
+
+    assert result['failed'] == 2
+    assert result['pruned'] == 1
+    assert [s.failure_count for s in PushSubscription.query.filter_by(user_id=owner.id)] == [1]
+    assert database.session.get(Notification, notification_id).push_sent is False
+
+
+def test_push_sent_only_for_delivered_notifications(database, owner, sent):
+    other = User(username='other', email='other@example.com')
+    other.set_password('secret123')
+    database.session.add(other)
+    database.session.commit()
+    subscribe(database, owner, 'ok')
+    subscribe(database, other, 'fail')
+    delivered, failed = notify(database, owner), notify(database, other)
+
+    push.deliver([delivered, failed])
+    push.deliver([delivered])
+
+    assert database.session.get(Notification, delivered).push_sent is True
+    assert database.session.get(Notification, failed).push_sent is False
+    # Bereits zugestellte Benachrichtigungen werden nicht erneut gesendet
+    assert sent.count(f'https://push.example.com/ok/{owner.id}-0') == 1
+    assert push.pending_ids() == [failed]
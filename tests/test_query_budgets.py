@@ -0,0 +1,50 @@
+"""
+Query-Budgets der meistgenutzten Seiten und API-Endpunkte
+Mehr Geräte und Einnahmen als die N+1-Schwelle, damit Lazy-Loads in
+Schleifen auffallen. Gezählt wird der erste Aufruf (User und Kennzahlen
+nicht im Cache). Steigt eine Zahl, erst den Grund prüfen, dann das
+Budget anpassen.
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+import pytest
+
+from app.models import Device, DeviceType, Entry, Supplier
+from app.utils.sql_profiler import assert_query_budget
+
+
+@pytest.fixture
+def client(app, database, owner):
+    for number in range(4):
+        database.session.add(Device(name=f'Automat {number}', type=DeviceType.GETRAENKE,
+                                    owner_id=owner.id, location=f'Halle {number % 2}'))
+    database.session.flush()
+    for device in Device.query.filter_by(owner_id=owner.id):
+        for days in range(10):
+            database.session.add(Entry(device_id=device.id, amount=Decimal('2.50'),
+                                       date=date.today() - timedelta(days=days)))
+    for number in range(6):
+        database.session.add(Supplier(name=f'Lieferant {number}', user_id=owner.id))
+    database.session.commit()
+
+    client = app.test_client()
+    response = client.post('/login', data={'username': 'owner', 'password': 'secret123'})
+    assert response.status_code == 302
+    return client
+
+
+@pytest.mark.parametrize('url, budget', [
+    ('/api/pwa/changes', 5),
+    ('/api/pwa/cache/dashboard', 4),
+    ('/modern/dashboard', 5),
+    ('/income/', 8),
+    ('/suppliers/', 5),
+])
+def test_endpoint_query_budget(client, url, budget):
+    response = assert_query_budget(client, url, budget)
+
+    assert response.status_code == 200
+    # Mit SQL_PROFILING zählen Request-Hooks und Budget dieselben Abfragen
+    assert int(response.headers['X-DB-Query-Count']) <= budget
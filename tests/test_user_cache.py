@@ -0,0 +1,47 @@
+"""
+User-Cache für Flask-Login: ein gesperrter User darf nicht aus einem Cache
+kommen, den andere Worker nicht invalidieren können.
+"""
+
+import pytest
+from sqlalchemy import text
+
+from app.utils import cache, user_cache
+
+
+@pytest.fixture
+def local_cache(monkeypatch):
+    """Prozessinterner Cache mit einstellbarer Worker-Anzahl"""
+    def configure(workers):
+        monkeypatch.setitem(cache._state, 'backend', cache.LocalBackend())
+        monkeypatch.setitem(cache._state, 'workers', workers)
+    return configure
+
+
+def deactivate_elsewhere(db, user_id):
+    """Wie ein anderer Worker: die Invalidierung erreicht diesen Prozess nicht"""
+    db.session.execute(text('UPDATE users SET is_active = false WHERE id = :id'), {'id': user_id})
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def test_single_worker_serves_cached_user(database, owner, local_cache):
+    local_cache(workers=1)
+    user_id = owner.id
+    assert user_cache.load_user(user_id).id == user_id
+
+    deactivate_elsewhere(database, user_id)
+
+    # Nur ein Prozess: jede Änderung über das ORM hätte den Eintrag gelöscht
+    assert user_cache.load_user(user_id).id == user_id
+
+
+def test_several_workers_bypass_local_cache(database, owner, local_cache):
+    local_cache(workers=4)
+    user_id = owner.id
+    assert user_cache.load_user(user_id).id == user_id
+
+    deactivate_elsewhere(database, user_id)
+
+    assert user_cache.load_user(user_id) is None
+    assert cache.load_value(user_cache._key(user_id)) is None
@@ -0,0 +1,110 @@
+"""
+Wochenerfassung: save_week schreibt per Upsert/Bulk-Delete am ORM vorbei und
+bucht den Tagesumsatz selbst - danach muss der Rollup zu den Einnahmen passen
+(wie 'flask revenue reconcile').
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.models import DailyRevenue, Device, Entry, SyncTombstone
+from app.utils.week_grid import parse_cells, save_week
+
+MONDAY = date(2025, 3, 10)
+
+
+def save(db, owner, data):
+    result = save_week(owner.id, owner.id, MONDAY, parse_cells(data, MONDAY))
+    db.session.commit()
+    return result
+
+
+def devices(owner):
+    return [device.id for device in Device.query.filter_by(owner_id=owner.id).order_by(Device.id)]
+
+
+def week_total(owner, device_id=None):
+    return DailyRevenue.totals(owner.id, MONDAY, MONDAY + timedelta(days=6), device_id)
+
+
+def test_new_and_changed_cell(database, owner):
+    north, south = devices(owner)
+    save(database, owner, {north: {'2025-03-10': '10.00'}, south: {'2025-03-11': '4.50'}})
+
+    result = save(database, owner, {north: {'2025-03-10': '12.50'}, south: {'2025-03-11': '4.50'}})
+
+    assert (result.upserted, result.deleted, result.unchanged) == (1, 0, 1)
+    entry = Entry.query.filter_by(device_id=north, date=MONDAY).one()
+    assert entry.amount == Decimal('12.50')
+    assert entry.owner_id == owner.id
+    assert week_total(owner, north) == {'total': Decimal('12.50'), 'count': 1,
+                                        'cash': Decimal('0'), 'card': Decimal('0')}
+    assert DailyRevenue.verify() == []
+
+
+def test_cleared_cell_deletes_entry(database, owner):
+    north, _ = devices(owner)
+    save(database, owner, {north: {'2025-03-10': '10.00', '2025-03-12': '3.00'}})
+    entry_id = Entry.query.filter_by(device_id=north, date=MONDAY).one().id
+
+    result = save(database, owner, {north: {'2025-03-10': ''}})
+
+    assert (result.upserted, result.deleted) == (0, 1)
+    assert Entry.query.filter_by(device_id=north, date=MONDAY).count() == 0
+    assert week_total(owner)['total'] == Decimal('3.00')
+    assert week_total(owner)['count'] == 1
+    assert SyncTombstone.query.filter_by(owner_id=owner.id, entity='entries', entity_id=entry_id).count() == 1
+    assert DailyRevenue.verify() == []
+
+
+def test_replay_is_idempotent(database, owner):
+    north, south = devices(owner)
+    data = {north: {'2025-03-10': '10.00', '2025-03-11': '0'}, south: {'2025-03-16': '7.25'}}
+    save(database, owner, data)
+
+    result = save(database, owner, data)
+
+    assert (result.upserted, result.deleted, result.unchanged) == (0, 0, 3)
+    assert Entry.query.count() == 2
+    assert week_total(owner)['total'] == Decimal('17.25')
+    assert week_total(owner)['count'] == 2
+    assert DailyRevenue.verify() == []
+
+
+def test_foreign_devices_are_skipped(database, owner):
+    from app.models import DeviceType, User
+
+    other = User(username='other', email='other@example.com')
+    other.set_password('secret123')
+    database.session.add(other)
+    database.session.flush()
+    foreign = Device(name='Fremd', type=DeviceType.KAFFEE, owner_id=other.id)
+    database.session.add(foreign)
+    database.session.commit()
+
+    result = save(database, owner, {foreign.id: {'2025-03-10': '99.00'}})
+
+    assert result.skipped_devices == 1
+    assert Entry.query.count() == 0
+
+
+def test_rollup_reconciles_with_orm_changes(database, owner):
+    north, south = devices(owner)
+    save(database, owner, {
+        north: {'2025-03-10': '10.00', '2025-03-11': '20.00'},
+        south: {'2025-03-10': '5.00'},
+    })
+    save(database, owner, {north: {'2025-03-11': '0'}, south: {'2025-03-10': '6.00'}})
+
+    # Danach über das ORM ändern (Attribute nach commit abgelaufen)
+    entry = Entry.query.filter_by(device_id=south, date=MONDAY).one()
+    database.session.commit()
+    entry.amount = Decimal('8.00')
+    entry.date = MONDAY + timedelta(days=2)
+    database.session.commit()
+
+    save(database, owner, {north: {'2025-03-13': '1.00'}})
+
+    assert DailyRevenue.verify() == []
+    assert week_total(owner)['total'] == Decimal('19.00')
+    assert week_total(owner, south)['total'] == Decimal('8.00')